@@ -1,6 +1,6 @@
 
 from django.contrib import admin
-from .models import UserProfile, Offer, Request, Handshake, Transaction, Question, Message, Rating, Badge, ForumTopic, ForumReply
+from .models import UserProfile, Offer, Request, Handshake, Transaction, Question, Message, Rating, Badge, BadgeCounter, ForumTopic, ForumReply, TimebankDailyRollup, RollupWatermark, UnreadCounter, MessageArchive, OutgoingEmail
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -11,10 +11,10 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Offer)
 class OfferAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "user", "status", "created_at")
+    list_display = ("id", "title", "user", "status", "accepted_count", "max_participants", "created_at")
     search_fields = ("title", "description", "user__username")
     list_filter = ("status", "created_at")
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "accepted_count", "completed_count")
 
 
 @admin.register(Request)
@@ -87,16 +87,19 @@ class BadgeAdmin(admin.ModelAdmin):
     readonly_fields = ("earned_at",)
 
 
+@admin.register(BadgeCounter)
+class BadgeCounterAdmin(admin.ModelAdmin):
+    list_display = ("user", "posts_created", "handshakes_accepted", "exchanges_completed", "services_provided", "hours_earned")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user",)
+
+
 @admin.register(ForumTopic)
 class ForumTopicAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "author", "reply_count", "created_at")
+    list_display = ("id", "title", "author", "reply_count", "last_reply_at", "created_at")
     search_fields = ("title", "body", "author__username")
     list_filter = ("created_at",)
-    readonly_fields = ("created_at", "updated_at")
-    
-    def reply_count(self, obj):
-        return obj.replies.count()
-    reply_count.short_description = "Replies"
+    readonly_fields = ("created_at", "updated_at") + ForumTopic.ACTIVITY_FIELDS
 
 
 @admin.register(ForumReply)
@@ -105,3 +108,40 @@ class ForumReplyAdmin(admin.ModelAdmin):
     search_fields = ("body", "author__username", "topic__title")
     list_filter = ("created_at",)
     readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(TimebankDailyRollup)
+class TimebankDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "district", "volume", "transaction_count", "active_traders", "money_supply")
+    search_fields = ("district",)
+    list_filter = ("day",)
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_id", "updated_at")
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ("user", "handshake", "count", "last_message_id")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user", "handshake")
+
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ("handshake", "message_count", "last_message_id", "archived_at")
+    raw_id_fields = ("handshake",)
+    exclude = ("payload",)
+    readonly_fields = ("message_count", "last_message_id", "archived_at")
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "to_email", "status", "attempts", "next_attempt_at", "sent_at", "created_at")
+    search_fields = ("to_email", "subject")
+    list_filter = ("status", "kind")
+    readonly_fields = ("created_at", "sent_at", "attempts", "last_error")
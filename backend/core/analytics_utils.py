@@ -0,0 +1,213 @@
+"""
+Utility functions for the incremental timebank analytics rollups.
+
+Transactions are folded into TimebankDailyRollup / TimebankUserDailyRollup in
+id order, one bounded batch at a time. Each batch is aggregated in SQL and
+committed together with the watermark, so a batch is applied exactly once
+and re-running the update only processes rows added since the last run.
+
+Attribution: a transaction's volume counts towards the district of the
+receiver (the user who provided the service). Earned and spent totals are
+recorded under each user's own district.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import CharField, Count, F, Sum, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, TruncDate
+from django.utils import timezone
+
+from .models import Transaction, UserProfile, TimebankDailyRollup, TimebankUserDailyRollup, RollupWatermark
+
+
+TIMEBANK_WATERMARK = "timebank_transactions"
+ROLLUP_BATCH_SIZE = 5000
+# Rows younger than this are left for the next run so that transactions which
+# commit slightly out of id order are not skipped by the watermark.
+ROLLUP_SAFETY_LAG = timedelta(seconds=60)
+
+
+def _district_of(field):
+    return Coalesce(F(field), Value(""), output_field=CharField())
+
+
+def _fold_batch(batch_size, cutoff):
+    """
+    Fold the next batch of transactions into the rollups.
+    Returns the number of transactions processed (0 when caught up).
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.get_or_create(name=TIMEBANK_WATERMARK)
+        watermark = RollupWatermark.objects.select_for_update().get(pk=watermark.pk)
+
+        ids = list(
+            Transaction.objects.filter(id__gt=watermark.last_id, created_at__lte=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        batch = Transaction.objects.filter(id__gt=watermark.last_id, id__lte=ids[-1])
+
+        # Aggregate the batch in SQL
+        volume_rows = batch.annotate(
+            day=TruncDate("created_at"), district=_district_of("receiver__profile__district")
+        ).values("day", "district").annotate(volume=Sum("amount"), count=Count("id"))
+        earned_rows = batch.annotate(
+            day=TruncDate("created_at"), district=_district_of("receiver__profile__district")
+        ).values("day", "district", "receiver_id").annotate(total=Sum("amount"))
+        spent_rows = batch.annotate(
+            day=TruncDate("created_at"), district=_district_of("sender__profile__district")
+        ).values("day", "district", "sender_id").annotate(total=Sum("amount"))
+
+        # Per-user rows: merge earned/spent deltas into existing rows
+        user_deltas = {}
+        for row in earned_rows:
+            key = (row["day"], row["district"], row["receiver_id"])
+            user_deltas.setdefault(key, [0, 0])[0] += row["total"]
+        for row in spent_rows:
+            key = (row["day"], row["district"], row["sender_id"])
+            user_deltas.setdefault(key, [0, 0])[1] += row["total"]
+
+        days = {key[0] for key in user_deltas}
+        districts = {key[1] for key in user_deltas}
+        existing_users = {
+            (r.day, r.district, r.user_id): r
+            for r in TimebankUserDailyRollup.objects.filter(
+                day__in=days, district__in=districts, user_id__in={key[2] for key in user_deltas}
+            )
+        }
+        user_rows = []
+        new_user_rows = []
+        for key, (earned, spent) in user_deltas.items():
+            row = existing_users.get(key)
+            if row is None:
+                new_user_rows.append(TimebankUserDailyRollup(
+                    day=key[0], district=key[1], user_id=key[2], earned=earned, spent=spent
+                ))
+            else:
+                row.earned += earned
+                row.spent += spent
+                user_rows.append(row)
+        TimebankUserDailyRollup.objects.bulk_update(user_rows, ["earned", "spent"], batch_size=500)
+        TimebankUserDailyRollup.objects.bulk_create(new_user_rows, batch_size=500)
+
+        # Daily rows for every (day, district) touched by either side
+        volume_deltas = {(r["day"], r["district"]): (r["volume"], r["count"]) for r in volume_rows}
+        touched = set(volume_deltas) | {(key[0], key[1]) for key in user_deltas}
+        existing_daily = {
+            (r.day, r.district): r
+            for r in TimebankDailyRollup.objects.filter(
+                day__in={key[0] for key in touched}, district__in={key[1] for key in touched}
+            )
+        }
+        traders = {
+            (r["day"], r["district"]): r["traders"]
+            for r in TimebankUserDailyRollup.objects.filter(
+                day__in={key[0] for key in touched}, district__in={key[1] for key in touched}
+            ).values("day", "district").annotate(traders=Count("user_id"))
+        }
+        supply = {
+            r["district"]: r["supply"] or 0
+            for r in UserProfile.objects.filter(
+                district__in={key[1] for key in touched}
+            ).values("district").annotate(supply=Sum("timebank_balance"))
+        }
+
+        daily_rows = []
+        new_daily_rows = []
+        for key in touched:
+            row = existing_daily.get(key)
+            if row is None:
+                row = TimebankDailyRollup(day=key[0], district=key[1])
+                new_daily_rows.append(row)
+            else:
+                daily_rows.append(row)
+            volume, count = volume_deltas.get(key, (0, 0))
+            row.volume += volume
+            row.transaction_count += count
+            row.active_traders = traders.get(key, 0)
+            row.money_supply = supply.get(key[1], 0)
+        now = timezone.now()
+        for row in daily_rows:
+            row.updated_at = now  # bulk_update() skips auto_now
+        TimebankDailyRollup.objects.bulk_update(
+            daily_rows, ["volume", "transaction_count", "active_traders", "money_supply", "updated_at"], batch_size=500
+        )
+        TimebankDailyRollup.objects.bulk_create(new_daily_rows, batch_size=500)
+
+        watermark.last_id = ids[-1]
+        watermark.save()
+        return len(ids)
+
+
+def update_timebank_rollups(batch_size=ROLLUP_BATCH_SIZE, safety_lag=ROLLUP_SAFETY_LAG, max_batches=None):
+    """
+    Fold all transactions newer than the watermark into the rollups.
+    Returns (transactions_processed, batches).
+    """
+    cutoff = timezone.now() - safety_lag
+    processed = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = _fold_batch(batch_size, cutoff)
+        if not count:
+            break
+        processed += count
+        batches += 1
+    return processed, batches
+
+
+def timebank_rollup_report(min_date=None, max_date=None, district=None, top_n=10):
+    """
+    Build chart data straight from the rollup tables.
+    Returns {"series": [...], "top_earners": [...], "top_spenders": [...]} where
+    the top lists hold up to `top_n` users per district.
+    """
+    daily = TimebankDailyRollup.objects.all()
+    users = TimebankUserDailyRollup.objects.all()
+    if min_date:
+        daily = daily.filter(day__gte=min_date)
+        users = users.filter(day__gte=min_date)
+    if max_date:
+        daily = daily.filter(day__lte=max_date)
+        users = users.filter(day__lte=max_date)
+    if district is not None:
+        daily = daily.filter(district=district)
+        users = users.filter(district=district)
+
+    series = [
+        {
+            "day": row.day,
+            "district": row.district,
+            "volume": row.volume,
+            "transactions": row.transaction_count,
+            "active_traders": row.active_traders,
+            "money_supply": row.money_supply,
+            "velocity": row.velocity,
+        }
+        for row in daily.order_by("day", "district")
+    ]
+
+    def top(field):
+        # Rank users within each district in SQL and keep the first top_n
+        ranked = users.values("district", "user_id", "user__username").annotate(
+            total=Sum(field)
+        ).filter(total__gt=0).annotate(
+            rank=Window(RowNumber(), partition_by=[F("district")], order_by=[F("total").desc(), F("user_id").asc()])
+        ).filter(rank__lte=top_n).order_by("district", "rank")
+        return [
+            {
+                "district": row["district"],
+                "user_id": row["user_id"],
+                "username": row["user__username"],
+                "total": row["total"],
+                "rank": row["rank"],
+            }
+            for row in ranked
+        ]
+
+    return {
+        "series": series,
+        "top_earners": top("earned"),
+        "top_spenders": top("spent"),
+    }
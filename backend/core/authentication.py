@@ -0,0 +1,108 @@
+"""
+JWT authentication for the API (REST_FRAMEWORK DEFAULT_AUTHENTICATION_CLASSES).
+
+ProfileJWTAuthentication validates tokens exactly like simplejwt's
+JWTAuthentication, but loads the user together with its profile in one
+select_related query and computes the viewer flags once per request:
+
+- user.is_admin: staff or superuser
+- user.email_verified: the profile's verification status
+
+Views and serializers check admins through is_admin(), which falls back to
+computing the flag for users that did not come through this class
+(force_authenticate in tests, related objects).
+
+With settings.AUTH_USER_CACHE_SECONDS > 0 the loaded user is also cached
+across requests, keyed by user id and a per-user token version that signals
+bump whenever the User or its UserProfile is saved or deleted. Fields changed
+with queryset.update() can be that many seconds stale: balances and counters
+on request.user.profile (views re-read those from the database), but also
+is_active, so a user deactivated that way is only refused once the entry
+expires. The cache must be shared between workers (settings refuses the
+setting otherwise), or a bump only reaches one of them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def auth_user_version_key(user_id):
+    return f"auth_user_version_{user_id}"
+
+
+def auth_user_cache_key(user_id, version):
+    return f"auth_user_{user_id}_v{version}"
+
+
+def invalidate_auth_user(*user_ids):
+    """Bump the users' token version once the current transaction commits, orphaning cached entries"""
+    if not getattr(settings, "AUTH_USER_CACHE_SECONDS", 0):
+        return
+    keys = [auth_user_version_key(user_id) for user_id in set(user_ids) if user_id]
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # No version yet: start one that differs from the implicit 0
+                cache.set(key, 1, None)
+
+    if keys:
+        transaction.on_commit(bump)
+
+
+def set_viewer_flags(user):
+    """Compute the per-request flags shared by views and serializers"""
+    user.is_admin = bool(user.is_staff or user.is_superuser)
+    # select_related caches a missing profile as None, so this never queries
+    profile = getattr(user, "profile", None)
+    user.email_verified = bool(profile and profile.email_verified)
+    return user
+
+
+def is_admin(user):
+    """Staff or superuser, using the flag precomputed at authentication when present"""
+    flag = getattr(user, "is_admin", None)
+    if flag is None:
+        flag = bool(user and user.is_authenticated and (user.is_staff or user.is_superuser))
+    return flag
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving user + profile in one query, optionally cached"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        cache_seconds = getattr(settings, "AUTH_USER_CACHE_SECONDS", 0)
+        user = cache_key = None
+        if cache_seconds:
+            cache_key = auth_user_cache_key(user_id, cache.get(auth_user_version_key(user_id), 0))
+            user = cache.get(cache_key)
+
+        if user is None:
+            user = self.user_model.objects.select_related("profile").filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).first()
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            if cache_key:
+                cache.set(cache_key, user, cache_seconds)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return set_viewer_flags(user)
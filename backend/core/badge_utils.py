@@ -0,0 +1,111 @@
+"""
+Utility functions for awarding badges.
+
+Every Badge.BADGE_TYPES entry has a rule in BADGE_RULES: the events that can
+change its outcome and a condition on User, expressed against the per-user
+BadgeCounter row and the stored rating aggregates on UserProfile. Signals
+apply counter deltas in the same transaction as the write that caused them
+(record_activity), and once it commits only the rules listening to that event
+are evaluated for the users involved. The same conditions drive the set-based
+backfill (award_badges), so live awarding and the backfill cannot disagree.
+
+Badges are inserted with ignore_conflicts, relying on the (user, badge_type)
+unique constraint, so evaluating a rule twice never awards a badge twice.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.contrib.auth.models import User
+
+from .models import Badge, BadgeCounter
+
+
+HELPER_MIN_SERVICES = 5
+COMMUNITY_BUILDER_MIN_EXCHANGES = 10
+TIMEBANK_MASTER_MIN_HOURS = 20
+RATED_HIGHLY_MIN_RATINGS = 5
+RATED_HIGHLY_MIN_AVERAGE = 8
+
+BADGE_EVENTS = ("post", "handshake", "transaction", "rating")
+
+BADGE_RULES = {
+    "first_post": {
+        "events": ("post",),
+        "condition": Q(badge_counter__posts_created__gte=1),
+        "description": "Published a first offer or request",
+    },
+    "first_handshake": {
+        "events": ("handshake",),
+        "condition": Q(badge_counter__handshakes_accepted__gte=1),
+        "description": "Had a first handshake accepted",
+    },
+    "helper": {
+        "events": ("transaction",),
+        "condition": Q(badge_counter__services_provided__gte=HELPER_MIN_SERVICES),
+        "description": f"Provided {HELPER_MIN_SERVICES} completed services",
+    },
+    "community_builder": {
+        "events": ("transaction",),
+        "condition": Q(badge_counter__exchanges_completed__gte=COMMUNITY_BUILDER_MIN_EXCHANGES),
+        "description": f"Completed {COMMUNITY_BUILDER_MIN_EXCHANGES} exchanges",
+    },
+    "timebank_master": {
+        "events": ("transaction",),
+        "condition": Q(badge_counter__hours_earned__gte=TIMEBANK_MASTER_MIN_HOURS),
+        "description": f"Earned {TIMEBANK_MASTER_MIN_HOURS} Beellars",
+    },
+    "rated_highly": {
+        "events": ("rating",),
+        # average >= RATED_HIGHLY_MIN_AVERAGE without dividing in SQL
+        "condition": Q(profile__rating_count__gte=RATED_HIGHLY_MIN_RATINGS)
+        & Q(profile__rating_sum__gte=F("profile__rating_count") * RATED_HIGHLY_MIN_AVERAGE),
+        "description": f"Averaged {RATED_HIGHLY_MIN_AVERAGE}/10 or more over {RATED_HIGHLY_MIN_RATINGS}+ ratings",
+    },
+}
+
+RULES_BY_EVENT = {
+    event: [badge_type for badge_type, rule in BADGE_RULES.items() if event in rule["events"]]
+    for event in BADGE_EVENTS
+}
+
+
+def eligible_user_ids(badge_type, user_ids=None):
+    """Users meeting the rule who do not hold the badge yet (all users when user_ids is None)"""
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    return users.filter(BADGE_RULES[badge_type]["condition"]).exclude(
+        badges__badge_type=badge_type
+    ).order_by("pk").values_list("pk", flat=True)
+
+
+def award_badge(badge_type, user_ids):
+    """Insert the badge for user_ids, skipping users who already hold it"""
+    description = BADGE_RULES[badge_type]["description"]
+    Badge.objects.bulk_create(
+        [Badge(user_id=user_id, badge_type=badge_type, description=description) for user_id in user_ids],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def evaluate_badges(event, user_ids):
+    """Evaluate the rules affected by event for user_ids; returns {badge_type: [user ids awarded]}"""
+    awarded = {}
+    for badge_type in RULES_BY_EVENT[event]:
+        ids = list(eligible_user_ids(badge_type, user_ids))
+        if ids:
+            award_badge(badge_type, ids)
+            awarded[badge_type] = ids
+    return awarded
+
+
+def record_activity(event, deltas_by_user):
+    """
+    Apply counter deltas ({user_id: {field: delta}}) for an event and schedule
+    the event's rules for those users once the current transaction commits.
+    """
+    for user_id, deltas in deltas_by_user.items():
+        if deltas:
+            BadgeCounter.bump(user_id, **deltas)
+    user_ids = [user_id for user_id in deltas_by_user if user_id]
+    if user_ids:
+        # robust: a failing rule must not fail the request that triggered it
+        transaction.on_commit(lambda: evaluate_badges(event, user_ids), robust=True)
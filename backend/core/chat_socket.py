@@ -0,0 +1,206 @@
+"""
+Full-duplex WebSocket chat for a handshake, served by the ASGI app (mysite.asgi).
+
+    ws(s)://<host>/ws/chat/<handshake_id>/?ticket=<stream ticket>&after_id=<message id>
+
+Browsers cannot set headers on a WebSocket, and URLs end up in access logs, so
+the socket is opened with the same short-lived ticket as the SSE stream
+(POST /api/messages/stream/<handshake_id>/ticket/), never with the JWT.
+Every frame is a JSON object with a "type":
+
+Client -> server
+    {"type": "send", "content": "...", "client_id": "..."}   send a message
+    {"type": "typing"}                                        typing indicator
+    {"type": "read", "up_to_id": 42}                          read receipt
+
+Server -> client
+    {"type": "message", "message": {...}}                     new message (both participants)
+    {"type": "ack", "client_id": "...", "message": {...}}     delivery ack for a "send"
+    {"type": "typing", "user_id": 7}                          the other participant is typing
+    {"type": "read", "user_id": 7, "up_to_id": 42}            the other participant read up to id
+    {"type": "error", "error": "...", "client_id": "..."}     rejected frame
+
+Messages are written through MessageSerializer with the same checks as
+POST /api/messages/, and delivered from the database like the SSE stream,
+so socket and HTTP clients can be mixed freely.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from . import chat_utils
+from .chat_utils import database_sync_to_async
+
+
+CHAT_SOCKET_PATH = re.compile(r"^/ws/chat/(?P<handshake_id>\d+)/?$")
+
+# Close codes sent before accepting the connection (4000-4999 are application defined)
+CLOSE_NOT_FOUND = 4404
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+
+
+def _authorize(ticket, handshake_id):
+    """Return (close_code, user); close_code is None when the user may chat"""
+    from .models import Handshake
+
+    user = chat_utils.authenticate_stream_ticket(ticket, handshake_id)
+    if user is None:
+        return CLOSE_UNAUTHORIZED, None
+    try:
+        handshake = Handshake.objects.get(pk=handshake_id)
+    except Handshake.DoesNotExist:
+        return CLOSE_NOT_FOUND, None
+    if chat_utils.chat_access_error(user, handshake):
+        return CLOSE_FORBIDDEN, None
+    return None, user
+
+
+def _last_message_id(handshake_id):
+    from django.db.models import Max
+    from .models import Message
+
+    return Message.objects.filter(handshake_id=handshake_id).aggregate(last=Max("id"))["last"] or 0
+
+
+def _save_message(user, handshake_id, content):
+    """Validate and save like messages_list_create; returns (serialized message, error)"""
+    from .serializers import MessageSerializer
+
+    serializer = MessageSerializer(data={"handshake": handshake_id, "content": content})
+    if not serializer.is_valid():
+        return None, serializer.errors
+    error = chat_utils.chat_access_error(user, serializer.validated_data["handshake"])
+    if error:
+        return None, error
+    serializer.save(sender=user)
+    return serializer.data, None
+
+
+class ChatSocket:
+    """One accepted WebSocket connection for a participant of a handshake"""
+
+    def __init__(self, send, user, handshake_id, last_id):
+        self.send = send
+        self.user = user
+        self.handshake_id = handshake_id
+        self.last_id = last_id
+
+    async def send_json(self, payload):
+        await self.send({"type": "websocket.send", "text": json.dumps(payload, default=str)})
+
+    async def push_new_messages(self):
+        for message in await database_sync_to_async(chat_utils.messages_after)(self.handshake_id, self.last_id):
+            self.last_id = message["id"]
+            await self.send_json({"type": "message", "message": message})
+
+    async def publish(self, payload):
+        # The Postgres broker issues a query, so publish from a worker thread
+        await database_sync_to_async(chat_utils.message_broker.publish)(self.handshake_id, payload)
+
+    async def handle_frame(self, text):
+        """Handle one client frame; returns True when new messages should be pushed"""
+        try:
+            frame = json.loads(text or "")
+        except ValueError:
+            frame = None
+        if not isinstance(frame, dict):
+            await self.send_json({"type": "error", "error": "Frames must be JSON objects"})
+            return False
+
+        kind = frame.get("type")
+        if kind == "send":
+            message, error = await database_sync_to_async(_save_message)(
+                self.user, self.handshake_id, frame.get("content")
+            )
+            if error:
+                await self.send_json({"type": "error", "error": error, "client_id": frame.get("client_id")})
+                return False
+            await self.send_json({"type": "ack", "client_id": frame.get("client_id"), "message": message})
+            return True
+        if kind == "typing":
+            await self.publish({"type": "typing", "user_id": self.user.id})
+            return False
+        if kind == "read":
+            try:
+                up_to_id = int(frame.get("up_to_id"))
+            except (TypeError, ValueError):
+                await self.send_json({"type": "error", "error": "'up_to_id' must be a message id"})
+                return False
+            await database_sync_to_async(chat_utils.mark_messages_read)(self.handshake_id, self.user, up_to_id)
+            await self.publish({"type": "read", "user_id": self.user.id, "up_to_id": up_to_id})
+            return False
+
+        await self.send_json({"type": "error", "error": f"Unknown frame type '{kind}'"})
+        return False
+
+    async def handle_events(self, events):
+        """Forward ephemeral events from the other participant; True if a message arrived"""
+        new_messages = False
+        for event in events:
+            if not isinstance(event, dict) or event.get("type") == "message":
+                new_messages = True
+            elif event.get("user_id") != self.user.id:
+                await self.send_json(event)
+        return new_messages
+
+    async def run(self, receive):
+        with chat_utils.message_broker.subscribe(self.handshake_id) as events:
+            await self.push_new_messages()
+            receiving = asyncio.ensure_future(receive())
+            waiting = asyncio.ensure_future(events.get())
+            try:
+                while True:
+                    done, _ = await asyncio.wait(
+                        {receiving, waiting},
+                        timeout=chat_utils.STREAM_POLL_SECONDS,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    # A timeout doubles as the cross-worker database poll
+                    refresh = not done
+                    if receiving in done:
+                        event = receiving.result()
+                        if event["type"] == "websocket.disconnect":
+                            return
+                        if event["type"] == "websocket.receive":
+                            refresh = await self.handle_frame(event.get("text")) or refresh
+                        receiving = asyncio.ensure_future(receive())
+                    if waiting in done:
+                        pending = [waiting.result()]
+                        while not events.empty():
+                            pending.append(events.get_nowait())
+                        refresh = await self.handle_events(pending) or refresh
+                        waiting = asyncio.ensure_future(events.get())
+                    if refresh:
+                        await self.push_new_messages()
+            finally:
+                receiving.cancel()
+                waiting.cancel()
+
+
+async def chat_socket_application(scope, receive, send):
+    """ASGI application for websocket scopes (see mysite.asgi)"""
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+
+    match = CHAT_SOCKET_PATH.match(scope.get("path", ""))
+    if not match:
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+    handshake_id = int(match.group("handshake_id"))
+    query = parse_qs(scope.get("query_string", b"").decode())
+
+    close_code, user = await database_sync_to_async(_authorize)(query.get("ticket", [None])[0], handshake_id)
+    if close_code:
+        await send({"type": "websocket.close", "code": close_code})
+        return
+
+    try:
+        last_id = int(query.get("after_id", [None])[0])
+    except (TypeError, ValueError):
+        last_id = await database_sync_to_async(_last_message_id)(handshake_id)
+
+    await send({"type": "websocket.accept"})
+    await ChatSocket(send, user, handshake_id, last_id).run(receive)
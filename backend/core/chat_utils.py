@@ -0,0 +1,285 @@
+"""
+Utility functions for real-time chat delivery.
+
+`message_broker` is a pub/sub keyed by handshake id. Saving a Message
+publishes a {"type": "message", "id": ...} event (after the transaction
+commits) and wakes up every stream and socket subscribed to that handshake.
+The database stays the source of truth: subscribers always read new rows
+with `id > last_seen_id`, and they also re-check on a fixed interval.
+
+settings.CHAT_BROKER selects the broker:
+- "memory" (default): in-process only. Other workers' messages are picked
+  up by the periodic database re-check (table polling); ephemeral events
+  such as typing indicators stay within the worker.
+- "postgres": events are also sent through Postgres NOTIFY, and one LISTEN
+  thread per worker re-publishes them locally, so every worker sees every
+  event immediately.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a stream waits for an in-process wake-up before re-checking the database
+STREAM_POLL_SECONDS = 5
+# Streams are closed after this long; EventSource reconnects with Last-Event-ID
+STREAM_MAX_SECONDS = 300
+# Chat is only open for these handshake states
+CHAT_STATUSES = ("accepted", "in_progress", "completed")
+# Postgres NOTIFY channel shared by every handshake
+CHAT_NOTIFY_CHANNEL = "chat_events"
+# Stream tickets stand in for the JWT in EventSource and WebSocket URLs (which
+# end up in access logs); a ticket opens one handshake's stream or socket for this long
+STREAM_TICKET_SECONDS = 60
+STREAM_TICKET_SALT = "core.chat_utils.stream_ticket"
+
+
+class MessageBroker:
+    """Thread-safe in-process pub/sub that wakes asyncio subscribers per handshake"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, handshake_id):
+        """Register an asyncio.Queue for the handshake; must be entered inside a running loop"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[handshake_id].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[handshake_id].discard(subscriber)
+                if not self._subscribers[handshake_id]:
+                    del self._subscribers[handshake_id]
+
+    def publish(self, handshake_id, payload):
+        """Deliver payload to every subscriber of the handshake (callable from any thread)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(handshake_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, payload)
+            except RuntimeError:
+                # Subscriber's event loop already closed
+                pass
+
+    def subscriber_count(self, handshake_id):
+        with self._lock:
+            return len(self._subscribers.get(handshake_id, ()))
+
+
+class PostgresNotifyBroker(MessageBroker):
+    """
+    Broker that fans events out to every worker through Postgres NOTIFY/LISTEN.
+    publish() issues pg_notify on the Django connection; a daemon thread holding
+    a dedicated LISTEN connection hands received events to the local subscribers.
+    """
+
+    def __init__(self, channel=CHAT_NOTIFY_CHANNEL):
+        super().__init__()
+        self.channel = channel
+        self._listener = None
+        self._stopping = threading.Event()
+
+    @contextmanager
+    def subscribe(self, handshake_id):
+        self._ensure_listener()
+        with super().subscribe(handshake_id) as queue:
+            yield queue
+
+    def publish(self, handshake_id, payload):
+        """Send the event through NOTIFY; delivered to this worker by the listener thread"""
+        from django.db import connection
+
+        message = json.dumps({"handshake": handshake_id, "payload": payload}, default=str)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, message])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="chat-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+        from django.db import connection
+
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], STREAM_POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        event = json.loads(notify.payload)
+                        MessageBroker.publish(self, event["handshake"], event["payload"])
+            except Exception:
+                # Subscribers keep polling the database meanwhile
+                logger.exception("Chat LISTEN connection lost; reconnecting")
+                self._stopping.wait(STREAM_POLL_SECONDS)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def close(self):
+        """Stop the listener thread and close its connection"""
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join()
+
+
+CHAT_BROKERS = {
+    "memory": MessageBroker,
+    "postgres": PostgresNotifyBroker,
+}
+
+
+def get_message_broker():
+    """Build the broker selected by settings.CHAT_BROKER"""
+    from django.conf import settings
+
+    name = getattr(settings, "CHAT_BROKER", "memory")
+    if name not in CHAT_BROKERS:
+        raise ValueError(f"Unknown CHAT_BROKER '{name}', expected one of {', '.join(CHAT_BROKERS)}")
+    return CHAT_BROKERS[name]()
+
+
+message_broker = get_message_broker()
+
+
+def database_sync_to_async(func):
+    """
+    sync_to_async for the database helpers of long-lived streams and sockets.
+    Outside a request cycle nothing closes stale connections, so each call
+    drops them before and after running, like Django does around requests.
+    """
+    from asgiref.sync import sync_to_async
+    from django.db import close_old_connections, connection
+
+    def close_stale_connections():
+        # Inside an atomic block (e.g. a test case) the connection is in use
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+    def call(*args, **kwargs):
+        close_stale_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_stale_connections()
+
+    return sync_to_async(call)
+
+
+def drain(queue):
+    """Discard queued wake-ups; the next database read covers all of them"""
+    while not queue.empty():
+        queue.get_nowait()
+
+
+def authenticate_token(raw_token):
+    """Return the user for a raw JWT access token, or None when it is missing or invalid"""
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from .authentication import ProfileJWTAuthentication
+
+    if not raw_token:
+        return None
+    authenticator = ProfileJWTAuthentication()
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def issue_stream_ticket(user, handshake_id):
+    """Signed, short-lived ticket opening the handshake's message stream for user"""
+    from django.core.signing import TimestampSigner
+
+    return TimestampSigner(salt=STREAM_TICKET_SALT).sign(f"{user.id}:{handshake_id}")
+
+
+def authenticate_stream_ticket(ticket, handshake_id):
+    """Return the user a valid ticket for this handshake was issued to, or None"""
+    from django.contrib.auth.models import User
+    from django.core.signing import BadSignature, TimestampSigner
+    from .authentication import set_viewer_flags
+
+    if not ticket:
+        return None
+    try:
+        value = TimestampSigner(salt=STREAM_TICKET_SALT).unsign(ticket, max_age=STREAM_TICKET_SECONDS)
+    except BadSignature:
+        return None
+    user_id, _, ticket_handshake_id = value.partition(":")
+    if ticket_handshake_id != str(handshake_id):
+        return None
+    user = User.objects.select_related("profile").filter(pk=user_id, is_active=True).first()
+    return set_viewer_flags(user) if user else None
+
+
+def chat_access_error(user, handshake):
+    """Return why user may not chat on the handshake, or None when allowed"""
+    if user.id not in (handshake.provider_id, handshake.seeker_id):
+        return "You are not part of this handshake"
+    if handshake.status not in CHAT_STATUSES:
+        return "Messages are only available after handshake is accepted"
+    return None
+
+
+def mark_messages_read(handshake_id, user, up_to_id=None):
+    """Mark the other participant's messages (up to up_to_id) as read and adjust the unread counter"""
+    from django.db import transaction
+    from .models import Message, UnreadCounter
+
+    unread = Message.objects.filter(handshake_id=handshake_id, is_read=False).exclude(sender=user)
+    if up_to_id is not None:
+        unread = unread.filter(id__lte=up_to_id)
+    with transaction.atomic():
+        marked = unread.update(is_read=True)
+        UnreadCounter.mark_read(handshake_id, user, marked)
+    if marked:
+        from .inbox_utils import invalidate_inbox_summary
+        invalidate_inbox_summary(user.id)
+    return marked
+
+
+def messages_after(handshake_id, last_id):
+    """Serialized messages of a handshake with id greater than last_id, oldest first"""
+    from .models import Message
+    from .serializers import MessageSerializer
+
+    messages = Message.objects.filter(
+        handshake_id=handshake_id, id__gt=last_id
+    ).select_related("sender").order_by("id")
+    return MessageSerializer(messages, many=True).data
+
+
+def format_sse(payload, event_id=None, event=None):
+    """Encode one Server-Sent Event frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -1,17 +1,147 @@
 """
 Utility functions for email verification and activation tokens.
+
+Emails are not sent inside the request: the queue_* helpers write an
+OutgoingEmail row and the send_outbox command delivers due rows in batches
+over one SMTP connection, retrying failures with exponential backoff
+(deliver_outbox). Views run in autocommit (ATOMIC_REQUESTS is off), so the row
+is committed as soon as it is written unless the caller wraps the work in
+transaction.atomic().
 """
+import logging
 import os
+import time
+from datetime import timedelta
+
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.urls import reverse
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
 
 
 ACTIVATION_TOKEN_EXPIRY_HOURS = 24
 
+# Outbox delivery: attempt n waits OUTBOX_RETRY_BASE_SECONDS * 2**(n-1), capped
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_BASE_SECONDS = 60
+OUTBOX_RETRY_MAX_SECONDS = 6 * 3600
+# A claimed row becomes due again after this, should its worker die mid-batch.
+# A batch stops sending once a further send (bounded by settings.EMAIL_TIMEOUT)
+# could outlive the lease, so no row is ever delivered by two workers.
+OUTBOX_LEASE_SECONDS = 300
+
+
+def queue_email(kind, to_email, subject, body, html_body=""):
+    """
+    Add an email to the outbox. The row is committed right away in autocommit,
+    or with the caller's transaction.atomic() block; send_outbox delivers it.
+    """
+    from .models import OutgoingEmail
+
+    return OutgoingEmail.objects.create(
+        kind=kind,
+        to_email=to_email,
+        from_email=settings.DEFAULT_FROM_EMAIL or 'noreply@thehive.com',
+        subject=subject,
+        body=body,
+        html_body=html_body,
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next try after attempts failed deliveries"""
+    return timedelta(seconds=min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_outbox_batch(batch_size):
+    """
+    Lease up to batch_size due emails to this worker by pushing their
+    next_attempt_at past the lease, so concurrent workers skip them
+    """
+    from .models import OutgoingEmail
+
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        )
+    return batch
+
+
+def deliver_outbox(batch_size=50, connection=None):
+    """
+    Deliver one batch of due emails over a single (reused) connection.
+    Returns (sent, failed): failed counts this batch's failed attempts,
+    whether they will be retried or gave up after OUTBOX_MAX_ATTEMPTS.
+    """
+    from .models import OutgoingEmail
+
+    send_timeout = settings.EMAIL_TIMEOUT or OUTBOX_LEASE_SECONDS
+    if send_timeout >= OUTBOX_LEASE_SECONDS:
+        raise ImproperlyConfigured("EMAIL_TIMEOUT must be shorter than OUTBOX_LEASE_SECONDS")
+
+    batch = claim_outbox_batch(batch_size)
+    if not batch:
+        return 0, 0
+    # Last moment a send may start and still finish within the lease
+    deadline = time.monotonic() + OUTBOX_LEASE_SECONDS - send_timeout
+
+    connection = connection or get_connection()
+    sent = failed = 0
+    try:
+        connection.open()
+        for email in batch:
+            if time.monotonic() > deadline:
+                logger.warning("Outbox: lease running out, leaving the rest of the batch for later")
+                break
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=[email.to_email],
+                connection=connection,
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, "text/html")
+            attempts = email.attempts + 1
+            try:
+                message.send()
+            except Exception as e:
+                failed += 1
+                gave_up = attempts >= OUTBOX_MAX_ATTEMPTS
+                OutgoingEmail.objects.filter(pk=email.pk).update(
+                    status="failed" if gave_up else "pending",
+                    attempts=attempts,
+                    next_attempt_at=timezone.now() + retry_delay(attempts),
+                    last_error=f"{type(e).__name__}: {e}",
+                )
+                logger.warning("Outbox: %s email %s to %s failed (attempt %s): %s",
+                               email.kind, email.pk, email.to_email, attempts, e)
+                # The server may have dropped us: go on with a fresh connection
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    logger.exception("Outbox: cannot reconnect, leaving the rest of the batch for later")
+                    break
+                continue
+            sent += 1
+            OutgoingEmail.objects.filter(pk=email.pk).update(
+                status="sent", attempts=attempts, sent_at=timezone.now(), last_error=""
+            )
+    finally:
+        connection.close()
+    return sent, failed
+
 
 def generate_activation_token(user):
     """
@@ -42,9 +172,9 @@ def validate_activation_token(token):
         return False, None, f"Error validating token: {str(e)}"
 
 
-def send_activation_email(user, request=None):
+def queue_activation_email(user, request=None):
     """
-    Send an activation email to the user with a verification link.
+    Queue an activation email to the user with a verification link.
     """
     token = generate_activation_token(user)
     
@@ -103,44 +233,17 @@ def send_activation_email(user, request=None):
     
     # Validate user email
     if not user.email:
-        print(f"\n❌ ERROR: User {user.username} (ID: {user.id}) has no email address")
+        logger.error("User %s (ID: %s) has no email address", user.username, user.id)
         return False
     
-    try:
-        from_email = settings.DEFAULT_FROM_EMAIL or 'noreply@thehive.com'
-        print(f"\n{'='*60}")
-        print(f"📧 SENDING ACTIVATION EMAIL")
-        print(f"{'='*60}")
-        print(f"To: {user.email}")
-        print(f"From: {from_email}")
-        print(f"Subject: {subject}")
-        print(f"\nActivation URL: {activation_url}")
-        print(f"Email Backend: {settings.EMAIL_BACKEND}")
-        print(f"{'='*60}\n")
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        print(f"✅ Email sent successfully to {user.email}\n")
-        return True
-    except Exception as e:
-        import traceback
-        print(f"\n❌ ERROR sending activation email to {user.email}:")
-        print(f"   Error: {str(e)}")
-        print(f"\n   Full traceback:")
-        traceback.print_exc()
-        print()
-        return False
+    queue_email("activation", user.email, subject, plain_message, html_message)
+    logger.info("Queued activation email for %s", user.email)
+    return True
 
 
-def send_verification_success_email(user):
+def queue_verification_success_email(user):
     """
-    Send a notification email after successful email verification.
+    Queue a notification email after successful email verification.
     """
     subject = "Email verified - Welcome to The Hive!"
     
@@ -174,22 +277,10 @@ def send_verification_success_email(user):
     The Hive Team
     """
     
-    try:
-        from_email = settings.DEFAULT_FROM_EMAIL or 'noreply@thehive.com'
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        import traceback
-        print(f"Error sending verification success email: {str(e)}")
-        traceback.print_exc()
+    if not user.email:
         return False
+    queue_email("verification_success", user.email, subject, plain_message, html_message)
+    return True
 
 
 # Password Reset Utilities
@@ -226,9 +317,9 @@ def validate_password_reset_token(token):
         return False, None, f"Error validating token: {str(e)}"
 
 
-def send_password_reset_email(user, request=None):
+def queue_password_reset_email(user, request=None):
     """
-    Send a password reset email to the user with a reset link.
+    Queue a password reset email to the user with a reset link.
     """
     token = generate_password_reset_token(user)
     
@@ -287,37 +378,9 @@ def send_password_reset_email(user, request=None):
     
     # Validate user email
     if not user.email:
-        print(f"\n❌ ERROR: User {user.username} (ID: {user.id}) has no email address")
+        logger.error("User %s (ID: %s) has no email address", user.username, user.id)
         return False
     
-    try:
-        from_email = settings.DEFAULT_FROM_EMAIL or 'noreply@thehive.com'
-        print(f"\n{'='*60}")
-        print(f"📧 SENDING PASSWORD RESET EMAIL")
-        print(f"{'='*60}")
-        print(f"To: {user.email}")
-        print(f"From: {from_email}")
-        print(f"Subject: {subject}")
-        print(f"\nReset URL: {reset_url}")
-        print(f"Email Backend: {settings.EMAIL_BACKEND}")
-        print(f"{'='*60}\n")
-        
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        print(f"✅ Password reset email sent successfully to {user.email}\n")
-        return True
-    except Exception as e:
-        import traceback
-        print(f"\n❌ ERROR sending password reset email to {user.email}:")
-        print(f"   Error: {str(e)}")
-        print(f"\n   Full traceback:")
-        traceback.print_exc()
-        print()
-        return False
-
+    queue_email("password_reset", user.email, subject, plain_message, html_message)
+    logger.info("Queued password reset email for %s", user.email)
+    return True
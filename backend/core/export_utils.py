@@ -0,0 +1,116 @@
+"""
+Utility functions for streaming exports of the transaction ledger.
+Rows are read with a server-side cursor (QuerySet.iterator) and encoded one
+line at a time, so memory use stays constant regardless of ledger size.
+
+Under ASGI, Django buffers a synchronous streaming iterator in full before
+sending it, so the export view serves aiter_export there instead: the same
+lines, fetched a chunk at a time through sync_to_async.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+from .models import Transaction
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    "id",
+    "created_at",
+    "sender_id",
+    "sender_username",
+    "receiver_id",
+    "receiver_username",
+    "amount",
+    "handshake_id",
+    "offer_id",
+    "request_id",
+    "post_title",
+]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def transaction_export_queryset(min_date=None, max_date=None, user_id=None):
+    """
+    Build a flat, join-based queryset of ledger rows for export.
+    Filters: created_at date range (inclusive) and a participant user id.
+    """
+    transactions = Transaction.objects.all()
+    if min_date:
+        transactions = transactions.filter(created_at__date__gte=min_date)
+    if max_date:
+        transactions = transactions.filter(created_at__date__lte=max_date)
+    if user_id:
+        transactions = transactions.filter(Q(sender_id=user_id) | Q(receiver_id=user_id))
+
+    return transactions.annotate(
+        sender_username=F("sender__username"),
+        receiver_username=F("receiver__username"),
+        offer_id=F("handshake__offer_id"),
+        request_id=F("handshake__request_id"),
+        post_title=Coalesce(F("handshake__offer__title"), F("handshake__request__title")),
+    ).order_by("created_at", "id").values_list(*EXPORT_COLUMNS)
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows as dicts, fetching `chunk_size` rows per round trip"""
+    for values in queryset.iterator(chunk_size=chunk_size):
+        row = dict(zip(EXPORT_COLUMNS, values))
+        row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+        yield row
+
+
+def iter_csv(rows):
+    """Encode rows as CSV lines, header first"""
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows):
+    """Encode rows as JSON Lines"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def iter_export(export_format, min_date=None, max_date=None, user_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream the filtered ledger in the requested format ("csv" or "jsonl")"""
+    rows = iter_export_rows(
+        transaction_export_queryset(min_date=min_date, max_date=max_date, user_id=user_id),
+        chunk_size=chunk_size,
+    )
+    if export_format == "jsonl":
+        return iter_jsonl(rows)
+    return iter_csv(rows)
+
+
+async def aiter_export(export_format, min_date=None, max_date=None, user_id=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """iter_export as an async iterator yielding `chunk_size` lines at a time"""
+    lines = iter_export(export_format, min_date=min_date, max_date=max_date, user_id=user_id, chunk_size=chunk_size)
+    # thread_sensitive (the default) keeps the cursor on the request's own database thread
+    next_chunk = sync_to_async(lambda: "".join(islice(lines, chunk_size)))
+    try:
+        while chunk := await next_chunk():
+            yield chunk
+    finally:
+        # Closes the server-side cursor when the client disconnects mid-export
+        await sync_to_async(lines.close)()
@@ -0,0 +1,55 @@
+"""
+Utility functions for the stored forum "hot" ranking.
+
+A topic's heat is the sum of its activity (the topic itself and every reply),
+each weighted by exp(-(now - t) / FORUM_HOT_DECAY_SECONDS). As with
+reputation_rank, the indexed key drops the now-term, which is the same for
+every row:
+
+    hot_rank = ln(sum(exp(t_i / FORUM_HOT_DECAY_SECONDS)))
+
+so ordering by hot_rank is ordering by current heat at any moment, quiet
+topics cool down without a periodic job, and a new reply only has to add its
+own term (add_activity) to its topic's key. Sums are kept in log space because
+the raw terms overflow a float.
+"""
+import math
+
+
+# e-folding time of a reply's weight (1 day)
+FORUM_HOT_DECAY_SECONDS = 24 * 3600
+# Below this relative remainder a subtraction has lost its precision
+_PRECISION = 1e-9
+
+
+def activity_term(moment):
+    """ln of the weight of one activity at moment"""
+    return moment.timestamp() / FORUM_HOT_DECAY_SECONDS
+
+
+def add_activity(rank, moment):
+    """hot_rank after adding one activity at moment"""
+    term = activity_term(moment)
+    if not rank:
+        return term
+    high, low = max(rank, term), min(rank, term)
+    return high + math.log1p(math.exp(low - high))
+
+
+def remove_activity(rank, moment):
+    """
+    hot_rank after removing one activity at moment, or None when what is
+    left is too small to compute by subtraction (recompute it instead)
+    """
+    remainder = -math.expm1(activity_term(moment) - rank) if rank else 0.0
+    if remainder < _PRECISION:
+        return None
+    return rank + math.log(remainder)
+
+
+def hot_rank(moments):
+    """hot_rank of a topic with activity at every moment in moments"""
+    rank = 0.0
+    for moment in moments:
+        rank = add_activity(rank, moment)
+    return rank
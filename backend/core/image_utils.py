@@ -0,0 +1,116 @@
+"""
+Utility functions for profile picture thumbnails.
+
+When a profile picture changes, UserProfile.save() clears the stored variants
+and schedule_thumbnails() queues the profile on a small thread pool once the
+transaction commits. Each worker renders square THUMBNAIL_SIZES crops with
+Pillow, saves them next to the original (profile_pictures/thumbs/) and
+records them in UserProfile.profile_picture_thumbnails as {"64": name, ...}.
+Until that happens, serializers keep serving the original upload.
+
+WebP is used when Pillow was built with it, JPEG otherwise. Pillow releases
+the GIL while decoding and resampling, so threads are enough here.
+settings.THUMBNAIL_WORKERS = 0 renders inline (tests, management commands).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+THUMBNAIL_SIZES = (64, 128, 512)
+THUMBNAIL_DIRECTORY = "profile_pictures/thumbs"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_format():
+    """(Pillow format, file extension) for generated variants"""
+    from PIL import features
+
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+
+def render_thumbnails(source, sizes=THUMBNAIL_SIZES):
+    """Render square crops of an image file object; returns {size: bytes}"""
+    from PIL import Image, ImageOps
+
+    image_format, _ = thumbnail_format()
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        # WebP keeps transparency; JPEG needs plain RGB
+        mode = "RGBA" if image_format == "WEBP" and image.mode in ("RGBA", "LA", "P") else "RGB"
+        if image.mode != mode:
+            image = image.convert(mode)
+        rendered = {}
+        for size in sizes:
+            variant = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            variant.save(buffer, format=image_format, quality=82)
+            rendered[size] = buffer.getvalue()
+    return rendered
+
+
+def generate_thumbnails(profile_id):
+    """Render and store the variants for a profile's current picture; returns the stored names"""
+    from .models import UserProfile
+
+    profile = UserProfile.objects.filter(pk=profile_id).only("profile_picture").first()
+    if profile is None or not profile.profile_picture:
+        return {}
+    original = profile.profile_picture.name
+    storage = profile.profile_picture.storage
+    _, extension = thumbnail_format()
+    stem = os.path.splitext(os.path.basename(original))[0]
+
+    with storage.open(original, "rb") as source:
+        rendered = render_thumbnails(source)
+    variants = {
+        str(size): storage.save(f"{THUMBNAIL_DIRECTORY}/{stem}_{size}.{extension}", ContentFile(data))
+        for size, data in rendered.items()
+    }
+    # Only attach the variants if the picture was not replaced meanwhile; stored
+    # files may be shared with other profiles, so leftovers are left to gc_media
+    if not UserProfile.objects.filter(pk=profile_id, profile_picture=original).update(
+        profile_picture_thumbnails=variants
+    ):
+        return {}
+    return variants
+
+
+def _run(profile_id):
+    try:
+        generate_thumbnails(profile_id)
+    except Exception:
+        # The original stays in use; the generate_thumbnails command can retry
+        logger.exception("Thumbnail generation failed for profile %s", profile_id)
+
+
+def _run_in_worker(profile_id):
+    _run(profile_id)
+    # Worker threads own their connections; do not keep one open per idle thread
+    connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+        return _executor
+
+
+def schedule_thumbnails(profile_id):
+    """Generate a profile's thumbnails in the worker pool once the current transaction commits"""
+    if settings.THUMBNAIL_WORKERS > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, profile_id))
+    else:
+        transaction.on_commit(lambda: _run(profile_id))
@@ -0,0 +1,28 @@
+"""
+Utility functions for the per-user inbox summary cache.
+
+GET /api/inbox/summary/ is cached per user for INBOX_SUMMARY_CACHE_SECONDS.
+Signals drop a user's entry whenever a message or handshake they take part
+in changes, and bulk read receipts drop it explicitly, so the short timeout
+only bounds staleness for bulk updates that bypass signals (e.g. expire_stale).
+Invalidation reaches every worker because the cache is shared (the database
+cache, see CACHES in settings); with the local-memory cache of the SQLite dev
+setup it only reaches the current process and others serve their entry until
+it times out.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+
+INBOX_SUMMARY_CACHE_SECONDS = 30
+
+
+def inbox_summary_cache_key(user_id):
+    return f"inbox_summary_{user_id}"
+
+
+def invalidate_inbox_summary(*user_ids):
+    """Drop cached summaries once the current transaction commits"""
+    keys = [inbox_summary_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,101 @@
+"""
+Django management command to move chat history of long-completed handshakes
+into MessageArchive (one zlib-compressed JSON blob per handshake).
+
+A handshake qualifies when it was completed (its payment transaction) and its
+last message was sent more than --days ago. Every message except the latest
+one is archived; keeping the latest row lets the inbox conversation list show
+it without opening the archive. Archived messages count as read, so the
+unread counters are recomputed from what stays in the hot table.
+messages_list_create merges the archive back in when a client asks for it.
+
+Usage: python manage.py archive_messages [--days 180] [--batch-size 100] [--dry-run]
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.models import Handshake, Message, MessageArchive, Transaction, UnreadCounter
+from core.serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Archive chat messages of handshakes completed more than N days ago into compressed blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180,
+                            help='Archive handshakes completed and quiet for this many days')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Handshakes archived per committed batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count what would be archived without moving anything')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        started = time.monotonic()
+        last_id = 0
+        handshakes = archived = 0
+        while True:
+            batch = self._candidates(cutoff, last_id, options['batch_size'])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            if options['dry_run']:
+                count = sum(handshake.hot_messages - 1 for handshake in batch)
+            else:
+                count = self._archive_batch(batch)
+            handshakes += len(batch)
+            archived += count
+            logger.info("archive_messages: batch up to handshake %d archived %d message(s)", last_id, count)
+
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {archived} message(s) from {handshakes} handshake(s) in {time.monotonic() - started:.2f}s"
+        ))
+
+    def _candidates(self, cutoff, last_id, batch_size):
+        completed_at = Transaction.objects.filter(handshake=OuterRef("pk")).order_by("-created_at").values("created_at")[:1]
+        last_message_at = Message.objects.filter(handshake=OuterRef("pk")).order_by("-id").values("created_at")[:1]
+        hot_messages = Message.objects.filter(handshake=OuterRef("pk")).order_by().values("handshake").annotate(
+            total=Count("id")
+        ).values("total")
+        return list(
+            Handshake.objects.filter(status="completed", id__gt=last_id)
+            .annotate(
+                completed_at=Subquery(completed_at),
+                last_message_at=Subquery(last_message_at),
+                hot_messages=Subquery(hot_messages, output_field=IntegerField()),
+            )
+            .filter(completed_at__lt=cutoff, last_message_at__lt=cutoff, hot_messages__gt=1)
+            .order_by("id")[:batch_size]
+        )
+
+    def _archive_batch(self, batch):
+        moved = 0
+        with transaction.atomic():
+            for handshake in batch:
+                messages = list(
+                    Message.objects.filter(handshake=handshake).select_related("sender").order_by("id")
+                )[:-1]
+                if not messages:
+                    continue
+                archive, _ = MessageArchive.objects.select_for_update().get_or_create(handshake=handshake)
+                archive.set_messages(archive.get_messages() + [dict(m) for m in MessageSerializer(messages, many=True).data])
+                archive.save()
+                moved += Message.objects.filter(handshake=handshake, id__lte=messages[-1].id).delete()[0]
+
+            # Archived messages count as read: recount what is left in the hot table
+            unread = Message.objects.filter(handshake=OuterRef("handshake_id"), is_read=False).filter(
+                ~Q(sender=OuterRef("user_id"))
+            ).order_by().values("handshake").annotate(total=Count("id")).values("total")
+            UnreadCounter.objects.filter(handshake__in=batch).update(
+                count=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+            )
+        return moved
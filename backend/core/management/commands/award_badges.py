@@ -0,0 +1,82 @@
+"""
+Django management command to backfill badges for every user.
+
+First rebuilds the BadgeCounter rows from the source tables with grouped
+aggregate queries, then runs each rule in core.badge_utils.BADGE_RULES as one
+query over all users and inserts the missing badges in bulk. Safe to re-run:
+existing badges are skipped through the (user, badge_type) constraint.
+
+Usage: python manage.py award_badges [--dry-run]
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from core.badge_utils import BADGE_RULES, award_badge, eligible_user_ids
+from core.models import BadgeCounter, Handshake, Offer, Request, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuild badge counters and award every badge users already qualify for'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be awarded and roll everything back',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counters = self._rebuild_counters()
+            self.stdout.write(f'Rebuilt badge counters for {counters} user(s)')
+
+            total = 0
+            for badge_type in BADGE_RULES:
+                ids = list(eligible_user_ids(badge_type))
+                if ids:
+                    award_badge(badge_type, ids)
+                total += len(ids)
+                self.stdout.write(f'{badge_type}: {len(ids)} user(s)')
+
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        verb = 'Would award' if options['dry_run'] else 'Awarded'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} badge(s)'))
+
+    def _rebuild_counters(self):
+        """Recompute every user's counters with grouped queries and upsert them"""
+        def zeroed():
+            return dict.fromkeys(BadgeCounter.COUNTER_FIELDS, 0)
+
+        # Existing rows start from zero too, so activity that has since disappeared is reset
+        counts = defaultdict(zeroed)
+        counts.update((user_id, zeroed()) for user_id in BadgeCounter.objects.values_list('user_id', flat=True))
+
+        for model in (Offer, Request):
+            for row in model.objects.order_by().values('user_id').annotate(total=Count('id')):
+                counts[row['user_id']]['posts_created'] += row['total']
+
+        accepted = Handshake.objects.filter(status__in=Handshake.ACCEPTED_STATUSES).order_by()
+        for side in ('provider_id', 'seeker_id'):
+            for row in accepted.values(side).annotate(total=Count('id')):
+                counts[row[side]]['handshakes_accepted'] += row['total']
+
+        transactions = Transaction.objects.order_by()
+        for row in transactions.values('receiver_id').annotate(total=Count('id'), hours=Sum('amount')):
+            counts[row['receiver_id']]['exchanges_completed'] += row['total']
+            counts[row['receiver_id']]['services_provided'] += row['total']
+            counts[row['receiver_id']]['hours_earned'] += row['hours'] or 0
+        for row in transactions.values('sender_id').annotate(total=Count('id')):
+            counts[row['sender_id']]['exchanges_completed'] += row['total']
+
+        BadgeCounter.objects.bulk_create(
+            [BadgeCounter(user_id=user_id, **fields) for user_id, fields in counts.items()],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=list(BadgeCounter.COUNTER_FIELDS),
+        )
+        return len(counts)
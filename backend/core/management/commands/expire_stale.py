@@ -0,0 +1,155 @@
+"""
+Django management command to expire stale handshakes and posts (cron-friendly).
+
+- Proposed handshakes nobody answered within --handshake-days become "expired".
+- Open offers/requests whose available_slots all lie in the past become
+  "expired", and their still-proposed handshakes are expired with them.
+
+Work is done in bounded batches of set-based UPDATEs, each committed on its
+own, so no long-running transaction holds locks on the hot tables. Expired
+handshakes no longer block a seeker from re-proposing or a request from
+taking a new participant.
+
+Usage: python manage.py expire_stale [--handshake-days 14] [--grace-hours 24]
+                                     [--batch-size 500] [--sleep 0] [--dry-run]
+"""
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from core.models import Offer, Request, Handshake
+
+logger = logging.getLogger(__name__)
+
+
+def latest_slot(available_slots):
+    """
+    Return the latest datetime in an available_slots JSON array, or None when
+    there are no parseable slots. Slots are either ISO datetime strings or
+    {"date": "YYYY-MM-DD", "time": "HH:MM"} objects.
+    """
+    if not available_slots:
+        return None
+    try:
+        slots = json.loads(available_slots)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(slots, list):
+        return None
+
+    latest = None
+    for slot in slots:
+        try:
+            if isinstance(slot, dict):
+                value = datetime.fromisoformat(f"{slot.get('date')}T{slot.get('time') or '23:59'}")
+            else:
+                value = datetime.fromisoformat(str(slot))
+        except ValueError:
+            # One unreadable slot means we cannot prove the post is over
+            return None
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        if latest is None or value > latest:
+            latest = value
+    return latest
+
+
+class Command(BaseCommand):
+    help = 'Expire unanswered handshakes and posts whose time slots have all passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--handshake-days', type=int, default=14,
+                            help='Expire proposed handshakes older than this many days')
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Expire posts this many hours after their last slot')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows updated per committed batch')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count what would expire without updating anything')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.pause = options['sleep']
+        self.dry_run = options['dry_run']
+        now = timezone.now()
+
+        handshake_cutoff = now - timedelta(days=options['handshake_days'])
+        self._run(
+            "handshakes",
+            lambda last_id: self._stale_handshake_ids(handshake_cutoff, last_id),
+            self._expire_handshakes,
+        )
+
+        slot_cutoff = now - timedelta(hours=options['grace_hours'])
+        for model, label in ((Offer, "offers"), (Request, "requests")):
+            self._run(
+                label,
+                lambda last_id, model=model: self._past_post_ids(model, slot_cutoff, last_id),
+                lambda ids, model=model: self._expire_posts(model, ids),
+            )
+
+    def _run(self, label, next_batch, expire):
+        """Select and expire batches until nothing is left, logging counts and timings"""
+        started = time.monotonic()
+        last_id = 0
+        total = batches = 0
+        while True:
+            ids, last_id = next_batch(last_id)
+            if last_id is None:
+                break
+            if ids:
+                batch_started = time.monotonic()
+                count = len(ids) if self.dry_run else expire(ids)
+                total += count
+                batches += 1
+                logger.info("expire_stale: %s batch %d expired %d row(s) in %.3fs",
+                            label, batches, count, time.monotonic() - batch_started)
+                if self.pause:
+                    time.sleep(self.pause)
+
+        elapsed = time.monotonic() - started
+        verb = "Would expire" if self.dry_run else "Expired"
+        logger.info("expire_stale: %s done, %d row(s) in %d batch(es), %.3fs", label, total, batches, elapsed)
+        self.stdout.write(self.style.SUCCESS(f"{verb} {total} {label} in {batches} batch(es) ({elapsed:.2f}s)"))
+
+    def _stale_handshake_ids(self, cutoff, last_id):
+        ids = list(
+            Handshake.objects.filter(status="proposed", created_at__lt=cutoff, id__gt=last_id)
+            .order_by("id").values_list("id", flat=True)[:self.batch_size]
+        )
+        return ids, (ids[-1] if ids else None)
+
+    def _past_post_ids(self, model, cutoff, last_id):
+        """Scan open posts with slots in keyset order; slot JSON is checked in Python"""
+        rows = list(
+            model.objects.filter(status="open", id__gt=last_id)
+            .exclude(available_slots__isnull=True).exclude(available_slots="")
+            .order_by("id").values_list("id", "available_slots")[:self.batch_size]
+        )
+        if not rows:
+            return [], None
+        ids = []
+        for post_id, slots in rows:
+            latest = latest_slot(slots)
+            if latest is not None and latest < cutoff:
+                ids.append(post_id)
+        return ids, rows[-1][0]
+
+    def _expire_handshakes(self, ids):
+        # Proposed handshakes hold no offer slot, so the offer counters are unchanged
+        with transaction.atomic():
+            return Handshake.objects.filter(id__in=ids, status="proposed").update(status="expired")
+
+    def _expire_posts(self, model, ids):
+        field = "offer_id__in" if model is Offer else "request_id__in"
+        with transaction.atomic():
+            count = model.objects.filter(id__in=ids, status="open").update(status="expired")
+            # Pending proposals on an expired post can never be accepted
+            Handshake.objects.filter(**{field: ids}, status="proposed").update(status="expired")
+        return count
@@ -0,0 +1,48 @@
+"""
+Django management command to export the transaction ledger as CSV or JSON Lines
+Usage: python manage.py export_transactions [--format csv|jsonl] [--output FILE]
+                                            [--min-date YYYY-MM-DD] [--max-date YYYY-MM-DD] [--user ID]
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from core.export_utils import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = 'Stream the transaction ledger to a file or stdout using a server-side cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', help='File to write to (defaults to stdout)')
+        parser.add_argument('--min-date', type=_parse_date, help='Only transactions on or after this date')
+        parser.add_argument('--max-date', type=_parse_date, help='Only transactions on or before this date')
+        parser.add_argument('--user', type=int, help='Only transactions sent or received by this user id')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        lines = iter_export(
+            options['format'],
+            min_date=options['min_date'],
+            max_date=options['max_date'],
+            user_id=options['user'],
+            chunk_size=options['chunk_size'],
+        )
+
+        if options['output']:
+            count = 0
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                for line in lines:
+                    output.write(line)
+                    count += 1
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} line(s) to {options['output']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,86 @@
+"""
+Django management command to garbage-collect unreferenced media blobs.
+
+Content-addressed files (core.storage) can be shared by several profiles, so
+replacing a picture never deletes the old file. This command walks the
+storage, keeps every name still referenced by a profile picture or one of its
+thumbnails, and deletes the other content-addressed files. Files newer than
+--grace-hours (deduplicated uploads touch the file) are kept so uploads whose
+transaction has not committed yet are never collected, and each file's
+references and age are checked again right before it is deleted.
+
+Usage: python manage.py gc_media [--grace-hours 24] [--dry-run]
+"""
+import logging
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import UserProfile
+from core.storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+
+def walk(storage, directory=""):
+    """Yield every file name below directory"""
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield f"{directory}/{filename}" if directory else filename
+    for subdirectory in directories:
+        yield from walk(storage, f"{directory}/{subdirectory}" if directory else subdirectory)
+
+
+def is_referenced(name):
+    """Whether a profile picture or thumbnail currently uses name"""
+    return UserProfile.objects.filter(
+        Q(profile_picture=name) | Q(profile_picture_thumbnails__icontains=name)
+    ).exists()
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed media files that no model references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Keep unreferenced files younger than this')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        referenced = set()
+        for picture, thumbnails in UserProfile.objects.exclude(profile_picture="").exclude(
+            profile_picture__isnull=True
+        ).values_list('profile_picture', 'profile_picture_thumbnails').iterator():
+            referenced.add(picture)
+            referenced.update((thumbnails or {}).values())
+
+        if not storage.exists(""):
+            self.stdout.write(self.style.SUCCESS('No media stored'))
+            return
+
+        scanned = deleted = 0
+        for name in walk(storage):
+            if not is_content_addressed(name):
+                continue
+            scanned += 1
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            if options['dry_run']:
+                deleted += 1
+                self.stdout.write(f'Would delete {name}')
+                continue
+            # Uploads may have reused the blob since the scan started
+            if is_referenced(name) or storage.get_modified_time(name) > cutoff:
+                continue
+            deleted += 1
+            storage.delete(name)
+            logger.info("gc_media: deleted %s", name)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} of {scanned} content-addressed file(s)'))
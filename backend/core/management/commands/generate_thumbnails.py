@@ -0,0 +1,49 @@
+"""
+Django management command to (re)generate profile picture thumbnails.
+
+Covers pictures uploaded before thumbnails existed and retries failed
+background jobs. Profiles are rendered in parallel by --workers threads.
+
+Usage: python manage.py generate_thumbnails [--all] [--workers 4]
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from core.image_utils import generate_thumbnails
+from core.models import UserProfile
+
+
+def _render(profile_id):
+    try:
+        return bool(generate_thumbnails(profile_id))
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Generate missing profile picture thumbnails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Regenerate thumbnails for every profile picture, not only missing ones')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Threads rendering thumbnails in parallel')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        profiles = UserProfile.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(profile_picture_thumbnails={})
+        ids = list(profiles.order_by('id').values_list('id', flat=True))
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(_render, ids))
+        else:
+            results = [bool(generate_thumbnails(profile_id)) for profile_id in ids]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated thumbnails for {sum(results)} of {len(ids)} profile(s) in {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,57 @@
+"""
+Django management command to verify and rebuild the denormalized rating
+aggregates on UserProfile (rating_sum / rating_count / rating_tag_counts).
+Profiles that are fixed also get their reputation score recomputed.
+Usage: python manage.py rebuild_rating_aggregates [--dry-run]
+"""
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from core.models import Rating, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserProfile rating aggregates from the Rating table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report profiles with drifted aggregates, do not fix them',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        totals = {
+            row['ratee_id']: (row['total'] or 0, row['count'])
+            for row in Rating.objects.order_by().values('ratee_id').annotate(total=Sum('score'), count=Count('id'))
+        }
+        tag_counts = defaultdict(Counter)
+        for ratee_id, tags in Rating.objects.order_by().values_list('ratee_id', 'tags').iterator():
+            tag_counts[ratee_id].update(tags or [])
+
+        rebuilt = []
+        profiles = UserProfile.objects.only('id', 'user_id', *UserProfile.COUNTER_FIELDS)
+        for profile in profiles.iterator():
+            rating_sum, rating_count = totals.get(profile.user_id, (0, 0))
+            tags = dict(tag_counts.get(profile.user_id, {}))
+            if (profile.rating_sum, profile.rating_count, profile.rating_tag_counts or {}) == (rating_sum, rating_count, tags):
+                continue
+            self.stdout.write(
+                f'Profile {profile.id}: sum {profile.rating_sum} -> {rating_sum}, '
+                f'count {profile.rating_count} -> {rating_count}'
+            )
+            profile.rating_sum = rating_sum
+            profile.rating_count = rating_count
+            profile.rating_tag_counts = tags
+            rebuilt.append(profile)
+
+        if rebuilt and not dry_run:
+            UserProfile.objects.bulk_update(rebuilt, list(UserProfile.COUNTER_FIELDS), batch_size=500)
+            for profile in rebuilt:
+                UserProfile.update_reputation(profile.user_id, touch=False)
+
+        verb = 'Found' if dry_run else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(rebuilt)} profile(s) with drifted rating aggregates'))
@@ -0,0 +1,51 @@
+"""
+Django management command to verify and repair the denormalized participant
+counters on Offer (accepted_count / completed_count).
+Usage: python manage.py repair_offer_counters [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Q
+from core.models import Offer, Handshake
+
+
+class Command(BaseCommand):
+    help = 'Recompute Offer.accepted_count and Offer.completed_count from handshakes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report offers with drifted counters, do not fix them',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        # Only offers whose stored counters disagree with the handshake table
+        drifted = Offer.objects.annotate(
+            actual_accepted=Count(
+                'handshakes', filter=Q(handshakes__status__in=Handshake.ACCEPTED_STATUSES)
+            ),
+            actual_completed=Count(
+                'handshakes', filter=Q(handshakes__status='completed')
+            ),
+        ).exclude(
+            accepted_count=F('actual_accepted'),
+            completed_count=F('actual_completed'),
+        )
+
+        repaired = []
+        for offer in drifted.iterator():
+            self.stdout.write(
+                f'Offer {offer.id}: accepted {offer.accepted_count} -> {offer.actual_accepted}, '
+                f'completed {offer.completed_count} -> {offer.actual_completed}'
+            )
+            offer.accepted_count = offer.actual_accepted
+            offer.completed_count = offer.actual_completed
+            repaired.append(offer)
+
+        if repaired and not dry_run:
+            Offer.objects.bulk_update(repaired, ['accepted_count', 'completed_count'], batch_size=500)
+
+        verb = 'Found' if dry_run else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(repaired)} offer(s) with drifted counters'))
@@ -0,0 +1,50 @@
+"""
+Django management command to deliver queued emails (core.models.OutgoingEmail).
+Each batch reuses one connection to the mail server; failed emails are retried
+with exponential backoff until they give up (core.email_utils.deliver_outbox).
+Usage: python manage.py send_outbox [--batch-size N] [--loop [--interval S]]
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.email_utils import deliver_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send due emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Emails sent per connection to the mail server')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, polling for new emails')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to wait when the outbox is empty (with --loop)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            try:
+                sent, failed = deliver_outbox(batch_size=options['batch_size'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                # Mail server unreachable: claimed emails become due again after their lease
+                logger.exception("send_outbox: batch failed")
+                sent = failed = 0
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            # Long-running worker: drop connections the database has closed meanwhile
+            close_old_connections()
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {total_sent} email(s), {total_failed} failed attempt(s)'))
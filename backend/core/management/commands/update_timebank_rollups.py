@@ -0,0 +1,40 @@
+"""
+Django management command to fold new transactions into the timebank analytics rollups.
+Only transactions added since the last run (the watermark) are processed.
+Usage: python manage.py update_timebank_rollups [--batch-size N] [--lag-seconds S]
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from core.analytics_utils import ROLLUP_BATCH_SIZE, ROLLUP_SAFETY_LAG, update_timebank_rollups
+
+
+class Command(BaseCommand):
+    help = 'Incrementally update daily per-district timebank rollups from new transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=ROLLUP_BATCH_SIZE,
+            help='Transactions folded per committed batch',
+        )
+        parser.add_argument(
+            '--lag-seconds', type=int, default=int(ROLLUP_SAFETY_LAG.total_seconds()),
+            help='Skip transactions newer than this many seconds (picked up next run)',
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Stop after this many batches',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed, batches = update_timebank_rollups(
+            batch_size=options['batch_size'],
+            safety_lag=timedelta(seconds=options['lag_seconds']),
+            max_batches=options['max_batches'],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Folded {processed} transaction(s) in {batches} batch(es) in {elapsed:.2f}s'
+        ))
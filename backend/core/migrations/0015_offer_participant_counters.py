@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:23
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_offer_counters(apps, schema_editor):
+    Offer = apps.get_model('core', 'Offer')
+    offers = Offer.objects.annotate(
+        accepted=Count('handshakes', filter=Q(handshakes__status__in=['accepted', 'in_progress', 'completed'])),
+        completed=Count('handshakes', filter=Q(handshakes__status='completed')),
+    )
+    for offer in offers.iterator():
+        if offer.accepted or offer.completed:
+            Offer.objects.filter(pk=offer.pk).update(
+                accepted_count=offer.accepted, completed_count=offer.completed
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_remove_handshake_unique_offer_handshake_rating_tags_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, help_text='Handshakes in accepted/in_progress/completed state'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, help_text='Handshakes in completed state'),
+        ),
+        migrations.RunPython(backfill_offer_counters, migrations.RunPython.noop),
+    ]
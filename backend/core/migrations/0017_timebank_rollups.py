@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_transaction_ledger_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TimebankDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('district', models.CharField(blank=True, help_text='District of the receiving (providing) user', max_length=100)),
+                ('volume', models.PositiveIntegerField(default=0, help_text='Beellars transferred')),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('active_traders', models.PositiveIntegerField(default=0, help_text='Distinct users who earned or spent in this district')),
+                ('money_supply', models.PositiveIntegerField(default=0, help_text='Sum of district balances when last updated')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['day', 'district'],
+                'unique_together': {('day', 'district')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TimebankUserDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('district', models.CharField(blank=True, max_length=100)),
+                ('earned', models.PositiveIntegerField(default=0)),
+                ('spent', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timebank_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['district', 'day'], name='user_rollup_district_day_idx')],
+                'unique_together': {('day', 'district', 'user')},
+            },
+        ),
+    ]
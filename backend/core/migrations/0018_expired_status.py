@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_timebank_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='handshake',
+            name='status',
+            field=models.CharField(choices=[('proposed', 'Proposed'), ('accepted', 'Accepted'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('settled', 'Settled'), ('declined', 'Declined'), ('expired', 'Expired')], default='proposed', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='offer',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='open', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='open', max_length=20),
+        ),
+    ]
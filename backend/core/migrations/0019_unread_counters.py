@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Q
+
+
+def backfill_unread_counters(apps, schema_editor):
+    Handshake = apps.get_model('core', 'Handshake')
+    UnreadCounter = apps.get_model('core', 'UnreadCounter')
+    handshakes = Handshake.objects.annotate(
+        last_message_id=Max('messages__id'),
+        provider_unread=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=F('provider'))),
+        seeker_unread=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=F('seeker'))),
+    ).filter(last_message_id__isnull=False)
+    counters = []
+    for handshake in handshakes.iterator():
+        counters.append(UnreadCounter(
+            user_id=handshake.provider_id, handshake_id=handshake.pk,
+            count=handshake.provider_unread, last_message_id=handshake.last_message_id,
+        ))
+        if handshake.seeker_id != handshake.provider_id:
+            counters.append(UnreadCounter(
+                user_id=handshake.seeker_id, handshake_id=handshake.pk,
+                count=handshake.seeker_unread, last_message_id=handshake.last_message_id,
+            ))
+    UnreadCounter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_expired_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('last_message_id', models.BigIntegerField(default=0, help_text='Latest message in the conversation')),
+                ('handshake', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to='core.handshake')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'count'], name='unread_user_count_idx')],
+                'unique_together': {('user', 'handshake')},
+            },
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
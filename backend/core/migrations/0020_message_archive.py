@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_unread_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('last_message_id', models.BigIntegerField(default=0, help_text='Newest message id in the archive')),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSON list of serialized messages, oldest first')),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('handshake', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='message_archive', to='core.handshake')),
+            ],
+        ),
+    ]
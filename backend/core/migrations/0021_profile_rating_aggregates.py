@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:58
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Rating = apps.get_model('core', 'Rating')
+    UserProfile = apps.get_model('core', 'UserProfile')
+    tag_counts = defaultdict(Counter)
+    for ratee_id, tags in Rating.objects.order_by().values_list('ratee_id', 'tags').iterator():
+        tag_counts[ratee_id].update(tags or [])
+    for row in Rating.objects.order_by().values('ratee_id').annotate(total=Sum('score'), count=Count('id')):
+        UserProfile.objects.filter(user_id=row['ratee_id']).update(
+            rating_sum=row['total'] or 0,
+            rating_count=row['count'],
+            rating_tag_counts=dict(tag_counts[row['ratee_id']]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_message_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='rating_tag_counts',
+            field=models.JSONField(blank=True, default=dict, help_text='Tag -> number of ratings using it'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
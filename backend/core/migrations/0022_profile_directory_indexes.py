@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Trigram indexes serve the directory's case-insensitive substring search
+# (Django compiles icontains to UPPER(col::text) LIKE ...). Postgres only;
+# other backends fall back to a scan of the visible profiles.
+TRIGRAM_INDEXES = [
+    ('profile_skills_trgm_idx', 'core_userprofile', 'skills'),
+    ('profile_interests_trgm_idx', 'core_userprofile', 'interests'),
+    ('auth_user_username_trgm_idx', 'auth_user', 'username'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_profile_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['district', 'is_visible'], name='profile_district_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
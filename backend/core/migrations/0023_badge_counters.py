@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_profile_directory_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadgeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_created', models.PositiveIntegerField(default=0, help_text='Offers and requests published')),
+                ('handshakes_accepted', models.PositiveIntegerField(default=0, help_text='Handshakes accepted as provider or seeker')),
+                ('exchanges_completed', models.PositiveIntegerField(default=0, help_text='Completed exchanges on either side')),
+                ('services_provided', models.PositiveIntegerField(default=0, help_text='Completed exchanges as the provider')),
+                ('hours_earned', models.PositiveIntegerField(default=0, help_text='Beellars received for provided services')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='badge_counter', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:14
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+from core.reputation_utils import reputation_rank, reputation_score
+
+
+def backfill_reputation(apps, schema_editor):
+    Rating = apps.get_model('core', 'Rating')
+    Transaction = apps.get_model('core', 'Transaction')
+    UserProfile = apps.get_model('core', 'UserProfile')
+
+    completed = Counter()
+    last_active = {}
+
+    def seen(user_id, when):
+        if when and (user_id not in last_active or when > last_active[user_id]):
+            last_active[user_id] = when
+
+    for side in ('sender_id', 'receiver_id'):
+        for row in Transaction.objects.order_by().values(side).annotate(total=Count('id'), latest=Max('created_at')):
+            completed[row[side]] += row['total']
+            seen(row[side], row['latest'])
+    for row in Rating.objects.order_by().values('ratee_id').annotate(latest=Max('created_at')):
+        seen(row['ratee_id'], row['latest'])
+
+    profiles = []
+    for profile in UserProfile.objects.filter(user_id__in=list(last_active)).iterator():
+        profile.last_active_at = last_active[profile.user_id]
+        profile.reputation_score = reputation_score(profile.rating_sum, profile.rating_count, completed[profile.user_id])
+        profile.reputation_rank = reputation_rank(profile.reputation_score, profile.last_active_at)
+        profiles.append(profile)
+    UserProfile.objects.bulk_update(profiles, ['last_active_at', 'reputation_score', 'reputation_rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_badge_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_active_at',
+            field=models.DateTimeField(blank=True, help_text='Last rating received or exchange completed', null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='reputation_rank',
+            field=models.FloatField(default=0, help_text='Recency-decayed sort key for reputation_score'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='reputation_score',
+            field=models.FloatField(default=0, help_text='Bayesian rating average plus completion bonus; 0 until first activity'),
+        ),
+        migrations.RunPython(backfill_reputation, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-reputation_rank'], name='profile_reputation_idx'),
+        ),
+    ]
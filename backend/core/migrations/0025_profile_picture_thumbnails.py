@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_profile_reputation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='profile_picture_thumbnails',
+            field=models.JSONField(blank=True, default=dict, help_text='Square size -> stored thumbnail name (see image_utils)'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_profile_picture_thumbnails'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='forumreply',
+            index=models.Index(fields=['topic', 'created_at'], name='forum_reply_topic_idx'),
+        ),
+    ]
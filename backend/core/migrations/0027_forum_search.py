@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:40
+
+from django.db import migrations
+
+
+# Full-text indexes for GET /api/forum/search/ (core.search_utils).
+# Postgres: expression GIN indexes; the search queries (TOPIC_SEARCH_VECTOR,
+# REPLY_SEARCH_VECTOR) repeat these expressions exactly so they can use them.
+PG_INDEXES = [
+    (
+        'forum_topic_search_idx', 'core_forumtopic',
+        "(setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B'))",
+    ),
+    ('forum_reply_search_idx', 'core_forumreply', "(to_tsvector('english', body))"),
+]
+
+# SQLite: an FTS5 table kept in sync by triggers. Topic rows use rowid 2*id,
+# reply rows 2*id + 1, so every trigger updates its row by rowid.
+FTS = 'core_forum_fts'
+SQLITE_STATEMENTS = [
+    f"CREATE VIRTUAL TABLE {FTS} USING fts5(title, body, topic_id UNINDEXED, reply_id UNINDEXED, "
+    f"tokenize = 'porter unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_insert AFTER INSERT ON core_forumtopic BEGIN "
+    f"INSERT INTO {FTS}(rowid, title, body, topic_id, reply_id) "
+    f"VALUES (2 * new.id, new.title, new.body, new.id, NULL); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_update AFTER UPDATE OF title, body ON core_forumtopic BEGIN "
+    f"UPDATE {FTS} SET title = new.title, body = new.body WHERE rowid = 2 * old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_delete AFTER DELETE ON core_forumtopic BEGIN "
+    f"DELETE FROM {FTS} WHERE rowid = 2 * old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_reply_insert AFTER INSERT ON core_forumreply BEGIN "
+    f"INSERT INTO {FTS}(rowid, title, body, topic_id, reply_id) "
+    f"VALUES (2 * new.id + 1, '', new.body, new.topic_id, new.id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_reply_update AFTER UPDATE OF body, topic_id ON core_forumreply BEGIN "
+    f"UPDATE {FTS} SET body = new.body, topic_id = new.topic_id WHERE rowid = 2 * old.id + 1; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_reply_delete AFTER DELETE ON core_forumreply BEGIN "
+    f"DELETE FROM {FTS} WHERE rowid = 2 * old.id + 1; END",
+    f"INSERT INTO {FTS}(rowid, title, body, topic_id, reply_id) "
+    f"SELECT 2 * id, title, body, id, NULL FROM core_forumtopic",
+    f"INSERT INTO {FTS}(rowid, title, body, topic_id, reply_id) "
+    f"SELECT 2 * id + 1, '', body, topic_id, id FROM core_forumreply",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, table, expression in PG_INDEXES:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({expression})')
+    elif vendor == 'sqlite':
+        for statement in SQLITE_STATEMENTS:
+            schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, _, _ in PG_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+    elif vendor == 'sqlite':
+        for action in ('topic_insert', 'topic_update', 'topic_delete', 'reply_insert', 'reply_update', 'reply_delete'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS}_{action}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_forum_reply_topic_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:40
+
+import math
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+# hot_rank = ln(sum(exp(t_i / HOT_DECAY_SECONDS))) over the topic and its replies
+# (core.forum_utils), accumulated in log space
+HOT_DECAY_SECONDS = 24 * 3600
+
+
+def activity_term(moment):
+    return moment.timestamp() / HOT_DECAY_SECONDS
+
+
+def add_activity(rank, moment):
+    term = activity_term(moment)
+    if not rank:
+        return term
+    high, low = max(rank, term), min(rank, term)
+    return high + math.log1p(math.exp(low - high))
+
+
+# Full-text triggers of core_forumtopic as created by 0027
+FTS = 'core_forum_fts'
+TOPIC_FTS_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_insert AFTER INSERT ON core_forumtopic BEGIN "
+    f"INSERT INTO {FTS}(rowid, title, body, topic_id, reply_id) "
+    f"VALUES (2 * new.id, new.title, new.body, new.id, NULL); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_update AFTER UPDATE OF title, body ON core_forumtopic BEGIN "
+    f"UPDATE {FTS} SET title = new.title, body = new.body WHERE rowid = 2 * old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS}_topic_delete AFTER DELETE ON core_forumtopic BEGIN "
+    f"DELETE FROM {FTS} WHERE rowid = 2 * old.id; END",
+]
+
+
+def backfill_topic_activity(apps, schema_editor):
+    ForumReply = apps.get_model('core', 'ForumReply')
+    ForumTopic = apps.get_model('core', 'ForumTopic')
+
+    topics = {topic.pk: topic for topic in ForumTopic.objects.only('id', 'created_at')}
+    for topic in topics.values():
+        topic.hot_rank = activity_term(topic.created_at)
+    # One ordered pass over reply timestamps; the last one seen per topic is its latest
+    for topic_id, created_at, author_id in ForumReply.objects.order_by('created_at', 'id').values_list(
+        'topic_id', 'created_at', 'author_id'
+    ).iterator():
+        topic = topics[topic_id]
+        topic.reply_count += 1
+        topic.last_reply_at = created_at
+        topic.last_reply_author_id = author_id
+        topic.hot_rank = add_activity(topic.hot_rank, created_at)
+    ForumTopic.objects.bulk_update(
+        list(topics.values()), ['reply_count', 'last_reply_at', 'last_reply_author', 'hot_rank'], batch_size=500
+    )
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Adding the columns rebuilt core_forumtopic on SQLite, dropping its full-text triggers
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TOPIC_FTS_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_forum_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Unapplying rebuilds the table again: restore the triggers once the columns are gone
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='hot_rank',
+            field=models.FloatField(default=0, help_text='Time-decayed activity sort key (core.forum_utils)'),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='last_reply_author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='forumtopic',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('last_reply_at', 'created_at'), descending=True), name='forum_topic_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumtopic',
+            index=models.Index(fields=['-hot_rank'], name='forum_topic_hot_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_topic_activity, migrations.RunPython.noop),
+    ]
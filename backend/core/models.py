@@ -1,7 +1,12 @@
+import json
+import zlib
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db.models import Avg
+from django.utils import timezone
+from django.db.models import Avg, F
+from django.db.models.functions import Coalesce, Greatest
 
 
 class Offer(models.Model):
@@ -10,6 +15,7 @@ class Offer(models.Model):
         ("in_progress", "In Progress"),
         ("completed", "Completed"),
         ("cancelled", "Cancelled"),
+        ("expired", "Expired"),
     ]
 
     user = models.ForeignKey(
@@ -27,14 +33,28 @@ class Offer(models.Model):
         max_length=20, choices=STATUS_CHOICES, default="open"
     )
     max_participants = models.PositiveIntegerField(default=1, help_text="Maximum number of participants (Offers only)")
+    # Denormalized participant counters, maintained by Handshake.save() with F() updates
+    accepted_count = models.PositiveIntegerField(default=0, help_text="Handshakes in accepted/in_progress/completed state")
+    completed_count = models.PositiveIntegerField(default=0, help_text="Handshakes in completed state")
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    COUNTER_FIELDS = ("accepted_count", "completed_count")
+
     def __str__(self):
         return f"Offer: {self.title}"
+
+    def save(self, *args, **kwargs):
+        # Never write stale in-memory counters back over concurrent F() updates
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def get_accepted_participant_count(self):
         """Get count of accepted handshakes for this offer"""
-        return self.handshakes.filter(status__in=["accepted", "in_progress", "completed"]).count()
+        return self.accepted_count
     
     def get_remaining_slots(self):
         """Get remaining participant slots"""
@@ -47,6 +67,7 @@ class Request(models.Model):
         ("in_progress", "In Progress"),
         ("completed", "Completed"),
         ("cancelled", "Cancelled"),
+        ("expired", "Expired"),
     ]
 
     user = models.ForeignKey(
@@ -75,28 +96,143 @@ class UserProfile(models.Model):
     skills = models.TextField(blank=True, help_text="Comma-separated list of skills")
     interests = models.TextField(blank=True, help_text="Comma-separated list of interests")
     profile_picture = models.ImageField(upload_to="profile_pictures/", blank=True, null=True)
+    profile_picture_thumbnails = models.JSONField(
+        default=dict, blank=True, help_text="Square size -> stored thumbnail name (see image_utils)"
+    )
     province = models.CharField(max_length=100, blank=True)
     district = models.CharField(max_length=100, blank=True)
     is_visible = models.BooleanField(default=True)
     timebank_balance = models.PositiveIntegerField(default=0)
     email_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized aggregates of received ratings, maintained by Rating.save()/delete
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_tag_counts = models.JSONField(default=dict, blank=True, help_text="Tag -> number of ratings using it")
+    # Stored reputation (see reputation_utils), refreshed by update_reputation()
+    reputation_score = models.FloatField(default=0, help_text="Bayesian rating average plus completion bonus; 0 until first activity")
+    reputation_rank = models.FloatField(default=0, help_text="Recency-decayed sort key for reputation_score")
+    last_active_at = models.DateTimeField(null=True, blank=True, help_text="Last rating received or exchange completed")
+
+    COUNTER_FIELDS = ("rating_sum", "rating_count", "rating_tag_counts")
+    REPUTATION_FIELDS = ("reputation_score", "reputation_rank", "last_active_at")
+
+    class Meta:
+        indexes = [
+            # Profile directory: district filter over visible profiles
+            models.Index(fields=["district", "is_visible"], name="profile_district_idx"),
+            # Offer/request lists sorted by owner reputation
+            models.Index(fields=["-reputation_rank"], name="profile_reputation_idx"),
+        ]
 
     def __str__(self):
         return f"Profile({self.user.username})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored picture so save() can tell when a new one was uploaded
+        if "profile_picture" in field_names:
+            instance._loaded_picture = dict(zip(field_names, values))["profile_picture"] or None
+        return instance
+
+    def save(self, *args, **kwargs):
+        picture = None
+        picture_changed = False
+        tracked = "profile_picture" not in self.get_deferred_fields()
+        if tracked:
+            picture = self.profile_picture.name or None
+            if self._state.adding or hasattr(self, "_loaded_picture"):
+                picture_changed = picture != getattr(self, "_loaded_picture", None)
+        if picture_changed:
+            self.profile_picture_thumbnails = {}
+        # Never write stale in-memory aggregates, reputation or thumbnails back over concurrent updates
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = self.COUNTER_FIELDS + self.REPUTATION_FIELDS
+            if not picture_changed:
+                skipped += ("profile_picture_thumbnails",)
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+        if tracked:
+            # Uploads only get their final storage name during save
+            self._loaded_picture = self.profile_picture.name or None
+        if picture_changed and picture:
+            from .image_utils import schedule_thumbnails
+            schedule_thumbnails(self.pk)
+
+    def profile_picture_variant(self, size):
+        """Smallest stored thumbnail at least size px wide, else the original picture name"""
+        if not self.profile_picture:
+            return None
+        fitting = sorted(int(s) for s in (self.profile_picture_thumbnails or {}) if int(s) >= size)
+        if fitting:
+            return self.profile_picture_thumbnails[str(fitting[0])]
+        return self.profile_picture.name
     
     @property
     def average_rating(self):
-        """Calculate average rating from all received ratings"""
-        ratings = Rating.objects.filter(ratee=self.user)
-        if ratings.exists():
-            return round(ratings.aggregate(models.Avg("score"))["score__avg"] or 0, 2)
+        """Average score of all received ratings"""
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 2)
         return 0.0
     
     @property
     def total_ratings(self):
-        """Get total number of ratings received"""
-        return Rating.objects.filter(ratee=self.user).count()
+        """Total number of ratings received"""
+        return self.rating_count
+
+    def get_top_tags(self, limit=3):
+        """Most used rating tags, most frequent first (ties broken alphabetically)"""
+        counts = self.rating_tag_counts or {}
+        return sorted(counts, key=lambda tag: (-counts[tag], tag))[:limit]
+
+    @classmethod
+    def apply_rating(cls, user_id, score, tags, sign=1):
+        """Add (sign=1) or remove (sign=-1) one rating from a user's aggregates"""
+        from django.db import transaction
+
+        with transaction.atomic():
+            # Lock the row: the tag histogram is read-modify-write
+            profile = cls.objects.select_for_update().filter(user_id=user_id).only("rating_tag_counts").first()
+            if profile is None:
+                return
+            tag_counts = dict(profile.rating_tag_counts or {})
+            for tag in tags or []:
+                count = tag_counts.get(tag, 0) + sign
+                if count > 0:
+                    tag_counts[tag] = count
+                else:
+                    tag_counts.pop(tag, None)
+            cls.objects.filter(pk=profile.pk).update(
+                rating_sum=F("rating_sum") + sign * score,
+                rating_count=F("rating_count") + sign,
+                rating_tag_counts=tag_counts,
+            )
+            # A removed rating is not new activity
+            cls.update_reputation(user_id, touch=sign > 0)
+
+    @classmethod
+    def update_reputation(cls, user_id, touch=True):
+        """Recompute a user's stored reputation; touch=True marks the user active now"""
+        from .reputation_utils import reputation_rank, reputation_score
+
+        row = cls.objects.filter(user_id=user_id).values(
+            "rating_sum", "rating_count", "last_active_at", "user__badge_counter__exchanges_completed"
+        ).first()
+        if row is None:
+            return
+        last_active_at = timezone.now() if touch else row["last_active_at"]
+        score = reputation_score(
+            row["rating_sum"], row["rating_count"], row["user__badge_counter__exchanges_completed"] or 0
+        )
+        cls.objects.filter(user_id=user_id).update(
+            reputation_score=score,
+            reputation_rank=reputation_rank(score, last_active_at),
+            last_active_at=last_active_at,
+        )
 
 
 class Handshake(models.Model):
@@ -107,7 +243,10 @@ class Handshake(models.Model):
         ("completed", "Completed"),
         ("settled", "Settled"),
         ("declined", "Declined"),
+        ("expired", "Expired"),
     ]
+    # Statuses that occupy a participant slot on an offer
+    ACCEPTED_STATUSES = ("accepted", "in_progress", "completed")
 
     offer = models.ForeignKey(
         Offer, on_delete=models.CASCADE, null=True, blank=True, related_name="handshakes"
@@ -139,11 +278,33 @@ class Handshake(models.Model):
         if self.offer and self.request:
             raise ValidationError("Handshake cannot be linked to both Offer and Request.")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted status so save() can adjust offer counters
+        instance._loaded_status = dict(zip(field_names, values)).get("status")
+        return instance
+
     def save(self, *args, **kwargs):
         # Auto-complete logic
         if self.provider_confirmed and self.seeker_confirmed and self.status != "completed":
             self.status = "completed"
+        previous_status = None if self._state.adding else getattr(self, "_loaded_status", None)
         super().save(*args, **kwargs)
+        self.update_offer_counters(previous_status, self.status)
+        self._loaded_status = self.status
+
+    def update_offer_counters(self, old_status, new_status):
+        """Apply the counter delta for a status transition to the linked offer"""
+        if not self.offer_id:
+            return
+        accepted_delta = (new_status in self.ACCEPTED_STATUSES) - (old_status in self.ACCEPTED_STATUSES)
+        completed_delta = (new_status == "completed") - (old_status == "completed")
+        if accepted_delta or completed_delta:
+            Offer.objects.filter(pk=self.offer_id).update(
+                accepted_count=F("accepted_count") + accepted_delta,
+                completed_count=F("completed_count") + completed_delta,
+            )
 
     def __str__(self):
         target = self.offer.title if self.offer else self.request.title
@@ -163,6 +324,13 @@ class Transaction(models.Model):
     amount = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-user ledger scans ordered by time
+            models.Index(fields=["sender", "created_at"], name="txn_sender_created_idx"),
+            models.Index(fields=["receiver", "created_at"], name="txn_receiver_created_idx"),
+        ]
+
     def __str__(self):
         return f"Transaction: {self.sender.username} → {self.receiver.username} ({self.amount} Beellar)"
 
@@ -216,6 +384,82 @@ class Message(models.Model):
         return f"Message from {self.sender.username} in handshake {self.handshake.id}"
 
 
+class UnreadCounter(models.Model):
+    """Unread message count per participant and conversation, kept in sync on insert and read"""
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="unread_counters"
+    )
+    handshake = models.ForeignKey(
+        Handshake, on_delete=models.CASCADE, related_name="unread_counters"
+    )
+    count = models.PositiveIntegerField(default=0)
+    last_message_id = models.BigIntegerField(default=0, help_text="Latest message in the conversation")
+
+    class Meta:
+        unique_together = [["user", "handshake"]]
+        indexes = [
+            models.Index(fields=["user", "count"], name="unread_user_count_idx"),
+        ]
+
+    @classmethod
+    def record_message(cls, message):
+        """Count a new message as unread for the recipient and move both participants' last_message_id"""
+        handshake = message.handshake
+        participants = [handshake.provider_id, handshake.seeker_id]
+        recipient_id = handshake.seeker_id if message.sender_id == handshake.provider_id else handshake.provider_id
+        counters = cls.objects.filter(handshake_id=handshake.pk, user_id__in=participants)
+        update = {
+            "count": models.Case(
+                models.When(user_id=recipient_id, then=F("count") + 1), default=F("count"),
+                output_field=models.PositiveIntegerField(),
+            ),
+            "last_message_id": message.id,
+        }
+        if counters.update(**update) < len(set(participants)):
+            # First message of the conversation: create the missing rows already counted
+            existing = set(counters.values_list("user_id", flat=True))
+            for user_id in set(participants) - existing:
+                cls.objects.get_or_create(
+                    user_id=user_id, handshake_id=handshake.pk,
+                    defaults={"count": int(user_id == recipient_id), "last_message_id": message.id},
+                )
+
+    @classmethod
+    def mark_read(cls, handshake_id, user, read_count):
+        """Subtract messages the user just marked as read"""
+        if read_count:
+            cls.objects.filter(handshake_id=handshake_id, user=user).update(
+                count=Greatest(F("count") - read_count, 0, output_field=models.PositiveIntegerField())
+            )
+
+    def __str__(self):
+        return f"{self.user.username}: {self.count} unread in handshake {self.handshake_id}"
+
+
+class MessageArchive(models.Model):
+    """Messages of a long-completed handshake, moved out of Message as one zlib-compressed JSON blob"""
+    handshake = models.OneToOneField(
+        Handshake, on_delete=models.CASCADE, related_name="message_archive"
+    )
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_id = models.BigIntegerField(default=0, help_text="Newest message id in the archive")
+    payload = models.BinaryField(help_text="zlib-compressed JSON list of serialized messages, oldest first")
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def get_messages(self):
+        if not self.payload:
+            return []
+        return json.loads(zlib.decompress(bytes(self.payload)))
+
+    def set_messages(self, messages):
+        self.payload = zlib.compress(json.dumps(messages, separators=(",", ":"), default=str).encode(), 9)
+        self.message_count = len(messages)
+        self.last_message_id = messages[-1]["id"] if messages else 0
+
+    def __str__(self):
+        return f"Archive of {self.message_count} message(s) in handshake {self.handshake_id}"
+
+
 class Rating(models.Model):
     """Ratings given after a completed handshake"""
     # Predefined tags
@@ -250,6 +494,30 @@ class Rating(models.Model):
         ordering = ["-created_at"]
         unique_together = [["handshake", "rater"]]  # One rating per user per handshake
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this rating contributed to the ratee's aggregates
+        loaded = dict(zip(field_names, values))
+        if {"ratee_id", "score", "tags"} <= loaded.keys():
+            instance._loaded_contribution = (loaded["ratee_id"], loaded["score"], loaded["tags"])
+        return instance
+
+    def save(self, *args, **kwargs):
+        from django.db import transaction
+
+        adding = self._state.adding
+        previous = getattr(self, "_loaded_contribution", None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = (self.ratee_id, self.score, self.tags)
+            if adding:
+                UserProfile.apply_rating(*current)
+            elif previous is not None and previous != current:
+                UserProfile.apply_rating(*previous, sign=-1)
+                UserProfile.apply_rating(*current)
+        self._loaded_contribution = current
+
     def clean(self):
         # Ensure rating is only given for completed handshakes
         if self.handshake.status != "completed":
@@ -301,6 +569,33 @@ class Badge(models.Model):
         return f"{self.user.username} - {self.get_badge_type_display()}"
 
 
+class BadgeCounter(models.Model):
+    """Per-user activity counters the badge rules are evaluated against (see badge_utils)"""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="badge_counter"
+    )
+    posts_created = models.PositiveIntegerField(default=0, help_text="Offers and requests published")
+    handshakes_accepted = models.PositiveIntegerField(default=0, help_text="Handshakes accepted as provider or seeker")
+    exchanges_completed = models.PositiveIntegerField(default=0, help_text="Completed exchanges on either side")
+    services_provided = models.PositiveIntegerField(default=0, help_text="Completed exchanges as the provider")
+    hours_earned = models.PositiveIntegerField(default=0, help_text="Beellars received for provided services")
+
+    COUNTER_FIELDS = ("posts_created", "handshakes_accepted", "exchanges_completed", "services_provided", "hours_earned")
+
+    @classmethod
+    def bump(cls, user_id, **deltas):
+        """Add deltas to a user's counters, creating the row on the user's first activity"""
+        update = {field: F(field) + delta for field, delta in deltas.items()}
+        if not cls.objects.filter(user_id=user_id).update(**update):
+            _, created = cls.objects.get_or_create(user_id=user_id, defaults=deltas)
+            if not created:
+                # Lost the race to create the row: apply the deltas to the winner's row
+                cls.objects.filter(user_id=user_id).update(**update)
+
+    def __str__(self):
+        return f"BadgeCounter({self.user_id})"
+
+
 class ForumTopic(models.Model):
     """Forum topics for community discussions"""
     title = models.CharField(max_length=200)
@@ -310,13 +605,99 @@ class ForumTopic(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized reply activity, maintained by record_reply / release_reply
+    reply_count = models.PositiveIntegerField(default=0)
+    last_reply_at = models.DateTimeField(null=True, blank=True)
+    last_reply_author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    hot_rank = models.FloatField(default=0, help_text="Time-decayed activity sort key (core.forum_utils)")
+
+    ACTIVITY_FIELDS = ("reply_count", "last_reply_at", "last_reply_author", "hot_rank")
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # ?sort=active: latest reply, or creation for unanswered topics
+            models.Index(Coalesce("last_reply_at", "created_at").desc(), name="forum_topic_activity_idx"),
+            models.Index(fields=["-hot_rank"], name="forum_topic_hot_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author.username}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.hot_rank:
+            from .forum_utils import activity_term
+            # The topic itself is its first activity
+            self.hot_rank = activity_term(timezone.now())
+        # Never write stale in-memory activity back over concurrent replies
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.ACTIVITY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def record_reply(cls, reply):
+        """Count a new reply and make it the topic's latest activity"""
+        from django.db import transaction
+        from .forum_utils import add_activity
+
+        with transaction.atomic():
+            # Lock the row: hot_rank and the latest reply are read-modify-write
+            topic = cls.objects.select_for_update().filter(pk=reply.topic_id).only(
+                "hot_rank", "last_reply_at"
+            ).first()
+            if topic is None:
+                return
+            update = {"reply_count": F("reply_count") + 1, "hot_rank": add_activity(topic.hot_rank, reply.created_at)}
+            if topic.last_reply_at is None or reply.created_at >= topic.last_reply_at:
+                update.update(last_reply_at=reply.created_at, last_reply_author_id=reply.author_id)
+            cls.objects.filter(pk=topic.pk).update(**update)
+
+    @classmethod
+    def release_reply(cls, reply):
+        """Remove a deleted reply from the topic's activity"""
+        from django.db import transaction
+        from .forum_utils import remove_activity
+
+        with transaction.atomic():
+            topic = cls.objects.select_for_update().filter(pk=reply.topic_id).only(
+                "hot_rank", "last_reply_at"
+            ).first()
+            if topic is None:
+                return
+            rank = remove_activity(topic.hot_rank, reply.created_at)
+            if rank is None or (topic.last_reply_at and reply.created_at >= topic.last_reply_at):
+                # Precision lost or the latest reply went away: recompute from the remaining rows
+                cls.refresh_activity(topic.pk)
+                return
+            cls.objects.filter(pk=topic.pk).update(
+                reply_count=Greatest(F("reply_count") - 1, 0, output_field=models.PositiveIntegerField()),
+                hot_rank=rank,
+            )
+
+    @classmethod
+    def refresh_activity(cls, topic_id):
+        """Recompute a topic's stored activity from its replies"""
+        from .forum_utils import hot_rank
+
+        created_at = cls.objects.filter(pk=topic_id).values_list("created_at", flat=True).first()
+        if created_at is None:
+            return
+        replies = list(
+            ForumReply.objects.filter(topic_id=topic_id).order_by("created_at", "id").values_list("created_at", "author_id")
+        )
+        last_reply_at, last_reply_author_id = replies[-1] if replies else (None, None)
+        cls.objects.filter(pk=topic_id).update(
+            reply_count=len(replies),
+            last_reply_at=last_reply_at,
+            last_reply_author_id=last_reply_author_id,
+            hot_rank=hot_rank([created_at] + [moment for moment, _ in replies]),
+        )
+
 
 class ForumReply(models.Model):
     """Replies to forum topics"""
@@ -332,6 +713,97 @@ class ForumReply(models.Model):
 
     class Meta:
         ordering = ["created_at"]  # Chronological order
+        indexes = [
+            # Latest reply per topic on the forum index
+            models.Index(fields=["topic", "created_at"], name="forum_reply_topic_idx"),
+        ]
 
     def __str__(self):
         return f"Reply to '{self.topic.title}' by {self.author.username}"
+
+
+class TimebankDailyRollup(models.Model):
+    """Daily Beellar volume per district, maintained incrementally from Transaction"""
+    day = models.DateField()
+    district = models.CharField(max_length=100, blank=True, help_text="District of the receiving (providing) user")
+    volume = models.PositiveIntegerField(default=0, help_text="Beellars transferred")
+    transaction_count = models.PositiveIntegerField(default=0)
+    active_traders = models.PositiveIntegerField(default=0, help_text="Distinct users who earned or spent in this district")
+    money_supply = models.PositiveIntegerField(default=0, help_text="Sum of district balances when last updated")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["day", "district"]
+        unique_together = [["day", "district"]]
+
+    @property
+    def velocity(self):
+        """Circulation velocity: volume relative to the Beellars held in the district"""
+        if not self.money_supply:
+            return 0.0
+        return round(self.volume / self.money_supply, 4)
+
+    def __str__(self):
+        return f"Rollup {self.day} {self.district or '-'}: {self.volume} Beellar"
+
+
+class TimebankUserDailyRollup(models.Model):
+    """Per-user daily earned/spent totals, attributed to the user's own district"""
+    day = models.DateField()
+    district = models.CharField(max_length=100, blank=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timebank_rollups"
+    )
+    earned = models.PositiveIntegerField(default=0)
+    spent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [["day", "district", "user"]]
+        indexes = [
+            models.Index(fields=["district", "day"], name="user_rollup_district_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.day}: +{self.earned}/-{self.spent}"
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into a rollup"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class OutgoingEmail(models.Model):
+    """Transactional email queued by a request and delivered by the send_outbox worker"""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50, help_text="Which email this is, e.g. activation")
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Not picked up by the worker before this")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # The worker's queue: due pending rows, oldest due first
+            models.Index(fields=["status", "next_attempt_at"], name="outgoing_email_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
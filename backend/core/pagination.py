@@ -0,0 +1,78 @@
+"""
+Pagination classes shared by list endpoints.
+"""
+import binascii
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class StandardPagination(PageNumberPagination):
+    """Page-number pagination with a client-selectable page size (?page=&page_size=)."""
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Forward-only cursor pagination on (created_at, id), oldest first (?cursor=&page_size=).
+
+    The cursor encodes the last row of the previous page, so every page is an
+    index range scan, no matter how deep into the list it is, and rows added
+    meanwhile never shift pages. Set `base_url` to build next links for another
+    endpoint than the current request (e.g. a detail view embedding page one).
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    base_url = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            created_at, pk = b64decode(token.encode(), altchars=b"-_").decode().rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+            raise NotFound("Invalid cursor")
+
+    def encode_cursor(self, row):
+        token = f"{row.created_at.isoformat()}|{row.pk}".encode()
+        return b64encode(token, altchars=b"-_").decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by("created_at", "id")
+        if cursor:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        page = list(queryset[:size + 1])
+        self.has_next = len(page) > size
+        self.page = page[:size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.base_url or self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -0,0 +1,41 @@
+"""
+Utility functions for the stored user reputation score.
+
+reputation_score is a Bayesian average of received ratings: every user starts
+with REPUTATION_PRIOR_WEIGHT virtual ratings of REPUTATION_PRIOR_MEAN, so a
+single 10/10 does not outrank a long record of 9s. Completed exchanges add a
+small logarithmic bonus.
+
+Recency is folded into reputation_rank, the indexed sort key:
+
+    reputation_rank = ln(reputation_score) + last_active_at / REPUTATION_DECAY_SECONDS
+
+Ordering by it is the same as ordering by
+reputation_score * exp(-(now - last_active_at) / REPUTATION_DECAY_SECONDS)
+for any "now", because the now-term is the same for every row. Inactive users
+therefore sink without any periodic job, and the key only has to be
+recomputed when the user's own ratings or completions change
+(UserProfile.update_reputation). Users without activity keep rank 0 and sort
+after everyone who has some.
+"""
+import math
+
+
+REPUTATION_PRIOR_MEAN = 7.0
+REPUTATION_PRIOR_WEIGHT = 5
+REPUTATION_COMPLETION_BONUS = 0.5
+# e-folding time of the recency decay (90 days)
+REPUTATION_DECAY_SECONDS = 90 * 24 * 3600
+
+
+def reputation_score(rating_sum, rating_count, completed):
+    """Bayesian-smoothed rating average plus a bonus for completed exchanges"""
+    average = (REPUTATION_PRIOR_MEAN * REPUTATION_PRIOR_WEIGHT + rating_sum) / (REPUTATION_PRIOR_WEIGHT + rating_count)
+    return round(average + REPUTATION_COMPLETION_BONUS * math.log1p(completed), 4)
+
+
+def reputation_rank(score, last_active_at):
+    """Decay-aware sort key for a score last refreshed at last_active_at"""
+    if last_active_at is None or score <= 0:
+        return 0.0
+    return math.log(score) + last_active_at.timestamp() / REPUTATION_DECAY_SECONDS
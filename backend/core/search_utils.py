@@ -0,0 +1,226 @@
+"""
+Utility functions for forum full-text search (GET /api/forum/search/?q=).
+
+Topics (title + body) and replies (body) are matched by the database's own
+full-text index, scored there and grouped per topic; Python only sees topic
+ids, scores and the few highlighted snippets of the current page.
+
+- PostgreSQL: expression GIN indexes over TOPIC_SEARCH_VECTOR and
+  REPLY_SEARCH_VECTOR (migration 0027 spells them out); the queries below
+  must repeat exactly the same expressions so the planner can use them. Titles weigh more than bodies
+  (setweight A/B), input is parsed with websearch_to_tsquery.
+- SQLite: an FTS5 table (FORUM_FTS_TABLE) kept in sync by triggers, ranked
+  with bm25(). Topic rows use rowid 2*id, reply rows 2*id + 1.
+
+A topic's score is its best-scoring match (reply matches count
+REPLY_RANK_WEIGHT as much as topic matches), ties broken by number of matches.
+Pages are cut in the database (LIMIT/OFFSET, plus a COUNT for the total).
+"""
+import html
+import re
+
+from django.db import connection
+
+
+SEARCH_CONFIG = "english"
+TOPIC_SEARCH_VECTOR = (
+    f"(setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || setweight(to_tsvector('{SEARCH_CONFIG}', body), 'B'))"
+)
+REPLY_SEARCH_VECTOR = f"to_tsvector('{SEARCH_CONFIG}', body)"
+FORUM_FTS_TABLE = "core_forum_fts"
+
+REPLY_RANK_WEIGHT = 0.5
+# Replies quoted per topic in the results
+SNIPPETS_PER_TOPIC = 3
+SNIPPET_WORDS = 16
+
+# Highlight markers (Unicode private use) that survive HTML escaping unchanged
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+
+
+def highlight(text):
+    """HTML-escape a snippet and turn the markers into <mark> tags"""
+    if text is None:
+        return None
+    return html.escape(text).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def fts5_query(query):
+    """Quote every word so user input can never be read as FTS5 syntax"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+# ---------------------------------------------------------------------------
+# PostgreSQL
+# ---------------------------------------------------------------------------
+PG_QUERY = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+PG_HEADLINE = f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=2"
+
+PG_RANK_SQL = f"""
+WITH q AS (SELECT {PG_QUERY} AS query),
+hits AS (
+    SELECT id AS topic_id, ts_rank({TOPIC_SEARCH_VECTOR}, q.query) AS rank
+    FROM core_forumtopic, q WHERE {TOPIC_SEARCH_VECTOR} @@ q.query
+    UNION ALL
+    SELECT topic_id, ts_rank({REPLY_SEARCH_VECTOR}, q.query) * {REPLY_RANK_WEIGHT}
+    FROM core_forumreply, q WHERE {REPLY_SEARCH_VECTOR} @@ q.query
+)
+SELECT topic_id, MAX(rank) AS score, COUNT(*) AS hits
+FROM hits GROUP BY topic_id ORDER BY score DESC, hits DESC, topic_id DESC
+LIMIT %s OFFSET %s
+"""
+
+PG_COUNT_SQL = f"""
+WITH q AS (SELECT {PG_QUERY} AS query)
+SELECT COUNT(*) FROM (
+    SELECT id FROM core_forumtopic, q WHERE {TOPIC_SEARCH_VECTOR} @@ q.query
+    UNION
+    SELECT topic_id FROM core_forumreply, q WHERE {REPLY_SEARCH_VECTOR} @@ q.query
+) matched
+"""
+
+PG_TOPIC_SNIPPETS_SQL = f"""
+WITH q AS (SELECT {PG_QUERY} AS query)
+SELECT id, ts_headline('{SEARCH_CONFIG}', title, q.query, 'HighlightAll=true, StartSel={MARK_START}, StopSel={MARK_END}'),
+       CASE WHEN to_tsvector('{SEARCH_CONFIG}', body) @@ q.query
+            THEN ts_headline('{SEARCH_CONFIG}', body, q.query, '{PG_HEADLINE}') END
+FROM core_forumtopic, q WHERE id = ANY(%s)
+"""
+
+PG_REPLY_SNIPPETS_SQL = f"""
+WITH q AS (SELECT {PG_QUERY} AS query)
+SELECT topic_id, id, ts_headline('{SEARCH_CONFIG}', body, q.query, '{PG_HEADLINE}')
+FROM (
+    SELECT topic_id, id, body, ROW_NUMBER() OVER (
+        PARTITION BY topic_id ORDER BY ts_rank({REPLY_SEARCH_VECTOR}, q.query) DESC, id
+    ) AS position
+    FROM core_forumreply, q WHERE topic_id = ANY(%s) AND {REPLY_SEARCH_VECTOR} @@ q.query
+) ranked, q
+WHERE position <= {SNIPPETS_PER_TOPIC}
+ORDER BY topic_id, position
+"""
+
+
+# ---------------------------------------------------------------------------
+# SQLite (FTS5)
+# ---------------------------------------------------------------------------
+# FORUM_FTS_TABLE is kept in sync by triggers on core_forumtopic and
+# core_forumreply (migration 0027). SQLite drops a table's triggers whenever a
+# migration rebuilds it (AddField, AlterField, RemoveField, ...), and nothing
+# fails: the index just silently goes stale. Every future migration that
+# alters either model must therefore end with a restore_search_triggers
+# RunPython (and start with one, for the reverse direction) re-creating the
+# triggers of the rebuilt table, as 0028 does; test_forum checks that all six
+# exist after migrating.
+
+# Column weights: title, body (topic_id / reply_id are unindexed)
+FTS_BM25 = f"bm25({FORUM_FTS_TABLE}, 10.0, 1.0)"
+
+# FTS5 auxiliary functions only work in the MATCH query itself, so matches are
+# materialized before being grouped or numbered (SQLite would inline them otherwise)
+FTS_RANK_SQL = f"""
+WITH hits AS MATERIALIZED (
+    SELECT topic_id, CASE WHEN reply_id IS NULL THEN {FTS_BM25} ELSE {FTS_BM25} * {REPLY_RANK_WEIGHT} END AS rank
+    FROM {FORUM_FTS_TABLE} WHERE {FORUM_FTS_TABLE} MATCH %s
+)
+SELECT topic_id, MIN(rank) AS score, COUNT(*) AS hits
+FROM hits GROUP BY topic_id ORDER BY score, hits DESC, topic_id DESC
+LIMIT %s OFFSET %s
+"""
+
+FTS_COUNT_SQL = f"""
+SELECT COUNT(DISTINCT topic_id) FROM {FORUM_FTS_TABLE} WHERE {FORUM_FTS_TABLE} MATCH %s
+"""
+
+FTS_SNIPPET_SQL = f"""
+WITH hits AS MATERIALIZED (
+    SELECT topic_id, reply_id, {FTS_BM25} AS rank,
+           highlight({FORUM_FTS_TABLE}, 0, '{MARK_START}', '{MARK_END}') AS title,
+           snippet({FORUM_FTS_TABLE}, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_WORDS}) AS snippet
+    FROM {FORUM_FTS_TABLE} WHERE {FORUM_FTS_TABLE} MATCH %s AND topic_id IN ({{placeholders}})
+)
+SELECT topic_id, reply_id, title, snippet FROM (
+    SELECT *, ROW_NUMBER() OVER (PARTITION BY topic_id, reply_id IS NULL ORDER BY rank, reply_id) AS position
+    FROM hits
+) WHERE position <= {SNIPPETS_PER_TOPIC}
+ORDER BY topic_id, position
+"""
+
+
+def rank_topics(query, limit, offset=0):
+    """[(topic_id, score, hits)] best first, one page of them; higher score is more relevant"""
+    if connection.vendor == "postgresql":
+        rows = _fetch(PG_RANK_SQL, [query, limit, offset])
+        return [(topic_id, float(score), hits) for topic_id, score, hits in rows]
+    match = fts5_query(query)
+    if not match:
+        return []
+    # bm25() is lower-is-better
+    return [(topic_id, -score, hits) for topic_id, score, hits in _fetch(FTS_RANK_SQL, [match, limit, offset])]
+
+
+def count_topics(query):
+    """Number of topics matching the query (by title, body or a reply)"""
+    if connection.vendor == "postgresql":
+        return _fetch(PG_COUNT_SQL, [query])[0][0]
+    match = fts5_query(query)
+    if not match:
+        return 0
+    return _fetch(FTS_COUNT_SQL, [match])[0][0]
+
+
+class RankedTopics:
+    """
+    rank_topics() as a lazy sequence for Django's Paginator: count() and each
+    page slice run their own query, so only the requested page is fetched.
+    """
+
+    def __init__(self, query):
+        self.query = query
+
+    def count(self):
+        return count_topics(self.query)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError("RankedTopics only supports slicing without a step")
+        offset = index.start or 0
+        return rank_topics(self.query, index.stop - offset, offset)
+
+
+def topic_snippets(query, topic_ids):
+    """
+    {topic_id: {"title": ..., "snippet": ..., "replies": [{"reply_id", "snippet"}]}}
+    with highlighted, HTML-escaped text. "title" / "snippet" are None when
+    only replies of the topic matched.
+    """
+    results = {topic_id: {"title": None, "snippet": None, "replies": []} for topic_id in topic_ids}
+    if not topic_ids:
+        return results
+
+    if connection.vendor == "postgresql":
+        for topic_id, title, snippet in _fetch(PG_TOPIC_SNIPPETS_SQL, [query, list(topic_ids)]):
+            results[topic_id]["title"] = highlight(title)
+            results[topic_id]["snippet"] = highlight(snippet)
+        for topic_id, reply_id, snippet in _fetch(PG_REPLY_SNIPPETS_SQL, [query, list(topic_ids)]):
+            results[topic_id]["replies"].append({"reply_id": reply_id, "snippet": highlight(snippet)})
+        return results
+
+    sql = FTS_SNIPPET_SQL.format(placeholders=", ".join(["%s"] * len(topic_ids)))
+    for topic_id, reply_id, title, snippet in _fetch(sql, [fts5_query(query), *topic_ids]):
+        if reply_id is None:
+            results[topic_id]["title"] = highlight(title)
+            results[topic_id]["snippet"] = highlight(snippet)
+        else:
+            results[topic_id]["replies"].append({"reply_id": reply_id, "snippet": highlight(snippet)})
+    return results
@@ -1,6 +1,10 @@
+from functools import cached_property
+
 from rest_framework import serializers
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from .models import UserProfile, Offer, Request, Handshake, Transaction, Question, Message, Rating, Badge, ForumTopic, ForumReply
+from .models import UserProfile, Offer, Request, Handshake, Transaction, Question, Message, Rating, Badge, ForumTopic, ForumReply, UnreadCounter
+from .authentication import is_admin
 from .location_utils import get_fuzzy_coordinates
 
 # ---------------------------------------------------------------------------
@@ -16,6 +20,9 @@ class UserProfileSerializer(serializers.ModelSerializer):
     email_verified = serializers.SerializerMethodField()
     is_admin = serializers.SerializerMethodField()
 
+    # Avatars render at 128 CSS px; 256 keeps them sharp on 2x screens
+    AVATAR_SIZE = 256
+
     class Meta:
         model = UserProfile
         fields = [
@@ -35,30 +42,37 @@ class UserProfileSerializer(serializers.ModelSerializer):
             return obj.district
         return None
     
+    # Viewer-dependent values are resolved once per serializer, not once per row
+    @cached_property
+    def _viewer_is_admin(self):
+        request = self.context.get("request")
+        return is_admin(getattr(request, "user", None))
+
+    @cached_property
+    def _media_base_url(self):
+        request = self.context.get("request")
+        return request.build_absolute_uri("/")[:-1] if request else ""
+
     def get_profile_picture_url(self, obj):
-        if obj.profile_picture:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
+        """Thumbnail fitting context["avatar_size"] (px), or the original until thumbnails exist"""
+        name = obj.profile_picture_variant(self.context.get("avatar_size", self.AVATAR_SIZE))
+        if name:
+            url = obj.profile_picture.storage.url(name)
+            if url.startswith("/"):
+                return self._media_base_url + url
+            return url
         return None
     
     def get_email_verified(self, obj):
         """Show email verification status only to admins"""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            is_admin = request.user.is_staff or request.user.is_superuser
-            if is_admin:
-                return getattr(obj, 'email_verified', False)
+        if self._viewer_is_admin:
+            return getattr(obj, 'email_verified', False)
         return None  # Don't show to non-admins
     
     def get_is_admin(self, obj):
         """Show if the profile owner is an admin (only visible to other admins)"""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            is_viewer_admin = request.user.is_staff or request.user.is_superuser
-            if is_viewer_admin:
-                return obj.user.is_staff or obj.user.is_superuser
+        if self._viewer_is_admin:
+            return is_admin(obj.user)
         return None  # Don't show to non-admins
 
 
@@ -71,6 +85,9 @@ class PublicProfileSerializer(serializers.ModelSerializer):
     profile_picture_url = serializers.SerializerMethodField()
     badges = serializers.SerializerMethodField()
     ratings = serializers.SerializerMethodField()
+    top_tags = serializers.SerializerMethodField()
+
+    AVATAR_SIZE = UserProfileSerializer.AVATAR_SIZE
 
     class Meta:
         model = UserProfile
@@ -102,11 +119,13 @@ class PublicProfileSerializer(serializers.ModelSerializer):
         return None
     
     def get_profile_picture_url(self, obj):
-        if obj.profile_picture:
+        name = obj.profile_picture_variant(self.context.get("avatar_size", self.AVATAR_SIZE))
+        if name:
+            url = obj.profile_picture.storage.url(name)
             request = self.context.get("request")
             if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
+                return request.build_absolute_uri(url)
+            return url
         return None
     
     def get_badges(self, obj):
@@ -124,9 +143,12 @@ class PublicProfileSerializer(serializers.ModelSerializer):
         ]
     
     def get_ratings(self, obj):
-        """Get all ratings and feedback for the user"""
+        """Newest page of ratings and feedback; the rest is paginated at /api/ratings/user/<id>/"""
         from .models import Rating
-        ratings = Rating.objects.filter(ratee=obj.user).order_by("-created_at")
+        from .pagination import StandardPagination
+        ratings = Rating.objects.filter(ratee_id=obj.user_id).select_related("rater").order_by(
+            "-created_at", "-id"
+        )[:StandardPagination.page_size]
         return [
             {
                 "id": rating.id,
@@ -141,16 +163,8 @@ class PublicProfileSerializer(serializers.ModelSerializer):
         ]
     
     def get_top_tags(self, obj):
-        """Get top 3 most common tags from all ratings"""
-        from .models import Rating
-        from collections import Counter
-        ratings = Rating.objects.filter(ratee=obj.user)
-        all_tags = []
-        for rating in ratings:
-            if rating.tags:
-                all_tags.extend(rating.tags)
-        top_tags = [tag for tag, count in Counter(all_tags).most_common(3)]
-        return top_tags
+        """Top 3 most common tags, from the stored tag histogram"""
+        return obj.get_top_tags(3)
 
 
 # ---------------------------------------------------------------------------
@@ -158,6 +172,7 @@ class PublicProfileSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------------------------------
 class OfferSerializer(serializers.ModelSerializer):
     username = serializers.SerializerMethodField()
+    owner_reputation = serializers.FloatField(source="user.profile.reputation_score", read_only=True, default=None)
     active_handshake = serializers.SerializerMethodField()
     fuzzy_lat = serializers.SerializerMethodField()
     fuzzy_lng = serializers.SerializerMethodField()
@@ -170,6 +185,7 @@ class OfferSerializer(serializers.ModelSerializer):
             "id",
             "user",
             "username",
+            "owner_reputation",
             "title",
             "description",
             "duration",
@@ -236,13 +252,18 @@ class OfferSerializer(serializers.ModelSerializer):
 
     def get_active_handshake(self, obj):
         """Return active handshake info if exists (for single participant) or list of handshakes (for multi-participant)"""
-        active_handshakes = obj.handshakes.filter(
-            status__in=["proposed", "accepted", "in_progress", "completed"]
-        )
+        # List views prefetch these into `active_handshakes` to avoid a query per offer
+        active_handshakes = getattr(obj, "active_handshakes", None)
+        if active_handshakes is None:
+            active_handshakes = list(
+                obj.handshakes.filter(
+                    status__in=["proposed", "accepted", "in_progress", "completed"]
+                ).select_related("seeker", "provider")
+            )
         
         # For backwards compatibility, return first handshake if only one
         # But also include participant count info
-        if active_handshakes.count() > 0:
+        if active_handshakes:
             handshakes_list = [
                 {
                     "id": h.id,
@@ -262,13 +283,14 @@ class OfferSerializer(serializers.ModelSerializer):
             return {
                 **handshakes_list[0],
                 "all_handshakes": handshakes_list,
-                "participant_count": active_handshakes.filter(status__in=["accepted", "in_progress", "completed"]).count(),
+                "participant_count": obj.accepted_count,
             }
         return None
 
 
 class RequestSerializer(serializers.ModelSerializer):
     username = serializers.SerializerMethodField()
+    owner_reputation = serializers.FloatField(source="user.profile.reputation_score", read_only=True, default=None)
     active_handshake = serializers.SerializerMethodField()
     fuzzy_lat = serializers.SerializerMethodField()
     fuzzy_lng = serializers.SerializerMethodField()
@@ -279,6 +301,7 @@ class RequestSerializer(serializers.ModelSerializer):
             "id",
             "user",
             "username",
+            "owner_reputation",
             "title",
             "description",
             "duration",
@@ -420,7 +443,7 @@ class HandshakeSerializer(serializers.ModelSerializer):
             existing_handshake = Handshake.objects.filter(
                 offer=offer,
                 seeker=user
-            ).exclude(status="declined").first()
+            ).exclude(status__in=["declined", "expired"]).first()
             if existing_handshake:
                 raise serializers.ValidationError(
                     "You already have a handshake with this offer."
@@ -505,6 +528,20 @@ class TransactionSerializer(serializers.ModelSerializer):
         return None
 
 
+class TransactionHistorySerializer(TransactionSerializer):
+    """Ledger row built by the history query: titles, direction and balance come from SQL annotations"""
+    balance_after = serializers.IntegerField(read_only=True)
+
+    class Meta(TransactionSerializer.Meta):
+        fields = TransactionSerializer.Meta.fields + ["balance_after"]
+
+    def get_related_post_title(self, obj):
+        return obj.post_title
+
+    def get_transaction_type(self, obj):
+        return obj.direction
+
+
 # ---------------------------------------------------------------------------
 # QUESTION & MESSAGE
 # ---------------------------------------------------------------------------
@@ -555,6 +592,49 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ["sender", "created_at", "is_read"]
 
 
+class ConversationSerializer(serializers.ModelSerializer):
+    """Inbox conversation built from an UnreadCounter row with latest-message annotations"""
+    handshake = HandshakeSerializer(read_only=True)
+    other_user_id = serializers.SerializerMethodField()
+    other_username = serializers.SerializerMethodField()
+    latest_message = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(source="count", read_only=True)
+    total_messages = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = UnreadCounter
+        fields = [
+            "handshake",
+            "other_user_id",
+            "other_username",
+            "latest_message",
+            "unread_count",
+            "total_messages",
+        ]
+
+    def _other_user(self, obj):
+        handshake = obj.handshake
+        return handshake.seeker if handshake.provider_id == obj.user_id else handshake.provider
+
+    def get_other_user_id(self, obj):
+        return self._other_user(obj).id
+
+    def get_other_username(self, obj):
+        return self._other_user(obj).username
+
+    def get_latest_message(self, obj):
+        message = Message(
+            id=obj.last_message_id,
+            handshake_id=obj.handshake_id,
+            sender_id=obj.latest_sender_id,
+            content=obj.latest_content,
+            created_at=obj.latest_created_at,
+            is_read=obj.latest_is_read,
+        )
+        message.sender = User(id=obj.latest_sender_id, username=obj.latest_sender_username)
+        return MessageSerializer(message).data
+
+
 # ---------------------------------------------------------------------------
 # RATINGS & BADGES
 # ---------------------------------------------------------------------------
@@ -656,8 +736,6 @@ class ForumReplySerializer(serializers.ModelSerializer):
 
 class ForumTopicSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source="author.username", read_only=True)
-    reply_count = serializers.SerializerMethodField()
-    replies = ForumReplySerializer(many=True, read_only=True)
 
     class Meta:
         model = ForumTopic
@@ -670,9 +748,34 @@ class ForumTopicSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "reply_count",
-            "replies",
+            "last_reply_at",
         ]
-        read_only_fields = ["author", "created_at", "updated_at"]
+        read_only_fields = ["author", "created_at", "updated_at", "reply_count", "last_reply_at"]
+
+
+class ForumTopicListSerializer(serializers.ModelSerializer):
+    """
+    Topic summary for the forum index. Expects the excerpt annotation and
+    last_reply_author selected by forum_topics_list_create; replies
+    themselves are only served by the detail endpoint.
+    """
+    author_username = serializers.CharField(source="author.username", read_only=True)
+    excerpt = serializers.CharField(read_only=True)
+    last_reply_author_username = serializers.CharField(
+        source="last_reply_author.username", read_only=True, default=None
+    )
 
-    def get_reply_count(self, obj):
-        return obj.replies.count()
+    class Meta:
+        model = ForumTopic
+        fields = [
+            "id",
+            "title",
+            "excerpt",
+            "author",
+            "author_username",
+            "created_at",
+            "updated_at",
+            "reply_count",
+            "last_reply_at",
+            "last_reply_author_username",
+        ]
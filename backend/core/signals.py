@@ -1,8 +1,10 @@
 # core/signals.py
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from django.db import transaction
+from .models import UserProfile, Offer, Request, Handshake, Transaction, Message, UnreadCounter, Rating, ForumReply, ForumTopic
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -16,3 +18,152 @@ def create_user_profile(sender, instance, created, **kwargs):
                 'email_verified': False
             }
         )
+
+
+@receiver(post_delete, sender=Handshake)
+def release_offer_counters(sender, instance, **kwargs):
+    """Give back the offer slot held by a deleted handshake."""
+    instance.update_offer_counters(getattr(instance, "_loaded_status", instance.status), None)
+
+
+@receiver(post_save, sender=Message)
+def count_unread_message(sender, instance, created, **kwargs):
+    """Bump the recipient's unread counter in the same transaction as the insert."""
+    if created:
+        UnreadCounter.record_message(instance)
+
+
+@receiver(post_save, sender=Message)
+def publish_new_message(sender, instance, created, **kwargs):
+    """Wake up chat streams and sockets once the message is committed."""
+    if created:
+        from .chat_utils import message_broker
+        transaction.on_commit(lambda: message_broker.publish(
+            instance.handshake_id, {"type": "message", "id": instance.id}
+        ))
+
+
+@receiver(post_save, sender=Message)
+def invalidate_inbox_on_message(sender, instance, created, **kwargs):
+    """New messages change both participants' inbox summaries (read receipts invalidate in mark_messages_read)."""
+    if not created:
+        return
+    from .inbox_utils import invalidate_inbox_summary
+    if Message.handshake.is_cached(instance):
+        participants = (instance.handshake.provider_id, instance.handshake.seeker_id)
+    else:
+        participants = Handshake.objects.filter(pk=instance.handshake_id).values_list(
+            "provider_id", "seeker_id"
+        ).first() or ()
+    invalidate_inbox_summary(*participants)
+
+
+@receiver(post_save, sender=Handshake)
+@receiver(post_delete, sender=Handshake)
+def invalidate_inbox_on_handshake(sender, instance, **kwargs):
+    """Proposals, acceptances and status changes show up in the inbox."""
+    from .inbox_utils import invalidate_inbox_summary
+    invalidate_inbox_summary(instance.provider_id, instance.seeker_id)
+
+
+@receiver(post_delete, sender=Rating)
+def release_rating_aggregates(sender, instance, **kwargs):
+    """Remove a deleted rating from the ratee's stored aggregates."""
+    UserProfile.apply_rating(instance.ratee_id, instance.score, instance.tags, sign=-1)
+
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_save, sender=Request)
+def count_post_for_badges(sender, instance, created, **kwargs):
+    """A published offer or request counts towards post badges."""
+    if created:
+        from .badge_utils import record_activity
+        record_activity("post", {instance.user_id: {"posts_created": 1}})
+
+
+@receiver(post_save, sender=Handshake)
+def count_handshake_for_badges(sender, instance, created, **kwargs):
+    """Count a handshake for both participants when it first becomes accepted."""
+    # Handshake.save() only refreshes _loaded_status after this signal has run
+    previous = None if created else getattr(instance, "_loaded_status", None)
+    if instance.status in Handshake.ACCEPTED_STATUSES and previous not in Handshake.ACCEPTED_STATUSES:
+        from .badge_utils import record_activity
+        record_activity("handshake", {
+            instance.provider_id: {"handshakes_accepted": 1},
+            instance.seeker_id: {"handshakes_accepted": 1},
+        })
+
+
+@receiver(post_save, sender=Transaction)
+def count_transaction_for_badges(sender, instance, created, **kwargs):
+    """A completed exchange counts for both sides; the receiver provided the service."""
+    if created:
+        from .badge_utils import record_activity
+        record_activity("transaction", {
+            instance.receiver_id: {"exchanges_completed": 1, "services_provided": 1, "hours_earned": instance.amount},
+            instance.sender_id: {"exchanges_completed": 1},
+        })
+
+
+@receiver(post_save, sender=Transaction)
+def refresh_reputation_on_transaction(sender, instance, created, **kwargs):
+    """Completions feed both participants' reputation (after the badge counters moved)."""
+    if created:
+        UserProfile.update_reputation(instance.receiver_id)
+        UserProfile.update_reputation(instance.sender_id)
+
+
+@receiver(post_save, sender=Rating)
+def evaluate_rating_badges(sender, instance, **kwargs):
+    """Ratings are counted on UserProfile; re-check the ratee once they are applied."""
+    from .badge_utils import record_activity
+    record_activity("rating", {instance.ratee_id: {}})
+
+
+@receiver(post_save, sender=ForumReply)
+def record_forum_reply(sender, instance, created, **kwargs):
+    """Move the topic's reply count, latest reply and hot rank with each new reply."""
+    if created:
+        ForumTopic.record_reply(instance)
+
+
+def _deleted_with(origin, model):
+    """Whether a delete cascade started from model instances (one instance or a queryset)."""
+    return isinstance(origin, model) or (isinstance(origin, QuerySet) and origin.model is model)
+
+
+@receiver(post_delete, sender=ForumReply)
+def release_forum_reply(sender, instance, **kwargs):
+    """Take a deleted reply out of its topic's stored activity."""
+    origin = kwargs.get("origin")
+    # Cascades: the topic itself is going away, or its activity is
+    # recomputed once per topic when the author is deleted (below)
+    if _deleted_with(origin, ForumTopic) or _deleted_with(origin, User):
+        return
+    ForumTopic.release_reply(instance)
+
+
+@receiver(pre_delete, sender=User)
+def remember_forum_topics_of_user(sender, instance, **kwargs):
+    """Note the topics a deleted user replied to; their replies go with the user."""
+    instance._forum_topic_ids = list(
+        ForumReply.objects.filter(author=instance).order_by().values_list("topic_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def refresh_forum_topics_of_user(sender, instance, **kwargs):
+    """Recompute the activity of every topic that lost the deleted user's replies."""
+    for topic_id in getattr(instance, "_forum_topic_ids", ()):
+        ForumTopic.refresh_activity(topic_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    """Role, activation or verification may have changed: stop serving the cached user."""
+    from .authentication import invalidate_auth_user
+    invalidate_auth_user(instance.pk if sender is User else instance.user_id)
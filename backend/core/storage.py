@@ -0,0 +1,71 @@
+"""
+Content-addressed media storage (settings.STORAGES["default"]).
+
+Uploads are stored as <upload dir>/<first 2 hex>/<sha256><ext>, so
+- identical uploads share one file: saving content that already exists
+  returns the existing name without writing anything;
+- a name never changes content, so serve_media can mark those URLs
+  immutable and browsers / proxies never need to revalidate them.
+
+Because blobs are shared, nothing deletes them on replace; the gc_media
+command removes blobs no model references any more. A deduplicated save
+touches the existing file, so it counts as new for gc_media's grace period.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.views.static import serve
+
+
+# Matches names produced by ContentAddressedStorage
+CONTENT_ADDRESSED_NAME = re.compile(r"(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the SHA-256 of their content"""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            from django.core.files import File
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        name = self.hashed_name(name, digest.hexdigest())
+        if self.exists(name):
+            # Same bytes already stored: deduplicate. The fresh mtime restarts
+            # gc_media's grace period while the new reference commits
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def hashed_name(name, hexdigest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, hexdigest[:2], hexdigest + extension).replace("\\", "/")
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_ADDRESSED_NAME.search(name or ""))
+
+
+def serve_media(request, path, document_root=None):
+    """django.views.static.serve with long-lived caching for content-addressed files"""
+    response = serve(request, path, document_root=document_root)
+    if response.status_code in (200, 304):
+        if is_content_addressed(path):
+            response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            response["ETag"] = '"%s"' % os.path.splitext(os.path.basename(path))[0]
+        else:
+            response["Cache-Control"] = MUTABLE_CACHE_CONTROL
+    return response
@@ -0,0 +1,95 @@
+"""
+Unit Tests for Timebank Analytics Rollups
+
+Tests cover:
+- Incremental folding of transactions into daily per-district rollups
+- Watermark handling (each transaction counted once)
+- Admin analytics endpoint served from rollups
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core.models import Request, Handshake, Transaction, TimebankDailyRollup, TimebankUserDailyRollup
+from core.analytics_utils import update_timebank_rollups
+
+
+class TimebankRollupTest(TestCase):
+    """Test incremental rollup updates"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider', password='pass')
+        self.seeker = User.objects.create_user(username='seeker', password='pass')
+        self.provider.profile.district = "Kadıköy"
+        self.provider.profile.save()
+        self.seeker.profile.district = "Beşiktaş"
+        self.seeker.profile.save()
+        request = Request.objects.create(user=self.seeker, title="Fix sink", description="", duration="2")
+        self.handshake = Handshake.objects.create(
+            request=request, provider=self.provider, seeker=self.seeker, hours=2, status='completed'
+        )
+    
+    def _transaction(self, amount):
+        return Transaction.objects.create(
+            handshake=self.handshake, sender=self.seeker, receiver=self.provider, amount=amount
+        )
+    
+    def test_rollup_attributes_volume_to_receiver_district(self):
+        """
+        Volume goes to the provider's district; each side gets a user row
+        """
+        self._transaction(2)
+        processed, _ = update_timebank_rollups(safety_lag=timedelta(0))
+        self.assertEqual(processed, 1)
+        
+        kadikoy = TimebankDailyRollup.objects.get(district="Kadıköy")
+        self.assertEqual(kadikoy.volume, 2)
+        self.assertEqual(kadikoy.transaction_count, 1)
+        self.assertEqual(kadikoy.active_traders, 1)
+        besiktas = TimebankDailyRollup.objects.get(district="Beşiktaş")
+        self.assertEqual(besiktas.volume, 0)
+        self.assertEqual(besiktas.active_traders, 1)
+        self.assertEqual(TimebankUserDailyRollup.objects.get(user=self.seeker).spent, 2)
+    
+    def test_only_new_transactions_are_folded(self):
+        """
+        A second run processes only rows beyond the watermark
+        """
+        self._transaction(2)
+        update_timebank_rollups(safety_lag=timedelta(0))
+        self._transaction(3)
+        processed, _ = update_timebank_rollups(safety_lag=timedelta(0))
+        
+        self.assertEqual(processed, 1)
+        kadikoy = TimebankDailyRollup.objects.get(district="Kadıköy")
+        self.assertEqual(kadikoy.volume, 5)
+        self.assertEqual(kadikoy.transaction_count, 2)
+        self.assertEqual(TimebankUserDailyRollup.objects.get(user=self.provider).earned, 5)
+        self.assertEqual(update_timebank_rollups(safety_lag=timedelta(0)), (0, 0))
+    
+    def test_batches_are_bounded(self):
+        """
+        batch_size caps how many transactions each committed batch folds
+        """
+        for _ in range(3):
+            self._transaction(1)
+        processed, batches = update_timebank_rollups(batch_size=2, safety_lag=timedelta(0))
+        self.assertEqual((processed, batches), (3, 2))
+    
+    def test_admin_endpoint_serves_rollups(self):
+        """
+        The analytics endpoint returns series and per-district top users
+        """
+        self._transaction(2)
+        update_timebank_rollups(safety_lag=timedelta(0))
+        admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        
+        response = client.get('/api/admin/analytics/timebank/?district=Kadıköy')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['series'][0]['volume'], 2)
+        self.assertEqual(response.data['top_earners'][0]['username'], 'provider')
+        self.assertEqual(response.data['top_spenders'], [])
@@ -0,0 +1,396 @@
+"""
+Unit Tests for the Community Forum
+
+Tests cover:
+- Paginated topic index with SQL-annotated summaries (no nested replies)
+- Topic detail with the first page of replies
+- Cursor-paginated replies on (created_at, id) and minimal reply POST responses
+- Full-text search: ranking, per-topic grouping, escaped highlights, index sync, SQL-side paging
+- Denormalized reply activity on ForumTopic and the active / hot / new orderings
+"""
+
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core import search_utils
+from core.models import ForumTopic, ForumReply
+from core.forum_utils import FORUM_HOT_DECAY_SECONDS, hot_rank
+
+
+class ForumTestMixin:
+    """Shared fixtures: an author, a replier and an authenticated client"""
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.replier = User.objects.create(username='replier')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def _topic(self, title="Garden tools", body="Who can lend a rake?", replies=0):
+        topic = ForumTopic.objects.create(title=title, body=body, author=self.author)
+        for index in range(replies):
+            ForumReply.objects.create(topic=topic, body=f"Reply {index}", author=self.replier)
+        return topic
+
+
+class ForumTopicListTest(ForumTestMixin, TestCase):
+    """Test GET /api/forum/topics/"""
+
+    def test_list_returns_summaries_without_replies(self):
+        """
+        Topics carry reply count, last-reply info and a body excerpt, but no replies
+        """
+        self._topic(body="x" * 1000, replies=2)
+
+        response = self.client.get('/api/forum/topics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        topic = response.data['results'][0]
+        self.assertNotIn('replies', topic)
+        self.assertNotIn('body', topic)
+        self.assertEqual(len(topic['excerpt']), 280)
+        self.assertEqual(topic['reply_count'], 2)
+        self.assertEqual(topic['last_reply_author_username'], 'replier')
+        self.assertIsNotNone(topic['last_reply_at'])
+        self.assertEqual(topic['author_username'], 'author')
+
+    def test_topic_without_replies(self):
+        """
+        A topic nobody answered has zero replies and no last-reply info
+        """
+        self._topic()
+        topic = self.client.get('/api/forum/topics/').data['results'][0]
+        self.assertEqual(topic['reply_count'], 0)
+        self.assertIsNone(topic['last_reply_at'])
+        self.assertIsNone(topic['last_reply_author_username'])
+
+    def test_list_query_count_is_constant(self):
+        """
+        A page costs a count query and one annotated query, however many topics and replies
+        """
+        self._topic(replies=1)
+        with self.assertNumQueries(2):
+            self.client.get('/api/forum/topics/')
+        for index in range(5):
+            self._topic(title=f"Topic {index}", replies=3)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/forum/topics/?page_size=3')
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual([t['title'] for t in response.data['results']], ["Topic 4", "Topic 3", "Topic 2"])
+
+
+class ForumRepliesTest(ForumTestMixin, TestCase):
+    """Test topic detail, cursor-paginated replies and reply posting"""
+
+    def _bodies(self, page):
+        return [reply['body'] for reply in page['results']]
+
+    def test_detail_embeds_first_page(self):
+        """
+        The detail endpoint returns the topic, its reply count and the first page of replies
+        """
+        topic = self._topic(replies=25)
+        with self.assertNumQueries(2):  # topic + author + count, replies + authors
+            response = self.client.get(f'/api/forum/topics/{topic.id}/')
+        self.assertEqual(response.data['reply_count'], 25)
+        self.assertEqual(len(response.data['replies']['results']), 20)
+        self.assertIn(f'/api/forum/topics/{topic.id}/replies/?cursor=', response.data['replies']['next'])
+
+    def test_cursor_walks_the_thread_once(self):
+        """
+        Following next links visits every reply exactly once, oldest first, ties broken by id
+        """
+        topic = self._topic(replies=7)
+        # Identical timestamps must not skip or repeat replies
+        ForumReply.objects.filter(topic=topic).update(created_at=timezone.now() - timedelta(days=1))
+
+        url = f'/api/forum/topics/{topic.id}/replies/?page_size=3'
+        seen = []
+        while url:
+            page = self.client.get(url).data
+            seen.extend(self._bodies(page))
+            url = page['next']
+        self.assertEqual(seen, [f"Reply {i}" for i in range(7)])
+
+    def test_new_replies_do_not_shift_pages(self):
+        """
+        Replies posted after a page was read show up on the next page, not as duplicates
+        """
+        topic = self._topic(replies=3)
+        first = self.client.get(f'/api/forum/topics/{topic.id}/replies/?page_size=2').data
+        ForumReply.objects.create(topic=topic, body="Late reply", author=self.replier)
+        second = self.client.get(first['next']).data
+        self.assertEqual(self._bodies(second), ["Reply 2", "Late reply"])
+        self.assertIsNone(second['next'])
+
+    def test_invalid_cursor_and_unknown_topic(self):
+        """
+        A malformed cursor is a 404 like an unknown topic
+        """
+        topic = self._topic()
+        self.assertEqual(self.client.get(f'/api/forum/topics/{topic.id}/replies/?cursor=nope').status_code, 404)
+        self.assertEqual(self.client.get('/api/forum/topics/999/replies/').status_code, 404)
+
+    def test_reply_post_returns_only_the_reply(self):
+        """
+        Posting returns the created reply and the new count, not the whole thread
+        """
+        topic = self._topic(replies=30)
+        self.client.force_authenticate(self.replier)
+        response = self.client.post(f'/api/forum/topics/{topic.id}/reply/', {'body': "Me too"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.data), {'reply', 'reply_count'})
+        self.assertEqual(response.data['reply']['body'], "Me too")
+        self.assertEqual(response.data['reply']['author_username'], 'replier')
+        self.assertEqual(response.data['reply_count'], 31)
+
+
+class ForumSearchTest(ForumTestMixin, TestCase):
+    """Test GET /api/forum/search/"""
+
+    def _search(self, query, **params):
+        response = self.client.get('/api/forum/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_title_match_outranks_body_match(self):
+        """
+        A word in the title weighs more than the same word in a body
+        """
+        body_hit = self._topic(title="Weekend plans", body="Anyone up for a bicycle ride?")
+        title_hit = self._topic(title="Bicycle repair", body="My chain keeps slipping")
+        self._topic(title="Cooking", body="Sourdough starter swap")
+
+        data = self._search("bicycle")
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([t['id'] for t in data['results']], [title_hit.id, body_hit.id])
+        self.assertGreater(data['results'][0]['score'], data['results'][1]['score'])
+        self.assertEqual(data['results'][0]['title_highlight'], "<mark>Bicycle</mark> repair")
+
+    def test_reply_matches_are_grouped_under_their_topic(self):
+        """
+        Several matching replies yield one topic result with one snippet per reply
+        """
+        topic = self._topic(title="Moving house", body="Need help on Saturday")
+        replies = [
+            ForumReply.objects.create(topic=topic, body=f"I can bring a ladder ({i})", author=self.replier)
+            for i in range(2)
+        ]
+        ForumReply.objects.create(topic=topic, body="Good luck!", author=self.replier)
+
+        data = self._search("ladder")
+        self.assertEqual(data['count'], 1)
+        result = data['results'][0]
+        self.assertEqual(result['id'], topic.id)
+        self.assertEqual(result['matches'], 2)
+        self.assertIsNone(result['title_highlight'])
+        self.assertEqual({r['reply_id'] for r in result['replies']}, {r.id for r in replies})
+        self.assertIn("<mark>ladder</mark>", result['replies'][0]['snippet'])
+
+    def test_snippets_are_html_escaped(self):
+        """
+        User text in snippets is escaped; only the highlight markup is HTML
+        """
+        self._topic(title="<b>Tools</b>", body="<script>alert(1)</script> spare hammer")
+        result = self._search("hammer")['results'][0]
+        self.assertNotIn("<script>", result['snippet'])
+        self.assertIn("&lt;script&gt;", result['snippet'])
+        self.assertIn("<mark>hammer</mark>", result['snippet'])
+
+    def test_index_follows_edits_and_deletes(self):
+        """
+        Edited and deleted posts are reflected immediately
+        """
+        topic = self._topic(title="Piano lessons", body="Looking for a teacher")
+        reply = ForumReply.objects.create(topic=topic, body="Try the violin", author=self.replier)
+        self.assertEqual(self._search("violin")['count'], 1)
+
+        reply.body = "Try the cello"
+        reply.save()
+        self.assertEqual(self._search("violin")['count'], 0)
+        self.assertEqual(self._search("cello")['count'], 1)
+
+        reply.delete()
+        self.assertEqual(self._search("cello")['count'], 0)
+        topic.delete()
+        self.assertEqual(self._search("piano")['count'], 0)
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 triggers are SQLite only")
+    def test_migrations_leave_the_fts_triggers_in_place(self):
+        """
+        After every migration has run, all six FTS triggers exist and an edited topic is found by its new words
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                           [f"{search_utils.FORUM_FTS_TABLE}_%"])
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers, {
+            f"{search_utils.FORUM_FTS_TABLE}_{kind}_{action}"
+            for kind in ("topic", "reply") for action in ("insert", "update", "delete")
+        })
+
+        topic = self._topic(title="Sewing machine", body="Needs a new needle")
+        topic.title = "Embroidery machine"
+        topic.save()
+        self.assertEqual([t['id'] for t in self._search("embroidery")['results']], [topic.id])
+        self.assertEqual(self._search("sewing")['count'], 0)
+
+    def test_query_syntax_is_treated_as_words(self):
+        """
+        Operators and quotes in the query are plain words, never a server error
+        """
+        self._topic(title="Garden tools", body="Who can lend a rake?")
+        self.assertEqual(self._search('"rake* (')['count'], 1)
+        self.assertEqual(self._search('***')['count'], 0)
+
+    def test_pages_are_cut_in_the_database(self):
+        """
+        Each page fetches only its own ranked topics (LIMIT/OFFSET) and counts the rest separately
+        """
+        for i in range(5):
+            self._topic(title=f"Kayak trip {i}", body="Paddles provided")
+
+        first = self._search("kayak", page_size=2)
+        with mock.patch("core.search_utils._fetch", wraps=search_utils._fetch) as fetch:
+            last = self._search("kayak", page_size=2, page=3)
+        self.assertEqual((first['count'], last['count']), (5, 5))
+        self.assertIsNotNone(first['next'])
+        self.assertIsNone(last['next'])
+        self.assertEqual(len(last['results']), 1)
+        ranked = [t['id'] for t in first['results'] + self._search("kayak", page_size=2, page=2)['results']]
+        self.assertNotIn(last['results'][0]['id'], ranked)
+        rank_call = next(call for call in fetch.call_args_list if "LIMIT" in call.args[0])
+        self.assertEqual(rank_call.args[1][-2:], [1, 4])
+
+    def test_missing_query_is_rejected(self):
+        """
+        An empty q is a 400
+        """
+        self.assertEqual(self.client.get('/api/forum/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/forum/search/?q=%20').status_code, 400)
+
+
+class ForumTopicActivityTest(ForumTestMixin, TestCase):
+    """Test the stored reply count, last reply and hot rank of ForumTopic"""
+
+    def _reply(self, topic, body="Reply", age=None):
+        reply = ForumReply.objects.create(topic=topic, body=body, author=self.replier)
+        if age is not None:
+            # Backdate as if the reply had been posted age ago
+            ForumReply.objects.filter(pk=reply.pk).update(created_at=timezone.now() - age)
+            ForumTopic.refresh_activity(topic.pk)
+        return reply
+
+    def _titles(self, sort):
+        response = self.client.get(f'/api/forum/topics/?sort={sort}')
+        return [topic['title'] for topic in response.data['results']]
+
+    def test_replies_maintain_count_and_latest(self):
+        """
+        Creating and deleting replies keeps count, last reply and its author current
+        """
+        topic = self._topic()
+        first = self._reply(topic, "First")
+        latest = self._reply(topic, "Second")
+        topic.refresh_from_db()
+        self.assertEqual(topic.reply_count, 2)
+        self.assertEqual(topic.last_reply_at, latest.created_at)
+        self.assertEqual(topic.last_reply_author, self.replier)
+
+        latest.delete()
+        topic.refresh_from_db()
+        self.assertEqual(topic.reply_count, 1)
+        self.assertEqual(topic.last_reply_at, first.created_at)
+
+        first.delete()
+        topic.refresh_from_db()
+        self.assertEqual(topic.reply_count, 0)
+        self.assertIsNone(topic.last_reply_at)
+        self.assertIsNone(topic.last_reply_author)
+
+    def test_cascades_skip_per_reply_bookkeeping(self):
+        """
+        Deleting a topic does not touch the topic once per reply; deleting a user
+        recomputes each topic they replied to once
+        """
+        doomed = self._topic(title="Doomed", replies=5)
+        with mock.patch.object(ForumTopic, 'release_reply') as release:
+            doomed.delete()
+        release.assert_not_called()
+
+        topics = [self._topic(title=f"Topic {i}") for i in range(2)]
+        for topic in topics:
+            self._reply(topic)
+            self._reply(topic)
+        ForumReply.objects.create(topic=topics[0], body="Stays", author=self.author)
+        with mock.patch.object(ForumTopic, 'release_reply') as release, \
+                mock.patch.object(ForumTopic, 'refresh_activity', wraps=ForumTopic.refresh_activity) as refresh:
+            self.replier.delete()
+        release.assert_not_called()
+        self.assertEqual(refresh.call_count, 2)
+        for topic, count in zip(topics, (1, 0)):
+            topic.refresh_from_db()
+            self.assertEqual(topic.reply_count, count)
+        self.assertEqual(topics[0].last_reply_author, self.author)
+
+    def test_hot_rank_matches_a_full_recompute(self):
+        """
+        The incrementally updated hot rank equals recomputing it from all replies
+        """
+        topic = self._topic()
+        replies = [self._reply(topic, f"Reply {i}") for i in range(3)]
+        replies[1].delete()
+        topic.refresh_from_db()
+        expected = hot_rank([topic.created_at] + [reply.created_at for reply in (replies[0], replies[2])])
+        self.assertAlmostEqual(topic.hot_rank, expected, places=6)
+
+        ForumTopic.refresh_activity(topic.pk)
+        topic.refresh_from_db()
+        self.assertAlmostEqual(topic.hot_rank, expected, places=6)
+
+    def test_saving_a_topic_keeps_concurrent_activity(self):
+        """
+        Editing a stale topic instance does not overwrite replies stored meanwhile
+        """
+        topic = self._topic()
+        self._reply(topic)
+        topic.title = "Renamed"
+        topic.save()
+        topic.refresh_from_db()
+        self.assertEqual(topic.title, "Renamed")
+        self.assertEqual(topic.reply_count, 1)
+
+    def test_active_sort_bumps_answered_topics(self):
+        """
+        The default order is by latest activity: a new reply lifts an older topic
+        """
+        old = self._topic(title="Old")
+        self._topic(title="New")
+        self.assertEqual(self._titles('active'), ["New", "Old"])
+        self._reply(old)
+        self.assertEqual(self._titles('active'), ["Old", "New"])
+        self.assertEqual(self.client.get('/api/forum/topics/').data['results'][0]['title'], "Old")
+        self.assertEqual(self._titles('new'), ["New", "Old"])
+
+    def test_hot_sort_weighs_recent_replies(self):
+        """
+        Many recent replies beat one newer reply; replies a week old have cooled down
+        """
+        busy = self._topic(title="Busy")
+        cold = self._topic(title="Cold")
+        quiet = self._topic(title="Quiet")
+        for _ in range(4):
+            self._reply(busy, age=timedelta(hours=2))
+            self._reply(cold, age=timedelta(days=7))
+        self._reply(quiet)
+        ForumTopic.objects.filter(pk__in=[busy.pk, cold.pk]).update(created_at=timezone.now() - timedelta(days=8))
+        for topic in (busy, cold):
+            ForumTopic.refresh_activity(topic.pk)
+
+        self.assertEqual(self._titles('hot'), ["Busy", "Quiet", "Cold"])
+        self.assertGreater(FORUM_HOT_DECAY_SECONDS, 0)
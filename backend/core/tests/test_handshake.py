@@ -6,10 +6,17 @@ Tests cover:
 - Status transitions (proposed → accepted → in_progress → completed)
 - Confirmation logic (both parties must confirm)
 - Handshake-offer relationship
+- Batched expiry of stale handshakes and posts
 """
 
+import json
+from datetime import timedelta
+from io import StringIO
+
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
 from core.models import Offer, Handshake
 
 
@@ -391,3 +398,64 @@ class MultiParticipantHandshakeTest(TestCase):
         self.assertEqual(h2.status, 'accepted')
 
 
+
+
+class StaleExpiryTest(TestCase):
+    """Test the expire_stale management command"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider', password='pass')
+        self.seeker = User.objects.create_user(username='seeker', password='pass')
+        self.offer = Offer.objects.create(
+            user=self.provider,
+            title="Test Offer",
+            duration=2,
+            available_slots=json.dumps([{"date": "2099-01-01", "time": "10:00"}]),
+        )
+    
+    def _run(self, *args):
+        call_command('expire_stale', *args, stdout=StringIO())
+    
+    def test_old_proposed_handshakes_expire(self):
+        """
+        Proposed handshakes older than the cutoff become 'expired'; newer ones stay
+        """
+        old = Handshake.objects.create(offer=self.offer, seeker=self.seeker, provider=self.provider)
+        Handshake.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+        fresh = Handshake.objects.create(offer=self.offer, seeker=self.seeker, provider=self.provider)
+        
+        self._run('--batch-size', '1')
+        old.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(old.status, 'expired')
+        self.assertEqual(fresh.status, 'proposed')
+    
+    def test_offer_with_only_past_slots_expires(self):
+        """
+        Open offers whose slots are all in the past expire along with their proposals
+        """
+        past_offer = Offer.objects.create(
+            user=self.provider,
+            title="Last year's workshop",
+            duration=1,
+            available_slots=json.dumps(["2020-01-22T22:00:00", "2020-01-24T23:00:00"]),
+        )
+        proposal = Handshake.objects.create(offer=past_offer, seeker=self.seeker, provider=self.provider)
+        
+        self._run()
+        past_offer.refresh_from_db()
+        proposal.refresh_from_db()
+        self.offer.refresh_from_db()
+        self.assertEqual(past_offer.status, 'expired')
+        self.assertEqual(proposal.status, 'expired')
+        self.assertEqual(self.offer.status, 'open')
+    
+    def test_dry_run_changes_nothing(self):
+        """
+        --dry-run only reports counts
+        """
+        self.offer.available_slots = json.dumps(["2020-01-01T10:00:00"])
+        self.offer.save()
+        self._run('--dry-run')
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.status, 'open')
@@ -0,0 +1,565 @@
+"""
+Unit Tests for Private Chat Messages
+
+Tests cover:
+- Server-Sent Events stream of new messages, opened with short-lived tickets
+- In-process message broker, Postgres LISTEN/NOTIFY broker (PostgreSQL only)
+- Delta fetch and batched read receipts
+- WebSocket chat (ticket auth, send/ack, validation, typing indicators)
+- Per-conversation unread counters
+- Single-query inbox conversation list
+- Cached inbox summary
+- Cold archival of completed handshakes' messages
+"""
+
+import asyncio
+import json
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import Offer, Handshake, Message, MessageArchive, Transaction, UnreadCounter
+from core.chat_utils import (
+    STREAM_TICKET_SECONDS, MessageBroker, PostgresNotifyBroker, authenticate_stream_ticket,
+    database_sync_to_async, issue_stream_ticket,
+)
+
+
+class ChatTestMixin:
+    """Shared fixtures: an accepted handshake between provider and seeker"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider', password='pass')
+        self.seeker = User.objects.create_user(username='seeker', password='pass')
+        self.outsider = User.objects.create_user(username='outsider', password='pass')
+        self.offer = Offer.objects.create(user=self.provider, title="Chess lesson", duration="1")
+        self.handshake = Handshake.objects.create(
+            offer=self.offer, provider=self.provider, seeker=self.seeker, status='accepted'
+        )
+
+
+class MessageStreamTest(ChatTestMixin, TestCase):
+    """Test the SSE endpoint"""
+    
+    def _url(self, user, **params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        ticket = issue_stream_ticket(user, self.handshake.id)
+        return f"/api/messages/stream/{self.handshake.id}/?ticket={ticket}&{query}"
+    
+    async def test_stream_sends_messages_after_cursor(self):
+        """
+        The stream replays messages after after_id and then picks up new ones
+        """
+        first = await sync_to_async(Message.objects.create)(
+            handshake=self.handshake, sender=self.seeker, content="Hello"
+        )
+        with mock.patch("core.chat_utils.STREAM_POLL_SECONDS", 0.05):
+            response = await self.async_client.get(self._url(self.provider, after_id=0))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            stream = response.streaming_content
+            
+            self.assertTrue((await anext(stream)).startswith(b"retry:"))
+            frame = (await anext(stream)).decode()
+            self.assertIn(f"id: {first.id}", frame)
+            self.assertIn('"content": "Hello"', frame)
+            
+            await sync_to_async(Message.objects.create)(
+                handshake=self.handshake, sender=self.provider, content="Hi there"
+            )
+            frame = (await anext(stream)).decode()
+            while frame.startswith(":"):
+                frame = (await anext(stream)).decode()
+            self.assertIn('"content": "Hi there"', frame)
+            await stream.aclose()
+    
+    async def test_stream_rejects_non_participants(self):
+        """
+        Only the provider and seeker may open the stream
+        """
+        response = await self.async_client.get(self._url(self.outsider))
+        self.assertEqual(response.status_code, 403)
+    
+    async def test_stream_requires_token(self):
+        """
+        Requests without a valid ticket or JWT are rejected
+        """
+        response = await self.async_client.get(f"/api/messages/stream/{self.handshake.id}/")
+        self.assertEqual(response.status_code, 401)
+        # A JWT in the query string is not accepted
+        token = AccessToken.for_user(self.provider)
+        response = await self.async_client.get(f"/api/messages/stream/{self.handshake.id}/?token={token}")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_ticket_is_short_lived_and_handshake_bound(self):
+        """
+        Tickets expire after STREAM_TICKET_SECONDS and only open the handshake they were issued for
+        """
+        ticket = issue_stream_ticket(self.provider, self.handshake.id)
+        other = await sync_to_async(Handshake.objects.create)(
+            offer=self.offer, provider=self.provider, seeker=self.outsider, status='accepted'
+        )
+        response = await self.async_client.get(f"/api/messages/stream/{other.id}/?ticket={ticket}")
+        self.assertEqual(response.status_code, 401)
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + STREAM_TICKET_SECONDS + 1):
+            response = await self.async_client.get(f"/api/messages/stream/{self.handshake.id}/?ticket={ticket}")
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_endpoint_checks_chat_access(self):
+        """
+        Participants get a ticket for the stream; outsiders are refused one
+        """
+        client = APIClient()
+        url = f"/api/messages/stream/{self.handshake.id}/ticket/"
+        client.force_authenticate(self.outsider)
+        self.assertEqual(client.post(url).status_code, 403)
+        client.force_authenticate(self.seeker)
+        response = client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["expires_in"], STREAM_TICKET_SECONDS)
+        self.assertEqual(authenticate_stream_ticket(response.data["ticket"], self.handshake.id), self.seeker)
+
+
+class MessageBrokerTest(TestCase):
+    """Test the in-process pub/sub"""
+    
+    def test_publish_wakes_subscribers_of_handshake_only(self):
+        """
+        Subscribers receive payloads for their own handshake only
+        """
+        broker = MessageBroker()
+        
+        async def scenario():
+            with broker.subscribe(1) as mine, broker.subscribe(2) as other:
+                broker.publish(1, 42)
+                received = await asyncio.wait_for(mine.get(), timeout=1)
+                return received, other.empty()
+        
+        self.assertEqual(asyncio.run(scenario()), (42, True))
+        self.assertEqual(broker.subscriber_count(1), 0)
+
+    def test_database_calls_close_stale_connections(self):
+        """
+        Socket and stream database helpers drop stale connections around each call, outside atomic blocks
+        """
+        with mock.patch("django.db.close_old_connections") as close_old:
+            self.assertEqual(async_to_sync(database_sync_to_async(lambda: 42))(), 42)
+            self.assertEqual(close_old.call_count, 0)
+            with mock.patch.object(connection, "in_atomic_block", False):
+                async_to_sync(database_sync_to_async(lambda: 42))()
+            self.assertEqual(close_old.call_count, 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "LISTEN/NOTIFY needs PostgreSQL")
+class PostgresNotifyBrokerTest(TransactionTestCase):
+    """Test the LISTEN/NOTIFY broker against the real database"""
+
+    async def test_notify_round_trip(self):
+        """
+        An event published through NOTIFY comes back through the LISTEN thread to local subscribers
+        """
+        broker = PostgresNotifyBroker(channel="chat_events_test")
+        with mock.patch("core.chat_utils.STREAM_POLL_SECONDS", 0.1):
+            try:
+                with broker.subscribe(1) as mine, broker.subscribe(2) as other:
+                    # Events sent before the listener thread has run LISTEN are lost, so keep publishing
+                    for _ in range(50):
+                        await sync_to_async(broker.publish)(1, {"type": "typing", "user_id": 7})
+                        try:
+                            received = await asyncio.wait_for(mine.get(), timeout=0.2)
+                            break
+                        except asyncio.TimeoutError:
+                            continue
+                    else:
+                        self.fail("NOTIFY was never received")
+                    self.assertEqual(received, {"type": "typing", "user_id": 7})
+                    self.assertTrue(other.empty())
+            finally:
+                # Stop listening, or the test database could not be dropped
+                await sync_to_async(broker.close, thread_sensitive=False)()
+
+
+class MessageDeltaAndReadTest(ChatTestMixin, TestCase):
+    """Test ?after_id= delta fetch and bulk read receipts"""
+    
+    def setUp(self):
+        super().setUp()
+        self.messages = [
+            Message.objects.create(handshake=self.handshake, sender=self.seeker, content=f"msg {i}")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+    
+    def test_after_id_returns_only_newer_messages(self):
+        """
+        GET with after_id skips messages the client already has
+        """
+        response = self.client.get(
+            f'/api/messages/?handshake={self.handshake.id}&after_id={self.messages[0].id}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.data], [m.id for m in self.messages[1:]])
+    
+    def test_mark_read_up_to_id(self):
+        """
+        mark-read flips is_read only for the other side's messages up to the id
+        """
+        own = Message.objects.create(handshake=self.handshake, sender=self.provider, content="mine")
+        response = self.client.post('/api/messages/mark-read/', {
+            'handshake': self.handshake.id,
+            'up_to_id': self.messages[1].id,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['marked_read'], 2)
+        self.assertEqual(
+            list(Message.objects.filter(is_read=True).values_list('id', flat=True).order_by('id')),
+            [self.messages[0].id, self.messages[1].id]
+        )
+        own.refresh_from_db()
+        self.assertFalse(own.is_read)
+    
+    def test_mark_read_requires_participant(self):
+        """
+        Outsiders cannot mark messages as read
+        """
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post('/api/messages/mark-read/', {'handshake': self.handshake.id}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class ChatSocketTest(ChatTestMixin, TestCase):
+    """Test the WebSocket chat routed by mysite.asgi"""
+    
+    async def _connect(self, user, credentials=None, **params):
+        from mysite.asgi import application
+        
+        credentials = credentials or f"ticket={issue_stream_ticket(user, self.handshake.id)}"
+        query = "&".join([credentials] + [f"{k}={v}" for k, v in params.items()])
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": f"/ws/chat/{self.handshake.id}/", "query_string": query.encode()}
+        await inbox.put({"type": "websocket.connect"})
+        task = asyncio.ensure_future(application(scope, inbox.get, outbox.put))
+        return inbox, outbox, task
+    
+    async def _frame(self, outbox):
+        event = await asyncio.wait_for(outbox.get(), timeout=2)
+        self.assertEqual(event["type"], "websocket.send")
+        return json.loads(event["text"])
+    
+    async def _close(self, inbox, task):
+        await inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(task, timeout=2)
+    
+    async def test_rejects_non_participants(self):
+        """
+        Outsiders are refused before the socket is accepted
+        """
+        inbox, outbox, task = await self._connect(self.outsider)
+        self.assertEqual(await asyncio.wait_for(outbox.get(), timeout=2), {"type": "websocket.close", "code": 4403})
+        await asyncio.wait_for(task, timeout=2)
+    
+    async def test_requires_a_stream_ticket(self):
+        """
+        The socket opens with a stream ticket only: a JWT in the URL is refused
+        """
+        inbox, outbox, task = await self._connect(
+            self.seeker, credentials=f"token={AccessToken.for_user(self.seeker)}"
+        )
+        self.assertEqual(await asyncio.wait_for(outbox.get(), timeout=2), {"type": "websocket.close", "code": 4401})
+        await asyncio.wait_for(task, timeout=2)
+    
+    async def test_send_is_acked_and_delivered(self):
+        """
+        A sent message is saved, acknowledged with its client_id and pushed as a message frame
+        """
+        with mock.patch("core.chat_utils.STREAM_POLL_SECONDS", 0.05):
+            inbox, outbox, task = await self._connect(self.seeker, after_id=0)
+            self.assertEqual((await asyncio.wait_for(outbox.get(), timeout=2))["type"], "websocket.accept")
+            
+            await inbox.put({"type": "websocket.receive", "text": json.dumps(
+                {"type": "send", "content": "Hello", "client_id": "c1"}
+            )})
+            ack = await self._frame(outbox)
+            self.assertEqual((ack["type"], ack["client_id"]), ("ack", "c1"))
+            self.assertEqual(ack["message"]["sender"], self.seeker.id)
+            delivered = await self._frame(outbox)
+            self.assertEqual((delivered["type"], delivered["message"]["id"]), ("message", ack["message"]["id"]))
+            await self._close(inbox, task)
+        
+        saved = await sync_to_async(Message.objects.get)(pk=ack["message"]["id"])
+        self.assertEqual(saved.content, "Hello")
+    
+    async def test_invalid_send_returns_error(self):
+        """
+        Messages go through the same validation as POST /api/messages/
+        """
+        with mock.patch("core.chat_utils.STREAM_POLL_SECONDS", 0.05):
+            inbox, outbox, task = await self._connect(self.seeker)
+            await outbox.get()
+            await inbox.put({"type": "websocket.receive", "text": json.dumps({"type": "send", "content": ""})})
+            error = await self._frame(outbox)
+            self.assertEqual(error["type"], "error")
+            self.assertIn("content", error["error"])
+            await self._close(inbox, task)
+        self.assertFalse(await sync_to_async(Message.objects.exists)())
+    
+    async def test_typing_reaches_other_participant(self):
+        """
+        Typing indicators are forwarded to the other participant only
+        """
+        with mock.patch("core.chat_utils.STREAM_POLL_SECONDS", 0.05):
+            provider_in, provider_out, provider_task = await self._connect(self.provider)
+            seeker_in, seeker_out, seeker_task = await self._connect(self.seeker)
+            await provider_out.get()
+            await seeker_out.get()
+            
+            await seeker_in.put({"type": "websocket.receive", "text": json.dumps({"type": "typing"})})
+            self.assertEqual(await self._frame(provider_out), {"type": "typing", "user_id": self.seeker.id})
+            await asyncio.sleep(0.1)
+            self.assertTrue(seeker_out.empty())
+            
+            await self._close(provider_in, provider_task)
+            await self._close(seeker_in, seeker_task)
+
+
+class UnreadCounterTest(ChatTestMixin, TestCase):
+    """Test the denormalized per-conversation unread counters"""
+    
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+    
+    def _counter(self, user):
+        return UnreadCounter.objects.get(user=user, handshake=self.handshake)
+    
+    def test_insert_increments_recipient_only(self):
+        """
+        New messages count as unread for the recipient; both sides track the latest message
+        """
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="one")
+        last = Message.objects.create(handshake=self.handshake, sender=self.seeker, content="two")
+        self.assertEqual(self._counter(self.provider).count, 2)
+        self.assertEqual(self._counter(self.seeker).count, 0)
+        self.assertEqual(self._counter(self.seeker).last_message_id, last.id)
+    
+    def test_mark_read_resets_counter(self):
+        """
+        Reading messages subtracts them from the counter
+        """
+        first = Message.objects.create(handshake=self.handshake, sender=self.seeker, content="one")
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="two")
+        self.client.post('/api/messages/mark-read/', {'handshake': self.handshake.id, 'up_to_id': first.id}, format='json')
+        self.assertEqual(self._counter(self.provider).count, 1)
+        self.client.post('/api/messages/mark-read/', {'handshake': self.handshake.id}, format='json')
+        self.assertEqual(self._counter(self.provider).count, 0)
+    
+    def test_unread_count_endpoint(self):
+        """
+        The inbox badge sums the counters with a single query
+        """
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="one")
+        Message.objects.create(handshake=self.handshake, sender=self.provider, content="mine")
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/inbox/unread-count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unread_count'], 1)
+    
+    def test_conversations_read_counts_from_counters(self):
+        """
+        Conversation list reports the counter value and unread messages are listed
+        """
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="one")
+        response = self.client.get('/api/inbox/conversations/')
+        self.assertEqual(response.data['results'][0]['unread_count'], 1)
+        response = self.client.get('/api/inbox/unread-messages/')
+        self.assertEqual([m['content'] for m in response.data], ["one"])
+
+
+class InboxConversationsTest(ChatTestMixin, TestCase):
+    """Test the single-query conversation list"""
+    
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+    
+    def _conversation_with(self, username, content):
+        seeker = User.objects.create_user(username=username, password='pass')
+        handshake = Handshake.objects.create(
+            offer=self.offer, provider=self.provider, seeker=seeker, status='accepted'
+        )
+        Message.objects.create(handshake=handshake, sender=seeker, content=content)
+        return handshake
+    
+    def test_ordered_by_latest_message(self):
+        """
+        Conversations are sorted newest first with latest message, unread and total counts
+        """
+        Message.objects.create(handshake=self.handshake, sender=self.provider, content="old")
+        self._conversation_with('alice', 'middle')
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="newest")
+        
+        response = self.client.get('/api/inbox/conversations/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        first, second = response.data['results']
+        self.assertEqual(first['handshake']['id'], self.handshake.id)
+        self.assertEqual(first['other_username'], 'seeker')
+        self.assertEqual(first['latest_message']['content'], 'newest')
+        self.assertEqual(first['latest_message']['sender_username'], 'seeker')
+        self.assertEqual((first['unread_count'], first['total_messages']), (1, 2))
+        self.assertEqual(second['other_username'], 'alice')
+    
+    def test_query_count_is_constant(self):
+        """
+        The page costs the same number of queries regardless of how many conversations it holds
+        """
+        self._conversation_with('alice', 'hi')
+        with self.assertNumQueries(2):
+            self.client.get('/api/inbox/conversations/')
+        for index in range(5):
+            self._conversation_with(f'user{index}', 'hi')
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/inbox/conversations/')
+        self.assertEqual(len(response.data['results']), 6)
+    
+    def test_excludes_handshakes_without_messages(self):
+        """
+        Handshakes with no messages are not listed
+        """
+        response = self.client.get('/api/inbox/conversations/')
+        self.assertEqual(response.data['count'], 0)
+
+
+class InboxSummaryTest(ChatTestMixin, TestCase):
+    """Test the cached combined inbox summary"""
+    
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+    
+    def test_summary_sections(self):
+        """
+        Summary returns counts and first pages of pending handshakes, unread messages and conversations
+        """
+        other = User.objects.create_user(username='alice', password='pass')
+        Handshake.objects.create(offer=self.offer, provider=self.provider, seeker=other, status='proposed')
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="hi")
+        
+        response = self.client.get('/api/inbox/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pending_handshakes']['count'], 1)
+        self.assertEqual(response.data['pending_handshakes']['results'][0]['seeker_username'], 'alice')
+        self.assertEqual(response.data['unread_messages']['count'], 1)
+        self.assertEqual(response.data['unread_messages']['results'][0]['content'], 'hi')
+        self.assertEqual(response.data['conversations']['count'], 1)
+        self.assertEqual(response.data['conversations']['results'][0]['other_username'], 'seeker')
+    
+    def test_summary_is_cached_until_a_message_arrives(self):
+        """
+        Repeat requests hit the cache; a new message invalidates it for the participants
+        """
+        self.client.get('/api/inbox/summary/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/inbox/summary/')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(handshake=self.handshake, sender=self.seeker, content="new")
+        response = self.client.get('/api/inbox/summary/')
+        self.assertEqual(response.data['unread_messages']['count'], 1)
+    
+    def test_only_new_messages_invalidate(self):
+        """
+        Inserting a message invalidates without loading its handshake; saving an existing one does not invalidate
+        """
+        message = Message.objects.create(handshake_id=self.handshake.id, sender=self.seeker, content="first")
+        with mock.patch("core.inbox_utils.invalidate_inbox_summary") as invalidate:
+            with CaptureQueriesContext(connection) as queries:
+                Message.objects.create(handshake_id=self.handshake.id, sender=self.seeker, content="second")
+            invalidate.assert_called_once_with(self.provider.id, self.seeker.id)
+            # The handshake is read once, shared with the unread counter update
+            self.assertEqual(sum('FROM "core_handshake"' in q["sql"] for q in queries.captured_queries), 1)
+            
+            invalidate.reset_mock()
+            message.is_read = True
+            message.save()
+            invalidate.assert_not_called()
+    
+    def test_reading_messages_invalidates_summary(self):
+        """
+        Bulk read receipts clear the reader's cached unread count
+        """
+        Message.objects.create(handshake=self.handshake, sender=self.seeker, content="new")
+        self.assertEqual(self.client.get('/api/inbox/summary/').data['unread_messages']['count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/messages/mark-read/', {'handshake': self.handshake.id}, format='json')
+        self.assertEqual(self.client.get('/api/inbox/summary/').data['unread_messages']['count'], 0)
+
+
+class MessageArchiveTest(ChatTestMixin, TestCase):
+    """Test cold archival of completed handshakes' messages"""
+    
+    def setUp(self):
+        super().setUp()
+        self.handshake.status = 'completed'
+        self.handshake.save()
+        Transaction.objects.create(handshake=self.handshake, sender=self.seeker, receiver=self.provider, amount=1)
+        self.messages = [
+            Message.objects.create(handshake=self.handshake, sender=sender, content=f"msg {index}")
+            for index, sender in enumerate([self.seeker, self.provider, self.seeker])
+        ]
+        old = timezone.now() - timedelta(days=200)
+        Message.objects.update(created_at=old)
+        Transaction.objects.update(created_at=old)
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+    
+    def test_archives_all_but_latest_message(self):
+        """
+        Old messages move into one compressed archive row; the latest stays hot
+        """
+        call_command('archive_messages', '--days', '180', stdout=StringIO())
+        archive = MessageArchive.objects.get(handshake=self.handshake)
+        self.assertEqual(archive.message_count, 2)
+        self.assertEqual(archive.last_message_id, self.messages[1].id)
+        self.assertEqual(list(Message.objects.values_list('id', flat=True)), [self.messages[2].id])
+        self.assertEqual(UnreadCounter.objects.get(user=self.provider).count, 1)
+        self.assertEqual(UnreadCounter.objects.get(user=self.seeker).count, 0)
+    
+    def test_messages_list_hydrates_from_archive(self):
+        """
+        The message list returns archived and hot messages in order, and after_id skips the archive
+        """
+        before = self.client.get(f'/api/messages/?handshake={self.handshake.id}').data
+        call_command('archive_messages', stdout=StringIO())
+        
+        response = self.client.get(f'/api/messages/?handshake={self.handshake.id}')
+        self.assertEqual([dict(m) for m in response.data], [dict(m) for m in before])
+        response = self.client.get(f'/api/messages/?handshake={self.handshake.id}&after_id={self.messages[0].id}')
+        self.assertEqual([m['id'] for m in response.data], [self.messages[1].id, self.messages[2].id])
+        conversation = self.client.get('/api/inbox/conversations/').data['results'][0]
+        self.assertEqual(conversation['total_messages'], 3)
+    
+    def test_recent_and_dry_run_are_left_alone(self):
+        """
+        Recently completed handshakes are not archived, and --dry-run changes nothing
+        """
+        call_command('archive_messages', '--dry-run', stdout=StringIO())
+        call_command('archive_messages', '--days', '365', stdout=StringIO())
+        self.assertEqual(Message.objects.count(), 3)
+        self.assertFalse(MessageArchive.objects.exists())
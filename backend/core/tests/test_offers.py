@@ -6,12 +6,16 @@ Tests cover:
 - Offer ownership
 - Offer status management
 - Tags and metadata
+- Denormalized participant counters and accepting a handshake only once
 """
 
 from django.test import TestCase
 from django.contrib.auth.models import User
-from core.models import Offer
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from core.models import Offer, Handshake
 from datetime import date, timedelta
+from io import StringIO
 
 
 class OfferCreationTest(TestCase):
@@ -235,3 +239,116 @@ class OfferQueryTest(TestCase):
         self.assertEqual(open_offers.first().title, "Open Offer")
 
 
+
+
+class OfferParticipantCounterTest(TestCase):
+    """Test the denormalized accepted_count / completed_count columns"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='host', password='pass')
+        self.seeker1 = User.objects.create_user(username='guest1', password='pass')
+        self.seeker2 = User.objects.create_user(username='guest2', password='pass')
+        self.offer = Offer.objects.create(
+            user=self.provider,
+            title="Group Workshop",
+            duration=2,
+            max_participants=2,
+            latitude=40.0,
+            longitude=29.0
+        )
+    
+    def _handshake(self, seeker, status='proposed'):
+        return Handshake.objects.create(
+            offer=self.offer,
+            seeker=seeker,
+            provider=self.provider,
+            hours=2,
+            status=status
+        )
+    
+    def test_counters_follow_status_transitions(self):
+        """
+        accepted_count and completed_count track handshake status changes
+        """
+        handshake = self._handshake(self.seeker1)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 0)
+        
+        handshake.status = 'accepted'
+        handshake.save()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 1)
+        self.assertEqual(self.offer.get_remaining_slots(), 1)
+        
+        handshake.status = 'completed'
+        handshake.save()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 1)
+        self.assertEqual(self.offer.completed_count, 1)
+    
+    def test_decline_and_delete_release_slots(self):
+        """
+        Declining or deleting an accepted handshake frees its slot
+        """
+        first = self._handshake(self.seeker1, status='accepted')
+        second = self._handshake(self.seeker2, status='accepted')
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 2)
+        
+        first.status = 'declined'
+        first.save()
+        second.delete()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 0)
+    
+    def test_offer_save_does_not_clobber_counters(self):
+        """
+        Saving a stale Offer instance must not overwrite counter columns
+        """
+        stale_offer = Offer.objects.get(pk=self.offer.pk)
+        self._handshake(self.seeker1, status='accepted')
+        
+        stale_offer.title = "Renamed Workshop"
+        stale_offer.save()
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.title, "Renamed Workshop")
+        self.assertEqual(self.offer.accepted_count, 1)
+    
+    def test_accepting_twice_counts_once(self):
+        """
+        A second accept of the same handshake is rejected and does not take another slot
+        """
+        handshake = self._handshake(self.seeker1)
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        url = f'/api/handshakes/{handshake.id}/accept/'
+        self.assertEqual(client.patch(url).status_code, 200)
+        self.assertEqual(client.patch(url).status_code, 400)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 1)
+    
+    def test_completed_handshake_cannot_be_accepted(self):
+        """
+        Accepting a completed handshake is rejected and leaves status and counters alone
+        """
+        handshake = self._handshake(self.seeker1, status='completed')
+        client = APIClient()
+        client.force_authenticate(self.provider)
+        response = client.patch(f'/api/handshakes/{handshake.id}/accept/')
+        self.assertEqual(response.status_code, 400)
+        handshake.refresh_from_db()
+        self.offer.refresh_from_db()
+        self.assertEqual(handshake.status, 'completed')
+        self.assertEqual((self.offer.accepted_count, self.offer.completed_count), (1, 1))
+    
+    def test_repair_command_fixes_drift(self):
+        """
+        repair_offer_counters recomputes counters from the handshake table
+        """
+        self._handshake(self.seeker1, status='completed')
+        Offer.objects.filter(pk=self.offer.pk).update(accepted_count=5, completed_count=0)
+        
+        call_command('repair_offer_counters', stdout=StringIO())
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.accepted_count, 1)
+        self.assertEqual(self.offer.completed_count, 1)
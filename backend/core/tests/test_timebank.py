@@ -6,11 +6,19 @@ Tests cover:
 - Balance changes during service exchange
 - Transaction recording
 - Balance validation
+- Paginated history with running balances
+- Streaming ledger export (async iterator under ASGI)
 """
 
+import json
+from io import StringIO
+
 from django.test import TestCase
 from django.contrib.auth.models import User
-from core.models import UserProfile, Offer, Handshake, Transaction
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import UserProfile, Offer, Handshake, Transaction, Request as RequestModel
 from decimal import Decimal
 
 
@@ -332,3 +340,121 @@ class TimeBankEdgeCasesTest(TestCase):
         self.assertEqual(profile.timebank_balance, 0)
 
 
+
+
+class TransactionHistoryTest(TestCase):
+    """Test the paginated history endpoint with running balances"""
+    
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass')
+        self.bob = User.objects.create_user(username='bob', password='pass')
+        self.request = RequestModel.objects.create(
+            user=self.bob, title="Paint my fence", description="", duration="2"
+        )
+        handshake = Handshake.objects.create(
+            request=self.request, provider=self.alice, seeker=self.bob, hours=2, status='completed'
+        )
+        # alice: +2, -1, +3 → ledger net +4
+        Transaction.objects.create(handshake=handshake, sender=self.bob, receiver=self.alice, amount=2)
+        Transaction.objects.create(handshake=handshake, sender=self.alice, receiver=self.bob, amount=1)
+        Transaction.objects.create(handshake=handshake, sender=self.bob, receiver=self.alice, amount=3)
+        profile = self.alice.profile
+        profile.timebank_balance = 7
+        profile.save()
+        
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+    
+    def test_running_balance_per_row(self):
+        """
+        balance_after walks back from the current balance, newest row first
+        """
+        response = self.client.get('/api/timebank/history/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['balance'], 7)
+        self.assertEqual(response.data['count'], 3)
+        rows = response.data['results']
+        self.assertEqual([row['balance_after'] for row in rows], [7, 4, 5])
+        self.assertEqual([row['transaction_type'] for row in rows], ['earned', 'spent', 'earned'])
+        self.assertEqual(rows[0]['related_post_title'], "Paint my fence")
+    
+    def test_direction_filter_keeps_full_ledger_balance(self):
+        """
+        Filtering to spent rows must not change the balance shown on them
+        """
+        response = self.client.get('/api/timebank/history/?direction=spent')
+        rows = response.data['results']
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], 1)
+        self.assertEqual(rows[0]['balance_after'], 4)
+    
+    def test_pagination(self):
+        """
+        page_size limits the rows returned per page
+        """
+        response = self.client.get('/api/timebank/history/?page_size=2&page=2')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([row['balance_after'] for row in response.data['results']], [5])
+
+
+class TransactionExportTest(TestCase):
+    """Test the streaming ledger export endpoint and command"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(username='auditor', password='pass', is_staff=True)
+        self.alice = User.objects.create_user(username='alice', password='pass')
+        self.bob = User.objects.create_user(username='bob', password='pass')
+        offer = Offer.objects.create(user=self.alice, title="Guitar lesson", description="", duration="1")
+        handshake = Handshake.objects.create(
+            offer=offer, provider=self.alice, seeker=self.bob, hours=1, status='completed'
+        )
+        Transaction.objects.create(handshake=handshake, sender=self.bob, receiver=self.alice, amount=1)
+        self.client = APIClient()
+    
+    def test_admin_can_stream_csv(self):
+        """
+        Admins receive a streamed CSV with a header row and joined post titles
+        """
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/admin/transactions/export/?output=csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("id,created_at"))
+        self.assertIn("Guitar lesson", lines[1])
+    
+    async def test_asgi_streams_an_async_iterator(self):
+        """
+        Under ASGI the export is an async iterator, so Django streams it instead of buffering it
+        """
+        token = AccessToken.for_user(self.admin)
+        response = await self.async_client.get(
+            '/api/admin/transactions/export/?output=jsonl', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)["post_title"] for line in lines], ["Guitar lesson"])
+
+    def test_non_admin_is_forbidden(self):
+        """
+        Regular users cannot export the ledger
+        """
+        self.client.force_authenticate(self.alice)
+        response = self.client.get('/api/admin/transactions/export/')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_command_writes_jsonl_filtered_by_user(self):
+        """
+        export_transactions emits one JSON object per line for the selected user
+        """
+        output = StringIO()
+        call_command('export_transactions', '--format', 'jsonl', '--user', str(self.admin.id), stdout=output)
+        self.assertEqual(output.getvalue(), "")
+        
+        output = StringIO()
+        call_command('export_transactions', '--format', 'jsonl', '--user', str(self.bob.id), stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["sender_username"], "bob")
@@ -5,11 +5,44 @@ Tests cover:
 - Automatic profile creation when a user is created
 - Initial timebank balance (20 beellars for new users)
 - Profile field defaults and updates
+- Denormalized rating aggregates and their rebuild command
+- Public profile with bounded ratings and histogram top tags
+- Searchable, paginated profile directory
+- Event-driven badge awarding and the award_badges backfill
+- Stored, recency-decayed reputation score and reputation sorting
+- Profile picture thumbnail pipeline
+- Content-addressed media storage, immutable media URLs and gc_media
+- Email outbox: queued in the request, delivered by send_outbox with retries
+- JWT authentication loading user + profile in one query, with optional caching
 """
 
-from django.test import TestCase
+import math
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
-from core.models import UserProfile
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import ProfileJWTAuthentication, is_admin
+from core.email_utils import (
+    OUTBOX_LEASE_SECONDS, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE_SECONDS, deliver_outbox, queue_email,
+)
+from core.reputation_utils import REPUTATION_DECAY_SECONDS, reputation_rank
+from core.models import UserProfile, Offer, Request, Handshake, Transaction, Rating, Badge, BadgeCounter, OutgoingEmail
 
 
 class UserProfileCreationTest(TestCase):
@@ -119,3 +152,709 @@ class UserProfileRatingsTest(TestCase):
         self.assertEqual(profile.user.username, 'propertytest')
 
 
+class RatingAggregatesTest(TestCase):
+    """Test rating_sum / rating_count / rating_tag_counts maintenance"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider', password='pass')
+        self.offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        self.raters = [User.objects.create_user(username=f'rater{i}', password='pass') for i in range(2)]
+        self.handshakes = [
+            Handshake.objects.create(offer=self.offer, provider=self.provider, seeker=rater, status='completed')
+            for rater in self.raters
+        ]
+    
+    def _rate(self, index, score, tags):
+        return Rating.objects.create(
+            handshake=self.handshakes[index], rater=self.raters[index], ratee=self.provider,
+            score=score, tags=tags
+        )
+    
+    def test_create_and_delete_update_aggregates(self):
+        """
+        Creating ratings adds to the stored aggregates; deleting one removes it again
+        """
+        self._rate(0, 8, ["Friendly", "On Time"])
+        second = self._rate(1, 5, ["Friendly"])
+        
+        profile = UserProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_sum, profile.rating_count), (13, 2))
+        self.assertEqual(profile.average_rating, 6.5)
+        self.assertEqual(profile.rating_tag_counts, {"Friendly": 2, "On Time": 1})
+        
+        second.delete()
+        profile.refresh_from_db()
+        self.assertEqual(profile.total_ratings, 1)
+        self.assertEqual(profile.rating_tag_counts, {"Friendly": 1, "On Time": 1})
+    
+    def test_editing_a_rating_moves_its_contribution(self):
+        """
+        Changing a saved rating's score and tags replaces its old contribution
+        """
+        rating = self._rate(0, 8, ["Friendly"])
+        rating = Rating.objects.get(pk=rating.pk)
+        rating.score = 4
+        rating.tags = ["Reliable"]
+        rating.save()
+        profile = UserProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_sum, profile.rating_count), (4, 1))
+        self.assertEqual(profile.rating_tag_counts, {"Reliable": 1})
+    
+    def test_stale_profile_save_keeps_aggregates(self):
+        """
+        Saving a profile loaded before a rating does not overwrite the aggregates
+        """
+        stale = UserProfile.objects.get(user=self.provider)
+        self._rate(0, 9, [])
+        stale.bio = "Updated"
+        stale.save()
+        self.assertEqual(UserProfile.objects.get(user=self.provider).rating_count, 1)
+    
+    def test_rebuild_command_repairs_drift(self):
+        """
+        rebuild_rating_aggregates recomputes drifted profiles from the Rating table
+        """
+        self._rate(0, 7, ["Efficient"])
+        UserProfile.objects.filter(user=self.provider).update(rating_sum=0, rating_count=5, rating_tag_counts={})
+        
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', stdout=out)
+        self.assertIn('Rebuilt 1 profile(s)', out.getvalue())
+        profile = UserProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_sum, profile.rating_count), (7, 1))
+        self.assertEqual(profile.rating_tag_counts, {"Efficient": 1})
+    
+    def test_profile_list_is_a_single_query(self):
+        """
+        The profile list no longer queries ratings per profile
+        """
+        self._rate(0, 8, [])
+        with self.assertNumQueries(2):  # page count + page
+            response = APIClient().get('/api/profiles/?page_size=50')
+        self.assertEqual(response.status_code, 200)
+        rated = next(p for p in response.data['results'] if p['username'] == 'provider')
+        self.assertEqual((rated['average_rating'], rated['total_ratings']), (8.0, 1))
+
+
+class PublicProfileRatingsTest(TestCase):
+    """Test the bounded ratings section of the public profile"""
+    
+    def setUp(self):
+        self.provider = User.objects.create_user(username='provider', password='pass')
+        self.viewer = User.objects.create_user(username='viewer', password='pass')
+        offer = Offer.objects.create(user=self.provider, title="Cooking class", duration="1")
+        tags = [["Friendly", "On Time"], ["Friendly"], ["Reliable", "On Time"], ["Friendly"]]
+        for index, rating_tags in enumerate(tags):
+            rater = User.objects.create(username=f'rater{index}')
+            handshake = Handshake.objects.create(offer=offer, provider=self.provider, seeker=rater, status='completed')
+            Rating.objects.create(handshake=handshake, rater=rater, ratee=self.provider, score=index + 5, tags=rating_tags)
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+    
+    def test_ratings_are_bounded_and_top_tags_come_from_histogram(self):
+        """
+        Only the newest page of ratings is embedded; top tags use the stored histogram
+        """
+        with mock.patch('core.pagination.StandardPagination.page_size', 2):
+            with self.assertNumQueries(3):  # profile+user, badges, ratings+raters
+                response = self.client.get(f'/api/users/{self.provider.id}/public/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['rater_username'] for r in response.data['ratings']], ['rater3', 'rater2'])
+        self.assertEqual(response.data['total_ratings'], 4)
+        self.assertEqual(response.data['top_tags'], ['Friendly', 'On Time', 'Reliable'])
+    
+    def test_ratings_by_user_is_paginated(self):
+        """
+        Older ratings are served page by page
+        """
+        response = self.client.get(f'/api/ratings/user/{self.provider.id}/?page_size=3&page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual([r['rater_username'] for r in response.data['results']], ['rater0'])
+
+
+class ProfileDirectoryTest(TestCase):
+    """Test search, pagination and caching of GET /api/profiles/"""
+    
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create(username='alice')
+        UserProfile.objects.filter(user=self.alice).update(skills="Piano, Guitar", district="Kadikoy")
+        self.bob = User.objects.create(username='bob')
+        UserProfile.objects.filter(user=self.bob).update(interests="guitar repair", district="Besiktas")
+        hidden = User.objects.create(username='hidden')
+        UserProfile.objects.filter(user=hidden).update(skills="Guitar", is_visible=False)
+        self.client = APIClient()
+    
+    def _usernames(self, response):
+        return [profile['username'] for profile in response.data['results']]
+    
+    def test_search_matches_username_skills_and_interests(self):
+        """
+        search is case-insensitive over username, skills and interests, and skips hidden profiles
+        """
+        self.assertEqual(self._usernames(self.client.get('/api/profiles/?search=guitar')), ['alice', 'bob'])
+        self.assertEqual(self._usernames(self.client.get('/api/profiles/?search=BO')), ['bob'])
+    
+    def test_district_filter_and_pagination(self):
+        """
+        district is an exact filter and results are paginated
+        """
+        self.assertEqual(self._usernames(self.client.get('/api/profiles/?district=Kadikoy')), ['alice'])
+        response = self.client.get('/api/profiles/?page_size=1&page=2')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(self._usernames(response), ['bob'])
+    
+    def test_anonymous_first_page_is_cached(self):
+        """
+        The anonymous landing page is served from cache; authenticated views are not
+        """
+        self.client.get('/api/profiles/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/profiles/')
+        self.assertEqual(self._usernames(response), ['alice', 'bob'])
+        
+        self.client.force_authenticate(self.alice)
+        with self.assertNumQueries(2):
+            self.client.get('/api/profiles/')
+    
+    def test_admin_only_fields_resolved_per_viewer(self):
+        """
+        Admin-only fields are filled for staff viewers and hidden from everyone else
+        """
+        response = self.client.get('/api/profiles/?search=alice')
+        self.assertIsNone(response.data['results'][0]['is_admin'])
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.get('/api/profiles/?search=alice')
+        self.assertIs(response.data['results'][0]['is_admin'], False)
+
+
+class BadgeAwardingTest(TestCase):
+    """Test the badge rules engine (core.badge_utils) and its backfill command"""
+    
+    def setUp(self):
+        self.provider = User.objects.create(username='provider')
+        self.seeker = User.objects.create(username='seeker')
+    
+    def _badges(self, user):
+        return set(Badge.objects.filter(user=user).values_list('badge_type', flat=True))
+    
+    def _complete_exchanges(self, count, amount=1):
+        for _ in range(count):
+            handshake = Handshake.objects.create(
+                offer=self.offer, provider=self.provider, seeker=self.seeker, status='completed'
+            )
+            Transaction.objects.create(handshake=handshake, sender=self.seeker, receiver=self.provider, amount=amount)
+    
+    def test_first_post_awarded_once(self):
+        """
+        Publishing a first post awards first_post; later posts do not duplicate it
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        with self.captureOnCommitCallbacks(execute=True):
+            Request.objects.create(user=self.provider, title="Need a ride", duration="1")
+        
+        self.assertEqual(Badge.objects.filter(user=self.provider, badge_type='first_post').count(), 1)
+        self.assertEqual(BadgeCounter.objects.get(user=self.provider).posts_created, 2)
+    
+    def test_first_handshake_awarded_on_acceptance(self):
+        """
+        A proposed handshake earns nothing; accepting it awards both participants
+        """
+        offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        with self.captureOnCommitCallbacks(execute=True):
+            handshake = Handshake.objects.create(offer=offer, provider=self.provider, seeker=self.seeker)
+        self.assertNotIn('first_handshake', self._badges(self.seeker))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            handshake.status = 'accepted'
+            handshake.save()
+            handshake.status = 'completed'
+            handshake.save()
+        self.assertIn('first_handshake', self._badges(self.provider))
+        self.assertIn('first_handshake', self._badges(self.seeker))
+        self.assertEqual(BadgeCounter.objects.get(user=self.seeker).handshakes_accepted, 1)
+    
+    def test_transaction_badges_follow_counters(self):
+        """
+        helper and timebank_master go to the provider once their thresholds are reached
+        """
+        self.offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        with self.captureOnCommitCallbacks(execute=True):
+            self._complete_exchanges(4, amount=5)
+        self.assertEqual(self._badges(self.provider) & {'helper', 'timebank_master'}, {'timebank_master'})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._complete_exchanges(1)
+        self.assertIn('helper', self._badges(self.provider))
+        self.assertNotIn('helper', self._badges(self.seeker))
+        counter = BadgeCounter.objects.get(user=self.seeker)
+        self.assertEqual((counter.exchanges_completed, counter.services_provided), (5, 0))
+    
+    def test_rated_highly_uses_profile_aggregates(self):
+        """
+        rated_highly needs five ratings averaging at least 8
+        """
+        offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        for index, score in enumerate([10, 9, 8, 7, 5]):
+            rater = User.objects.create(username=f'rater{index}')
+            handshake = Handshake.objects.create(offer=offer, provider=self.provider, seeker=rater, status='completed')
+            with self.captureOnCommitCallbacks(execute=True):
+                rating = Rating.objects.create(handshake=handshake, rater=rater, ratee=self.provider, score=score)
+        self.assertNotIn('rated_highly', self._badges(self.provider))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.score = 10
+            rating.save()
+        self.assertIn('rated_highly', self._badges(self.provider))
+    
+    def test_backfill_rebuilds_counters_and_awards_in_bulk(self):
+        """
+        award_badges recomputes counters from the source tables and is idempotent
+        """
+        self.offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        self._complete_exchanges(5)
+        # Simulate data that predates the engine
+        Badge.objects.all().delete()
+        BadgeCounter.objects.all().delete()
+        
+        call_command('award_badges', '--dry-run', stdout=StringIO())
+        self.assertFalse(Badge.objects.exists())
+        self.assertFalse(BadgeCounter.objects.exists())
+        
+        out = StringIO()
+        call_command('award_badges', stdout=out)
+        self.assertEqual(self._badges(self.provider), {'first_post', 'first_handshake', 'helper'})
+        self.assertEqual(self._badges(self.seeker), {'first_handshake'})
+        counter = BadgeCounter.objects.get(user=self.provider)
+        self.assertEqual((counter.posts_created, counter.handshakes_accepted, counter.hours_earned), (1, 5, 5))
+        self.assertIn('Awarded 4 badge(s)', out.getvalue())
+        
+        out = StringIO()
+        call_command('award_badges', stdout=out)
+        self.assertIn('Awarded 0 badge(s)', out.getvalue())
+
+
+class ReputationScoreTest(TestCase):
+    """Test incremental maintenance of UserProfile.reputation_score / reputation_rank"""
+    
+    def setUp(self):
+        self.provider = User.objects.create(username='provider')
+        self.seeker = User.objects.create(username='seeker')
+        self.offer = Offer.objects.create(user=self.provider, title="Guitar lesson", duration="1")
+        self.handshake = Handshake.objects.create(
+            offer=self.offer, provider=self.provider, seeker=self.seeker, status='completed'
+        )
+    
+    def test_rating_updates_bayesian_score(self):
+        """
+        One 10/10 rating is smoothed towards the prior (5 virtual 7s): (35 + 10) / 6 = 7.5
+        """
+        profile = UserProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.reputation_score, profile.reputation_rank), (0, 0))
+        
+        Rating.objects.create(handshake=self.handshake, rater=self.seeker, ratee=self.provider, score=10)
+        profile.refresh_from_db()
+        self.assertEqual(profile.reputation_score, 7.5)
+        self.assertIsNotNone(profile.last_active_at)
+        self.assertAlmostEqual(profile.reputation_rank, reputation_rank(7.5, profile.last_active_at))
+    
+    def test_completion_adds_bonus_for_both_sides(self):
+        """
+        A completed exchange adds 0.5 * ln(2) on top of the prior for both participants
+        """
+        Transaction.objects.create(handshake=self.handshake, sender=self.seeker, receiver=self.provider, amount=1)
+        for user in (self.provider, self.seeker):
+            self.assertAlmostEqual(UserProfile.objects.get(user=user).reputation_score, 7 + 0.5 * math.log(2), places=4)
+    
+    def test_rank_decays_with_inactivity(self):
+        """
+        A slightly higher score that went quiet long ago ranks below a fresh one
+        """
+        now = timezone.now()
+        stale = reputation_rank(9.0, now - timedelta(seconds=REPUTATION_DECAY_SECONDS))
+        fresh = reputation_rank(8.0, now)
+        self.assertLess(stale, fresh)
+        self.assertGreater(reputation_rank(9.0, now), fresh)
+    
+    def test_offers_sorted_by_owner_reputation(self):
+        """
+        ?sort=reputation orders offers by owner rank without per-row profile lookups
+        """
+        Offer.objects.create(user=self.seeker, title="Cooking class", duration="1")
+        Rating.objects.create(handshake=self.handshake, rater=self.provider, ratee=self.seeker, score=10)
+        
+        with self.assertNumQueries(2):  # offers + owners, active handshakes
+            response = APIClient().get('/api/offers/?sort=reputation')
+        self.assertEqual([offer['title'] for offer in response.data], ["Cooking class", "Guitar lesson"])
+        self.assertEqual(response.data[0]['owner_reputation'], 7.5)
+        
+        response = APIClient().get('/api/requests/?sort=reputation')
+        self.assertEqual(response.status_code, 200)
+
+
+def make_image(width=800, height=600, image_format='PNG', color=(200, 120, 40)):
+    from PIL import Image
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ProfilePictureThumbnailTest(TestCase):
+    """Test thumbnail generation for uploaded profile pictures"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create(username='pictured')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def test_upload_generates_square_variants(self):
+        """
+        Uploading a picture stores 64/128/512 px square thumbnails next to the original
+        """
+        from PIL import Image
+        upload = SimpleUploadedFile('avatar.png', make_image(), content_type='image/png')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/profiles/me/', {'profile_picture': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(set(profile.profile_picture_thumbnails), {'64', '128', '512'})
+        for size, name in profile.profile_picture_thumbnails.items():
+            self.assertTrue(name.startswith('profile_pictures/thumbs/'))
+            with default_storage.open(name) as stored, Image.open(stored) as image:
+                self.assertEqual(image.size, (int(size), int(size)))
+    
+    def test_urls_pick_size_appropriate_variant(self):
+        """
+        Profiles serve the 512 px variant, the directory the 128 px one, and the original before thumbnails exist
+        """
+        with self.captureOnCommitCallbacks(execute=False):
+            profile = UserProfile.objects.get(user=self.user)
+            profile.profile_picture.save('avatar.png', ContentFile(make_image()))
+        response = self.client.get('/api/profiles/me/')
+        self.assertTrue(response.data['profile_picture_url'].endswith(profile.profile_picture.name))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.profile_picture.save('avatar.png', ContentFile(make_image(width=640)))
+        thumbnails = UserProfile.objects.get(user=self.user).profile_picture_thumbnails
+        response = self.client.get('/api/profiles/me/')
+        self.assertTrue(response.data['profile_picture_url'].endswith(thumbnails['512']))
+        response = self.client.get(f'/api/users/{self.user.id}/public/')
+        self.assertTrue(response.data['profile_picture_url'].endswith(thumbnails['512']))
+        response = self.client.get('/api/profiles/')
+        self.assertTrue(response.data['results'][0]['profile_picture_url'].endswith(thumbnails['128']))
+    
+    def test_unrelated_saves_keep_thumbnails(self):
+        """
+        Saving other profile fields neither drops nor regenerates the variants
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.get(user=self.user).profile_picture.save('avatar.png', ContentFile(make_image()))
+        profile = UserProfile.objects.get(user=self.user)
+        thumbnails = profile.profile_picture_thumbnails
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            profile.bio = "Hello"
+            profile.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(UserProfile.objects.get(user=self.user).profile_picture_thumbnails, thumbnails)
+    
+    def test_command_backfills_missing_thumbnails(self):
+        """
+        generate_thumbnails renders variants for pictures uploaded before the pipeline existed
+        """
+        name = default_storage.save('profile_pictures/old.jpg', ContentFile(make_image(image_format='JPEG')))
+        UserProfile.objects.filter(user=self.user).update(profile_picture=name)
+        
+        out = StringIO()
+        call_command('generate_thumbnails', '--workers', '1', stdout=out)
+        self.assertIn('Generated thumbnails for 1 of 1 profile(s)', out.getvalue())
+        self.assertEqual(len(UserProfile.objects.get(user=self.user).profile_picture_thumbnails), 3)
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Test core.storage.ContentAddressedStorage, serve_media and gc_media"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_WORKERS=0)
+        self.settings_override.enable()
+        self.users = [User.objects.create(username=f'user{i}') for i in range(2)]
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def _upload(self, user, data, filename='Me.PNG'):
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = UserProfile.objects.get(user=user)
+            profile.profile_picture.save(filename, ContentFile(data))
+        return profile.profile_picture.name
+    
+    def test_identical_uploads_share_one_hashed_file(self):
+        """
+        Files are named by SHA-256 and identical content is stored once
+        """
+        import hashlib
+        data = make_image()
+        first = self._upload(self.users[0], data, 'Me.PNG')
+        second = self._upload(self.users[1], data, 'other.png')
+        
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first, f'profile_pictures/{digest[:2]}/{digest}.png')
+        self.assertEqual(first, second)
+        self.assertEqual(len(default_storage.listdir(f'profile_pictures/{digest[:2]}')[1]), 1)
+    
+    def test_dedup_hit_refreshes_mtime(self):
+        """
+        Saving content that is already stored touches the file, restarting gc_media's grace period
+        """
+        import os
+        data = make_image()
+        name = self._upload(self.users[0], data)
+        path = default_storage.path(name)
+        os.utime(path, (0, 0))
+        self.assertEqual(self._upload(self.users[1], data), name)
+        self.assertGreater(default_storage.get_modified_time(name), timezone.now() - timedelta(minutes=1))
+
+    def test_media_served_with_immutable_cache_headers(self):
+        """
+        Content-addressed files get a year-long immutable Cache-Control and a hash ETag
+        """
+        from core.storage import serve_media
+        from django.test import RequestFactory
+        name = self._upload(self.users[0], make_image())
+        response = serve_media(RequestFactory().get('/media/' + name), name, document_root=self.media_root)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn(name.rsplit('/', 1)[1].split('.')[0], response['ETag'])
+        
+        legacy = default_storage.path('legacy.png')
+        with open(legacy, 'wb') as handle:
+            handle.write(b'x')
+        response = serve_media(RequestFactory().get('/media/legacy.png'), 'legacy.png', document_root=self.media_root)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+    
+    def test_gc_keeps_shared_and_recent_blobs(self):
+        """
+        gc_media only deletes blobs nobody references once they are past the grace period
+        """
+        shared = make_image()
+        self._upload(self.users[0], shared)
+        old = self._upload(self.users[1], shared)
+        replaced_thumbnails = UserProfile.objects.get(user=self.users[1]).profile_picture_thumbnails
+        new = self._upload(self.users[1], make_image(color=(10, 90, 200)))
+        
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(default_storage.exists(old))  # still user0's picture
+        
+        UserProfile.objects.filter(user=self.users[0]).update(profile_picture=None, profile_picture_thumbnails={})
+        out = StringIO()
+        call_command('gc_media', '--grace-hours', '0', '--dry-run', stdout=out)
+        self.assertTrue(default_storage.exists(old))
+        
+        call_command('gc_media', '--grace-hours', '0', stdout=StringIO())
+        self.assertFalse(default_storage.exists(old))
+        for name in replaced_thumbnails.values():
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(new))
+        for name in UserProfile.objects.get(user=self.users[1]).profile_picture_thumbnails.values():
+            self.assertTrue(default_storage.exists(name))
+
+    def test_gc_rechecks_references_before_deleting(self):
+        """
+        A blob referenced again after gc_media collected the references is not deleted
+        """
+        from core.management.commands import gc_media
+        orphan = self._upload(self.users[0], make_image())
+        UserProfile.objects.filter(user=self.users[0]).update(profile_picture=None, profile_picture_thumbnails={})
+        walk = gc_media.walk
+
+        def walk_then_reuse(storage, directory=""):
+            # Another upload reuses the blob while the storage is being scanned
+            UserProfile.objects.filter(user=self.users[1]).update(profile_picture=orphan)
+            yield from walk(storage, directory)
+
+        with mock.patch.object(gc_media, 'walk', walk_then_reuse):
+            call_command('gc_media', '--grace-hours', '0', stdout=StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+
+
+class EmailOutboxTest(TestCase):
+    """Test the OutgoingEmail outbox and the send_outbox worker (locmem email backend)"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _queue(self, count=1):
+        return [queue_email("test", f"user{i}@example.com", f"Subject {i}", "Body", "<p>Body</p>") for i in range(count)]
+
+    def test_registration_queues_instead_of_sending(self):
+        """
+        Registering writes the activation email to the outbox; nothing is sent in the request
+        """
+        response = self.client.post('/api/register/', {
+            'username': 'newbee', 'password': 'S3cure-pass!', 'email': 'newbee@example.com',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['email_sent'])
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual((queued.kind, queued.to_email, queued.status), ("activation", "newbee@example.com", "pending"))
+
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["newbee@example.com"])
+        self.assertIn("/activate/", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ("sent", 1))
+        self.assertIsNotNone(queued.sent_at)
+
+    def test_password_reset_queues_only_for_known_emails(self):
+        """
+        A reset request queues an email for an existing account and nothing otherwise
+        """
+        User.objects.create(username='forgetful', email='forgetful@example.com')
+        self.client.post('/api/auth/password-reset-request/', {'email': 'nobody@example.com'}, format='json')
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.client.post('/api/auth/password-reset-request/', {'email': 'forgetful@example.com'}, format='json')
+        self.assertEqual(OutgoingEmail.objects.get().kind, "password_reset")
+
+    def test_batch_reuses_one_connection(self):
+        """
+        A batch is delivered over a single opened connection
+        """
+        self._queue(3)
+        connection = get_connection()
+        with mock.patch.object(connection, 'open', wraps=connection.open) as opened:
+            self.assertEqual(deliver_outbox(batch_size=10, connection=connection), (3, 0))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(status="sent").count(), 3)
+
+    def test_failures_back_off_then_give_up(self):
+        """
+        A failed email is retried later with growing delays and marked failed after the last attempt
+        """
+        email, = self._queue()
+        with mock.patch.object(EmailMultiAlternatives, 'send', side_effect=ConnectionError("refused")):
+            self.assertEqual(deliver_outbox(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertIn("refused", email.last_error)
+            delay = (email.next_attempt_at - timezone.now()).total_seconds()
+            self.assertAlmostEqual(delay, OUTBOX_RETRY_BASE_SECONDS, delta=5)
+            # Not due yet
+            self.assertEqual(deliver_outbox(), (0, 0))
+
+            OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            deliver_outbox()
+            email.refresh_from_db()
+            delay = (email.next_attempt_at - timezone.now()).total_seconds()
+            self.assertAlmostEqual(delay, 2 * OUTBOX_RETRY_BASE_SECONDS, delta=5)
+
+            OutgoingEmail.objects.filter(pk=email.pk).update(
+                next_attempt_at=timezone.now(), attempts=OUTBOX_MAX_ATTEMPTS - 1
+            )
+            deliver_outbox()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", OUTBOX_MAX_ATTEMPTS))
+        self.assertEqual(deliver_outbox(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_TIMEOUT=100)
+    def test_batch_stops_before_the_lease_runs_out(self):
+        """
+        Once a send could end after the batch's lease, the rest of the batch is left for later
+        """
+        self._queue(3)
+        # Each check of the clock is one slow send later
+        clock = iter(range(0, 1000, 90))
+        with mock.patch('core.email_utils.time.monotonic', side_effect=lambda: next(clock)):
+            self.assertEqual(deliver_outbox(), (2, 0))
+        self.assertEqual(OutgoingEmail.objects.filter(status="sent").count(), 2)
+        self.assertEqual(OutgoingEmail.objects.filter(status="pending", attempts=0).count(), 1)
+
+        with override_settings(EMAIL_TIMEOUT=OUTBOX_LEASE_SECONDS):
+            with self.assertRaises(ImproperlyConfigured):
+                deliver_outbox()
+
+
+class ProfileJWTAuthenticationTest(TestCase):
+    """Test core.authentication.ProfileJWTAuthentication"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='member')
+        UserProfile.objects.filter(user=self.user).update(email_verified=True)
+
+    def _authenticate(self, user=None):
+        token = AccessToken.for_user(user or self.user)
+        request = APIRequestFactory().get('/api/profiles/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ProfileJWTAuthentication().authenticate(request)[0]
+
+    def test_user_and_profile_in_one_query(self):
+        """
+        Authentication loads the profile with the user and precomputes the viewer flags
+        """
+        with self.assertNumQueries(1):
+            user = self._authenticate()
+            self.assertTrue(user.profile.email_verified)
+        self.assertFalse(user.is_admin)
+        self.assertTrue(user.email_verified)
+        self.assertFalse(is_admin(user))
+
+    def test_flags_fall_back_for_other_users(self):
+        """
+        is_admin() works for users that did not go through the authentication class
+        """
+        staff = User.objects.create(username='staff', is_staff=True)
+        self.assertTrue(is_admin(staff))
+        self.assertFalse(is_admin(None))
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=60)
+    def test_cache_serves_until_user_or_profile_changes(self):
+        """
+        Cached users cost no query; saving the user or profile bumps the token version
+        """
+        self._authenticate()
+        with self.assertNumQueries(0):
+            self._authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self._authenticate().is_admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = UserProfile.objects.get(user=self.user)
+            profile.email_verified = False
+            profile.save()
+        self.assertFalse(self._authenticate().email_verified)
+
+    def test_inactive_and_unknown_users_are_rejected(self):
+        """
+        The usual simplejwt checks still apply
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate()
+        ghost = User.objects.create(username='ghost')
+        token_user = User(pk=ghost.pk)
+        ghost.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(token_user)
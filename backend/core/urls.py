@@ -42,20 +42,30 @@ urlpatterns = [
     path("handshakes/<int:handshake_id>/confirm-seeker/", views.handshake_confirm_seeker, name="handshake_confirm_seeker"),
     path("timebank/", views.timebank_view, name="timebank_view"),
     path("timebank/balance/", views.timebank_balance, name="timebank_balance"),
+    path("timebank/history/", views.timebank_history, name="timebank_history"),
     path("transactions/", views.transactions_list, name="transactions_list"),
     path("questions/", views.questions_list_create, name="questions_list_create"),
     path("questions/<int:question_id>/answer/", views.question_answer, name="question_answer"),
     path("messages/", views.messages_list_create, name="messages_list_create"),
+    path("messages/mark-read/", views.messages_mark_read, name="messages_mark_read"),
+    path("messages/stream/<int:handshake_id>/", views.messages_stream, name="messages_stream"),
+    path("messages/stream/<int:handshake_id>/ticket/", views.messages_stream_ticket, name="messages_stream_ticket"),
     path("tags/", views.tags_list, name="tags_list"),
     path("tags/wikidata/", views.tags_wikidata, name="tags_wikidata"),
     path("forum/topics/", views.forum_topics_list_create, name="forum_topics_list_create"),
+    path("forum/search/", views.forum_search, name="forum_search"),
     path("forum/topics/<int:topic_id>/", views.forum_topic_detail, name="forum_topic_detail"),
+    path("forum/topics/<int:topic_id>/replies/", views.forum_topic_replies, name="forum_topic_replies"),
     path("forum/topics/<int:topic_id>/reply/", views.forum_topic_reply, name="forum_topic_reply"),
     path("forum/topics/<int:topic_id>/delete/", views.forum_topic_delete, name="forum_topic_delete"),
     path("forum/replies/<int:reply_id>/delete/", views.forum_reply_delete, name="forum_reply_delete"),
     path("inbox/pending-handshakes/", views.inbox_pending_handshakes, name="inbox_pending_handshakes"),
     path("inbox/unread-messages/", views.inbox_unread_messages, name="inbox_unread_messages"),
+    path("inbox/unread-count/", views.inbox_unread_count, name="inbox_unread_count"),
     path("inbox/conversations/", views.inbox_conversations, name="inbox_conversations"),
+    path("inbox/summary/", views.inbox_summary, name="inbox_summary"),
     # Admin utilities
     path("admin/load-realistic-posts/", views.load_realistic_posts_admin, name="load_realistic_posts_admin"),
+    path("admin/transactions/export/", views.transactions_export, name="transactions_export"),
+    path("admin/analytics/timebank/", views.timebank_analytics, name="timebank_analytics"),
 ]
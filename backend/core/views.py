@@ -6,25 +6,30 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 
-from .models import UserProfile, Offer, Request as RequestModel, Handshake, Transaction, Question, Message, Rating, Badge, ForumTopic, ForumReply
+from .models import UserProfile, Offer, Request as RequestModel, Handshake, Transaction, Question, Message, Rating, Badge, ForumTopic, ForumReply, UnreadCounter, MessageArchive
 from .serializers import (
     UserProfileSerializer,
+    PublicProfileSerializer,
     OfferSerializer,
     RequestSerializer,
     HandshakeSerializer,
     TransactionSerializer,
+    TransactionHistorySerializer,
     QuestionSerializer,
     MessageSerializer,
     RatingSerializer,
     BadgeSerializer,
     ForumTopicSerializer,
+    ForumTopicListSerializer,
     ForumReplySerializer,
 )
-from .email_utils import send_activation_email, send_password_reset_email, validate_password_reset_token
+from .authentication import is_admin
+from .email_utils import queue_activation_email, queue_password_reset_email, validate_password_reset_token
 
 # ---------------------------------------------------------------------------
 # BASIC ROUTES
@@ -96,15 +101,14 @@ def register_user(request):
             profile.email_verified = False
         profile.save()
         
-        # Send activation email (wrap in try-except so it doesn't fail registration)
+        # Queue activation email (wrap in try-except so it doesn't fail registration);
+        # the send_outbox worker delivers it, so the mail server never delays this response
         email_sent = False
         try:
-            print(f"[DEBUG] Attempting to send activation email to {user.email}")
-            email_sent = send_activation_email(user, request)
-            print(f"[DEBUG] Email sending result: {email_sent}")
+            email_sent = queue_activation_email(user, request)
         except Exception as e:
             import traceback
-            print(f"[ERROR] Error sending activation email: {str(e)}")
+            print(f"[ERROR] Error queueing activation email: {str(e)}")
             traceback.print_exc()
             # Don't fail registration if email fails - user can request resend later
         
@@ -134,7 +138,7 @@ def activate_account(request):
     if not token:
         return Response({"error": "Activation token is required"}, status=status.HTTP_400_BAD_REQUEST)
     
-    from .email_utils import validate_activation_token, send_verification_success_email
+    from .email_utils import validate_activation_token, queue_verification_success_email
     
     is_valid, user_id, error_message = validate_activation_token(token)
     
@@ -161,7 +165,7 @@ def activate_account(request):
     profile.save()
     
     # Send success notification email (optional)
-    send_verification_success_email(user)
+    queue_verification_success_email(user)
     
     return Response({
         "message": "Email verified successfully! You can now log in.",
@@ -238,11 +242,7 @@ def resend_activation(request):
     print(f"{'='*60}\n")
     
     try:
-        email_sent = send_activation_email(user, request)
-        
-        print(f"\n{'='*60}")
-        print(f"Email send result: {email_sent}")
-        print(f"{'='*60}\n")
+        email_sent = queue_activation_email(user, request)
         
         if email_sent:
             return Response({
@@ -292,8 +292,7 @@ def password_reset_request(request):
     try:
         user = User.objects.get(email=email)
         # Send password reset email
-        email_sent = send_password_reset_email(user, request)
-        print(f"Password reset email {'sent' if email_sent else 'failed'} for user: {user.username}")
+        queue_password_reset_email(user, request)
     except User.DoesNotExist:
         # Don't reveal whether user exists
         pass
@@ -301,8 +300,7 @@ def password_reset_request(request):
         # Handle multiple users with same email (shouldn't happen but handle it)
         user = User.objects.filter(email=email).first()
         if user:
-            email_sent = send_password_reset_email(user, request)
-            print(f"Password reset email {'sent' if email_sent else 'failed'} for user: {user.username}")
+            queue_password_reset_email(user, request)
     
     # Always return success to avoid email enumeration
     return Response({
@@ -379,13 +377,58 @@ def password_reset_confirm(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# The anonymous directory page is not invalidated: profile changes show up
+# within this many seconds on every worker (the cache is shared, see CACHES)
+PROFILE_DIRECTORY_CACHE_SECONDS = 60
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def profile_list(request):
-    """List all public profiles"""
-    profiles = UserProfile.objects.filter(is_visible=True)
-    serializer = UserProfileSerializer(profiles, many=True, context={"request": request})
-    return Response(serializer.data)
+    """
+    Paginated directory of visible profiles.
+    GET /api/profiles/?search=<text>&district=<district>&page=1&page_size=20
+    search matches username, skills or interests (trigram-indexed on Postgres);
+    district is an exact, indexed match. The anonymous first page is cached briefly.
+    """
+    from django.core.cache import cache
+    from .pagination import StandardPagination
+    
+    search = request.query_params.get("search", "").strip()
+    district = request.query_params.get("district", "").strip()
+    
+    # Only the default anonymous landing page is shared between visitors
+    cache_key = None
+    if (
+        not request.user.is_authenticated
+        and not search and not district
+        and request.query_params.get("page", "1") == "1"
+        and "page_size" not in request.query_params
+    ):
+        cache_key = "profile_directory_anonymous"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+    
+    # Rating aggregates are stored on the profile, so a page is a single query
+    profiles = UserProfile.objects.filter(is_visible=True).select_related("user").order_by("id")
+    if search:
+        profiles = profiles.filter(
+            models.Q(user__username__icontains=search)
+            | models.Q(skills__icontains=search)
+            | models.Q(interests__icontains=search)
+        )
+    if district:
+        profiles = profiles.filter(district=district)
+    
+    paginator = StandardPagination()
+    page = paginator.paginate_queryset(profiles, request)
+    # Directory cards are small: serve the 128px thumbnails
+    serializer = UserProfileSerializer(page, many=True, context={"request": request, "avatar_size": 128})
+    response = paginator.get_paginated_response(serializer.data)
+    if cache_key:
+        cache.set(cache_key, response.data, PROFILE_DIRECTORY_CACHE_SECONDS)
+    return response
 
 
 @api_view(["GET"])
@@ -394,24 +437,22 @@ def public_profile_view(request, user_id):
     """
     Get public profile information for a user.
     GET /api/users/<id>/public/
-    Returns only public information (no email, beellars, etc.)
+    Returns only public information (no email, beellars, etc.).
+    Only the newest page of ratings is embedded; older ones come from /api/ratings/user/<id>/.
     """
     try:
-        target_user = User.objects.get(pk=user_id)
-    except User.DoesNotExist:
-        return Response(
-            {"error": "User not found."}, status=status.HTTP_404_NOT_FOUND
-        )
-    
-    try:
-        profile = UserProfile.objects.get(user=target_user)
+        profile = UserProfile.objects.select_related("user").get(user_id=user_id)
     except UserProfile.DoesNotExist:
+        if not User.objects.filter(pk=user_id).exists():
+            return Response(
+                {"error": "User not found."}, status=status.HTTP_404_NOT_FOUND
+            )
         return Response(
             {"error": "Profile not found."}, status=status.HTTP_404_NOT_FOUND
         )
     
     # Check if profile is visible (unless viewing own profile)
-    if profile.user != request.user and not profile.is_visible:
+    if profile.user_id != request.user.id and not profile.is_visible:
         return Response(
             {"error": "This profile is not visible."},
             status=status.HTTP_403_FORBIDDEN,
@@ -491,6 +532,13 @@ def profile_own(request):
 # OFFER & REQUEST SYSTEM
 # ---------------------------------------------------------------------------
 
+def _post_ordering(request):
+    """Ordering for offer/request lists: newest first, or by owner reputation with ?sort=reputation"""
+    if request.query_params.get("sort") == "reputation":
+        return ("-user__profile__reputation_rank", "-created_at")
+    return ("-created_at",)
+
+
 @api_view(["GET", "POST"])
 @permission_classes([AllowAny])
 def offers_list_create(request):
@@ -500,8 +548,8 @@ def offers_list_create(request):
             from datetime import datetime, timedelta
             from .location_utils import calculate_distance_km, get_fuzzy_coordinates
             
-            # Filter out cancelled (deleted) offers
-            offers = Offer.objects.exclude(status="cancelled").exclude(status="completed")
+            # Filter out cancelled (deleted), completed and expired offers
+            offers = Offer.objects.exclude(status__in=["cancelled", "completed", "expired"])
             
             # Filter by tag
             tag = request.query_params.get("tag", None)
@@ -563,7 +611,15 @@ def offers_list_create(request):
                 except (ValueError, TypeError):
                     pass
             
-            offers = offers.order_by("-created_at")
+            offers = offers.select_related("user__profile").prefetch_related(
+                models.Prefetch(
+                    "handshakes",
+                    queryset=Handshake.objects.filter(
+                        status__in=["proposed", "accepted", "in_progress", "completed"]
+                    ).select_related("seeker", "provider").order_by("id"),
+                    to_attr="active_handshakes",
+                )
+            ).order_by(*_post_ordering(request))
             serializer = OfferSerializer(offers, many=True)
             return Response(serializer.data)
         except Exception as e:
@@ -646,15 +702,15 @@ def offer_delete(request, offer_id):
         )
     
     # Check ownership or admin status
-    is_admin = request.user.is_staff or request.user.is_superuser
-    if offer.user != request.user and not is_admin:
+    viewer_is_admin = is_admin(request.user)
+    if offer.user != request.user and not viewer_is_admin:
         return Response(
             {"error": "You can only delete your own offers."},
             status=status.HTTP_403_FORBIDDEN
         )
     
     # Check for active handshakes (admins can delete regardless)
-    if not is_admin:
+    if not viewer_is_admin:
         active_handshakes = offer.handshakes.filter(
             status__in=["proposed", "accepted", "in_progress"]
         ).exists()
@@ -666,7 +722,7 @@ def offer_delete(request, offer_id):
             )
     
     # Soft-delete: mark as cancelled (or admin can hard-delete)
-    if is_admin:
+    if viewer_is_admin:
         offer.delete()
         return Response(
             {"message": "Offer deleted successfully."},
@@ -690,8 +746,8 @@ def requests_list_create(request):
             from datetime import datetime, timedelta
             from .location_utils import calculate_distance_km, get_fuzzy_coordinates
             
-            # Filter out cancelled (deleted) requests
-            requests = RequestModel.objects.exclude(status="cancelled").exclude(status="completed")
+            # Filter out cancelled (deleted), completed and expired requests
+            requests = RequestModel.objects.exclude(status__in=["cancelled", "completed", "expired"])
             
             # Filter by tag
             tag = request.query_params.get("tag", None)
@@ -753,7 +809,7 @@ def requests_list_create(request):
                 except (ValueError, TypeError):
                     pass
             
-            requests = requests.order_by("-created_at")
+            requests = requests.select_related("user__profile").order_by(*_post_ordering(request))
             serializer = RequestSerializer(requests, many=True)
             return Response(serializer.data)
         except Exception as e:
@@ -836,15 +892,15 @@ def request_delete(request, request_id):
         )
     
     # Check ownership or admin status
-    is_admin = request.user.is_staff or request.user.is_superuser
-    if request_obj.user != request.user and not is_admin:
+    viewer_is_admin = is_admin(request.user)
+    if request_obj.user != request.user and not viewer_is_admin:
         return Response(
             {"error": "You can only delete your own requests."},
             status=status.HTTP_403_FORBIDDEN
         )
     
     # Check for active handshakes (admins can delete regardless)
-    if not is_admin:
+    if not viewer_is_admin:
         active_handshakes = request_obj.handshakes.filter(
             status__in=["proposed", "accepted", "in_progress"]
         ).exists()
@@ -856,7 +912,7 @@ def request_delete(request, request_id):
             )
     
     # Soft-delete: mark as cancelled (or admin can hard-delete)
-    if is_admin:
+    if viewer_is_admin:
         request_obj.delete()
         return Response(
             {"message": "Request deleted successfully."},
@@ -902,26 +958,40 @@ def handshake_accept(request, handshake_id):
     if user != handshake.provider:
         return Response({"error": "Only provider can accept this handshake."}, status=status.HTTP_403_FORBIDDEN)
 
-    # For offers: check if max_participants is reached
-    if handshake.offer:
-        accepted_count = handshake.offer.get_accepted_participant_count()
-        if accepted_count >= handshake.offer.max_participants:
+    with transaction.atomic():
+        # Lock the offer first, then the handshake (always in this order), so
+        # concurrent accepts cannot overbook the offer or accept twice
+        offer = None
+        if handshake.offer_id:
+            offer = Offer.objects.select_for_update().get(pk=handshake.offer_id)
+        # Re-read under the lock: the counter delta comes from the loaded status
+        handshake = Handshake.objects.select_for_update().get(pk=handshake_id)
+        if handshake.status != "proposed":
             return Response(
-                {"error": f"This offer has reached its maximum number of participants ({handshake.offer.max_participants})."},
+                {"error": f"Only proposed handshakes can be accepted (this one is {handshake.status})."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    handshake.status = "accepted"
-    handshake.save()
+        # For offers: check if max_participants is reached
+        if offer is not None:
+            handshake.offer = offer
+            if offer.accepted_count >= offer.max_participants:
+                return Response(
+                    {"error": f"This offer has reached its maximum number of participants ({offer.max_participants})."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-    # Mark post as "in_progress" when at least one handshake is accepted
-    if handshake.offer:
-        if handshake.offer.status == "open":
-            handshake.offer.status = "in_progress"
-            handshake.offer.save()
-    elif handshake.request:
-        handshake.request.status = "in_progress"
-        handshake.request.save()
+        handshake.status = "accepted"
+        handshake.save()
+
+        # Mark post as "in_progress" when at least one handshake is accepted
+        if handshake.offer:
+            if handshake.offer.status == "open":
+                handshake.offer.status = "in_progress"
+                handshake.offer.save(update_fields=["status"])
+        elif handshake.request:
+            handshake.request.status = "in_progress"
+            handshake.request.save()
 
     return Response({"message": "Handshake accepted."}, status=status.HTTP_200_OK)
 
@@ -965,7 +1035,9 @@ def _complete_handshake(handshake):
             return False, "Insufficient Beellar balance. Participant needs at least 1 Beellar."
         # Multi-participant offer: each participant pays 1 Beellar, owner gets 1 Beellar total
         # Check completed count BEFORE marking this one as completed
-        completed_count_before = handshake.offer.handshakes.filter(status="completed").count()
+        offer = handshake.offer
+        offer.refresh_from_db(fields=["accepted_count", "completed_count"])
+        completed_count_before = offer.completed_count
         
         # Participant pays 1 Beellar
         seeker_profile.timebank_balance -= 1
@@ -989,15 +1061,14 @@ def _complete_handshake(handshake):
         handshake.save()
         
         # Check if ALL accepted handshakes are now completed
-        # Count handshakes that are still accepted/in_progress (excluding declined)
-        remaining_active = handshake.offer.handshakes.filter(
-            status__in=["accepted", "in_progress"]
-        ).exclude(status="declined").count()
+        # Handshakes still accepted/in_progress = accepted_count - completed_count
+        offer.refresh_from_db(fields=["accepted_count", "completed_count"])
+        remaining_active = offer.accepted_count - offer.completed_count
         
         # Mark offer as completed only when no active handshakes remain
         if remaining_active == 0:
-            handshake.offer.status = "completed"
-            handshake.offer.save()
+            offer.status = "completed"
+            offer.save(update_fields=["status"])
         return True, "Handshake completed successfully. Beellars transferred."
     else:
         # Request: standard 1-to-1 transaction
@@ -1174,6 +1245,8 @@ def timebank_view(request):
     # Get transaction history (sorted newest → oldest)
     transactions = Transaction.objects.filter(
         models.Q(sender=request.user) | models.Q(receiver=request.user)
+    ).select_related(
+        "sender", "receiver", "handshake__offer", "handshake__request"
     ).order_by("-created_at")
     
     serializer = TransactionSerializer(transactions, many=True, context={"request": request})
@@ -1204,10 +1277,10 @@ def transactions_list(request):
     Admins can view all transactions by passing ?all=true
     """
     # Check if user is admin and wants to see all transactions
-    is_admin = request.user.is_staff or request.user.is_superuser
+    viewer_is_admin = is_admin(request.user)
     show_all = request.query_params.get("all", "false").lower() == "true"
     
-    if is_admin and show_all:
+    if viewer_is_admin and show_all:
         # Admin viewing all transactions
         transactions = Transaction.objects.all().order_by("-created_at")
     else:
@@ -1216,10 +1289,210 @@ def transactions_list(request):
             models.Q(sender=request.user) | models.Q(receiver=request.user)
         ).order_by("-created_at")
     
+    transactions = transactions.select_related(
+        "sender", "receiver", "handshake__offer", "handshake__request"
+    )
     serializer = TransactionSerializer(transactions, many=True, context={"request": request})
     return Response(serializer.data)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def transactions_export(request):
+    """
+    Stream the transaction ledger as CSV or JSON Lines (admin only).
+    GET /api/admin/transactions/export/?output=csv|jsonl&min_date=YYYY-MM-DD&max_date=YYYY-MM-DD&user=<user_id>
+    Rows are read with a server-side cursor and written as they are fetched.
+    """
+    from datetime import datetime
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse
+    from .export_utils import EXPORT_FORMATS, aiter_export, iter_export
+
+    if not is_admin(request.user):
+        return Response(
+            {"error": "Only administrators can export transactions."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    export_format = request.query_params.get("output", "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"Unsupported output format. Choose one of: {', '.join(EXPORT_FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    filters = {}
+    try:
+        for param in ("min_date", "max_date"):
+            if request.query_params.get(param):
+                filters[param] = datetime.strptime(request.query_params[param], "%Y-%m-%d").date()
+        if request.query_params.get("user"):
+            filters["user_id"] = int(request.query_params["user"])
+    except ValueError:
+        return Response(
+            {"error": "Dates must be YYYY-MM-DD and user must be a numeric id."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # ASGI would buffer a synchronous iterator whole: hand it an async one
+    export = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+    response = StreamingHttpResponse(
+        export(export_format, **filters),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="transactions.{export_format}"'
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def timebank_analytics(request):
+    """
+    Timebank analytics served from the daily rollup tables (admin only).
+    GET /api/admin/analytics/timebank/?min_date=YYYY-MM-DD&max_date=YYYY-MM-DD&district=<name>&top=10
+    Returns: {series: [...], top_earners: [...], top_spenders: [...], last_transaction_id}
+    Rollups are refreshed by the update_timebank_rollups management command.
+    """
+    from datetime import datetime
+    from .analytics_utils import TIMEBANK_WATERMARK, timebank_rollup_report
+    from .models import RollupWatermark
+
+    if not is_admin(request.user):
+        return Response(
+            {"error": "Only administrators can view analytics."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    filters = {}
+    try:
+        for param in ("min_date", "max_date"):
+            if request.query_params.get(param):
+                filters[param] = datetime.strptime(request.query_params[param], "%Y-%m-%d").date()
+        top_n = min(max(int(request.query_params.get("top", 10)), 1), 100)
+    except ValueError:
+        return Response(
+            {"error": "Dates must be YYYY-MM-DD and top must be a number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if "district" in request.query_params:
+        filters["district"] = request.query_params["district"].strip()
+
+    report = timebank_rollup_report(top_n=top_n, **filters)
+    watermark = RollupWatermark.objects.filter(name=TIMEBANK_WATERMARK).first()
+    report["last_transaction_id"] = watermark.last_id if watermark else 0
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def timebank_history(request):
+    """
+    Paginated transaction history with a running balance per row.
+    GET /api/timebank/history/?page=1&page_size=20&min_date=YYYY-MM-DD&max_date=YYYY-MM-DD&direction=earned|spent
+    Returns: {balance: int, count, next, previous, results: [...]}
+    """
+    from datetime import datetime
+    from .pagination import StandardPagination
+
+    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    if created:
+        # Set starting balance for newly created profile
+        profile.timebank_balance = 3
+        profile.save()
+
+    # Parse optional filters (invalid values are ignored, like the post list filters)
+    min_date = max_date = None
+    try:
+        if request.query_params.get("min_date"):
+            min_date = datetime.strptime(request.query_params["min_date"], "%Y-%m-%d").date()
+    except ValueError:
+        pass
+    try:
+        if request.query_params.get("max_date"):
+            max_date = datetime.strptime(request.query_params["max_date"], "%Y-%m-%d").date()
+    except ValueError:
+        pass
+    direction = request.query_params.get("direction")
+    if direction not in ("earned", "spent"):
+        direction = None
+
+    transactions = _transaction_history_queryset(
+        request.user,
+        profile.timebank_balance,
+        min_date=min_date,
+        max_date=max_date,
+        direction=direction,
+    )
+
+    paginator = StandardPagination()
+    page = paginator.paginate_queryset(transactions, request)
+    serializer = TransactionHistorySerializer(page, many=True, context={"request": request})
+    response = paginator.get_paginated_response(serializer.data)
+    response.data["balance"] = profile.timebank_balance
+    return response
+
+
+def _transaction_history_queryset(user, current_balance, min_date=None, max_date=None, direction=None):
+    """
+    Build a user's ledger (newest first) with a running balance computed by SQL window functions.
+
+    `balance_after` is the balance implied by the ledger right after each row:
+    the current balance minus the net amount of every newer transaction. The
+    windows always run over the user's full ledger; the date and direction
+    filters reference per-row window values so they are applied after the
+    running sums and do not remove rows from the balance computation.
+    Post titles and usernames are selected through joins.
+    """
+    from django.db.models import Case, When, F, Q, Sum, Max, Value, Window, IntegerField, CharField
+    from django.db.models.functions import Coalesce, TruncDate
+    from django.db.models.expressions import RowRange
+
+    def per_row(expression):
+        # Partitioning by the primary key yields the row's own value as a window expression
+        return Window(Max(expression), partition_by=[F("id")])
+
+    signed_amount = Case(
+        When(receiver=user, then=F("amount")),
+        default=-F("amount"),
+        output_field=IntegerField(),
+    )
+
+    transactions = Transaction.objects.filter(
+        Q(sender=user) | Q(receiver=user)
+    ).select_related("sender", "receiver").annotate(
+        running_net=Window(
+            Sum(signed_amount),
+            order_by=[F("created_at").asc(), F("id").asc()],
+            frame=RowRange(start=None, end=0),
+        ),
+        total_net=Window(Sum(signed_amount)),
+    ).annotate(
+        balance_after=Value(current_balance) - F("total_net") + F("running_net"),
+        post_title=Coalesce(F("handshake__offer__title"), F("handshake__request__title")),
+        direction=Case(
+            When(receiver=user, then=Value("earned")),
+            default=Value("spent"),
+            output_field=CharField(),
+        ),
+    )
+
+    if min_date or max_date:
+        transactions = transactions.alias(row_date=per_row(TruncDate("created_at")))
+        if min_date:
+            transactions = transactions.filter(row_date__gte=min_date)
+        if max_date:
+            transactions = transactions.filter(row_date__lte=max_date)
+    if direction:
+        transactions = transactions.alias(row_amount=per_row(signed_amount))
+        if direction == "earned":
+            transactions = transactions.filter(row_amount__gt=0)
+        else:
+            transactions = transactions.filter(row_amount__lt=0)
+
+    return transactions.order_by("-created_at", "-id")
+
+
 # ---------------------------------------------------------------------------
 # QUESTIONS (PUBLIC PRE-HANDSHAKE)
 # ---------------------------------------------------------------------------
@@ -1353,6 +1626,8 @@ def question_answer(request, question_id):
 @permission_classes([IsAuthenticated])
 def messages_list_create(request):
     """Get messages for a handshake, or send a new message"""
+    from .chat_utils import chat_access_error
+    
     handshake_id = request.query_params.get("handshake")
     
     if request.method == "GET":
@@ -1364,22 +1639,31 @@ def messages_list_create(request):
         
         handshake = get_object_or_404(Handshake, pk=handshake_id)
         
-        # Only participants can view messages
-        if request.user not in [handshake.provider, handshake.seeker]:
-            return Response(
-                {"error": "You are not part of this handshake"},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        # Only participants can view messages, and only once the handshake is accepted
+        error = chat_access_error(request.user, handshake)
+        if error:
+            return Response({"error": error}, status=status.HTTP_403_FORBIDDEN)
         
-        # Only show messages if handshake is accepted or in progress
-        if handshake.status not in ["accepted", "in_progress", "completed"]:
+        messages = Message.objects.filter(handshake=handshake).select_related("sender")
+        
+        # Delta fetch: only messages newer than the last one the client has
+        after_id = request.query_params.get("after_id")
+        try:
+            after_id = int(after_id) if after_id else 0
+        except ValueError:
             return Response(
-                {"error": "Messages are only available after handshake is accepted"},
-                status=status.HTTP_403_FORBIDDEN
+                {"error": "'after_id' must be a message id"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        messages = messages.filter(id__gt=after_id)
         
-        messages = Message.objects.filter(handshake=handshake)
         serializer = MessageSerializer(messages, many=True)
+        
+        # Older history of long-completed handshakes lives in the compressed archive
+        archive = MessageArchive.objects.filter(handshake=handshake, last_message_id__gt=after_id).first()
+        if archive is not None:
+            archived = [message for message in archive.get_messages() if message["id"] > after_id]
+            return Response(archived + serializer.data)
         return Response(serializer.data)
     
     # POST - send message
@@ -1387,25 +1671,157 @@ def messages_list_create(request):
     if serializer.is_valid():
         handshake = serializer.validated_data.get("handshake")
         
-        # Only participants can send messages
-        if request.user not in [handshake.provider, handshake.seeker]:
-            return Response(
-                {"error": "You are not part of this handshake"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        # Only allow messages if handshake is accepted or in progress
-        if handshake.status not in ["accepted", "in_progress", "completed"]:
-            return Response(
-                {"error": "Messages are only available after handshake is accepted"},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        # Same checks as the chat socket (core.chat_socket)
+        error = chat_access_error(request.user, handshake)
+        if error:
+            return Response({"error": error}, status=status.HTTP_403_FORBIDDEN)
         
         serializer.save(sender=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def messages_mark_read(request):
+    """
+    Mark every message from the other participant up to a given id as read.
+    POST /api/messages/mark-read/ with body: {"handshake": <id>, "up_to_id": <message id>}
+    Omitting up_to_id marks the whole conversation as read. Uses a single UPDATE.
+    """
+    from .chat_utils import mark_messages_read
+    
+    handshake_id = request.data.get("handshake")
+    up_to_id = request.data.get("up_to_id")
+    try:
+        handshake_id = int(handshake_id)
+        up_to_id = int(up_to_id) if up_to_id not in (None, "") else None
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "'handshake' and 'up_to_id' must be ids"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    handshake = get_object_or_404(Handshake, pk=handshake_id)
+    if request.user.id not in (handshake.provider_id, handshake.seeker_id):
+        return Response(
+            {"error": "You are not part of this handshake"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    marked = mark_messages_read(handshake.id, request.user, up_to_id)
+    return Response({"marked_read": marked}, status=status.HTTP_200_OK)
+
+
+def _authorize_message_stream(request, handshake_id):
+    """
+    Authenticate a chat stream request and resolve its starting message id.
+    EventSource cannot send headers, so browsers pass a short-lived ?ticket=
+    (POST /api/messages/stream/<handshake_id>/ticket/) instead of their JWT;
+    other clients may send the usual Authorization header.
+    Returns (error_response, start_id).
+    """
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from .chat_utils import authenticate_stream_ticket, authenticate_token, chat_access_error
+
+    ticket = request.GET.get("ticket")
+    if ticket:
+        user = authenticate_stream_ticket(ticket, handshake_id)
+    else:
+        authenticator = JWTAuthentication()
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header else None
+        if not raw_token:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401), None
+        user = authenticate_token(raw_token)
+    if user is None:
+        return JsonResponse({"detail": "Given token not valid."}, status=401), None
+
+    try:
+        handshake = Handshake.objects.get(pk=handshake_id)
+    except Handshake.DoesNotExist:
+        return JsonResponse({"error": "Handshake not found"}, status=404), None
+    error = chat_access_error(user, handshake)
+    if error:
+        return JsonResponse({"error": error}, status=403), None
+
+    # Resume from the browser's Last-Event-ID, an explicit ?after_id=, or the latest message
+    start_id = request.headers.get("Last-Event-ID") or request.GET.get("after_id")
+    try:
+        start_id = int(start_id)
+    except (TypeError, ValueError):
+        start_id = Message.objects.filter(handshake=handshake).aggregate(
+            last=models.Max("id")
+        )["last"] or 0
+    return None, start_id
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def messages_stream_ticket(request, handshake_id):
+    """
+    Issue a short-lived ticket for opening the handshake's message stream (SSE)
+    or chat socket (/ws/chat/<handshake_id>/).
+    POST /api/messages/stream/<handshake_id>/ticket/
+    Returns: {ticket, expires_in}; it is checked once, when connecting.
+    """
+    from .chat_utils import STREAM_TICKET_SECONDS, chat_access_error, issue_stream_ticket
+
+    handshake = get_object_or_404(Handshake, pk=handshake_id)
+    error = chat_access_error(request.user, handshake)
+    if error:
+        return Response({"error": error}, status=status.HTTP_403_FORBIDDEN)
+    return Response({
+        "ticket": issue_stream_ticket(request.user, handshake.id),
+        "expires_in": STREAM_TICKET_SECONDS,
+    })
+
+
+async def messages_stream(request, handshake_id):
+    """
+    Server-Sent Events stream of new chat messages (replaces client-side polling).
+    GET /api/messages/stream/<handshake_id>/?ticket=<stream ticket>&after_id=<message id>
+    Each event carries one serialized message with its id as the SSE event id.
+    Requires the ASGI server (mysite.asgi) so an open stream does not hold a worker thread.
+    """
+    import asyncio
+    import time
+    from django.http import HttpResponseNotAllowed, StreamingHttpResponse
+    from .chat_utils import (
+        STREAM_MAX_SECONDS, STREAM_POLL_SECONDS, database_sync_to_async, drain, format_sse, message_broker,
+        messages_after,
+    )
+
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    error, start_id = await database_sync_to_async(_authorize_message_stream)(request, handshake_id)
+    if error is not None:
+        return error
+
+    async def event_stream():
+        last_id = start_id
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        with message_broker.subscribe(handshake_id) as wakeups:
+            yield f"retry: {STREAM_POLL_SECONDS * 1000}\n\n"
+            while time.monotonic() < deadline:
+                for payload in await database_sync_to_async(messages_after)(handshake_id, last_id):
+                    last_id = payload["id"]
+                    yield format_sse(payload, event_id=last_id)
+                try:
+                    # Wake up immediately for messages saved in this process;
+                    # the timeout doubles as the cross-worker database poll
+                    await asyncio.wait_for(wakeups.get(), timeout=STREAM_POLL_SECONDS)
+                    drain(wakeups)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # ---------------------------------------------------------------------------
 # RATINGS & BADGES
 # ---------------------------------------------------------------------------
@@ -1539,9 +1955,11 @@ def rating_create_for_handshake(request, handshake_id):
 @permission_classes([AllowAny])
 def ratings_by_user(request, user_id):
     """
-    Get all ratings received by a user.
-    GET /api/ratings/user/<user_id>/
+    Paginated ratings received by a user, newest first.
+    GET /api/ratings/user/<user_id>/?page=1&page_size=20
     """
+    from .pagination import StandardPagination
+    
     try:
         user = User.objects.get(pk=user_id)
     except User.DoesNotExist:
@@ -1550,9 +1968,11 @@ def ratings_by_user(request, user_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    ratings = Rating.objects.filter(ratee=user).order_by("-created_at")
-    serializer = RatingSerializer(ratings, many=True)
-    return Response(serializer.data)
+    ratings = Rating.objects.filter(ratee=user).select_related("rater", "ratee").order_by("-created_at", "-id")
+    paginator = StandardPagination()
+    page = paginator.paginate_queryset(ratings, request)
+    serializer = RatingSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
@@ -1613,9 +2033,9 @@ def tags_list(request):
     # Get query parameter for filtering tags
     query = request.query_params.get("query", "").strip().lower()
     
-    # Get all tags from offers and requests (excluding cancelled posts)
-    offers = Offer.objects.exclude(status="cancelled").exclude(tags__isnull=True).exclude(tags="")
-    requests = RequestModel.objects.exclude(status="cancelled").exclude(tags__isnull=True).exclude(tags="")
+    # Get all tags from offers and requests (excluding cancelled and expired posts)
+    offers = Offer.objects.exclude(status__in=["cancelled", "expired"]).exclude(tags__isnull=True).exclude(tags="")
+    requests = RequestModel.objects.exclude(status__in=["cancelled", "expired"]).exclude(tags__isnull=True).exclude(tags="")
     
     # Collect all tags
     all_tags = set()
@@ -1739,7 +2159,7 @@ def location_diagnostic(request, offer_id=None):
         )
     
     # Check if user owns the offer or is admin
-    if offer.user != request.user and not (request.user.is_staff or request.user.is_superuser):
+    if offer.user != request.user and not is_admin(request.user):
         return Response(
             {"error": "You can only view diagnostics for your own offers"},
             status=status.HTTP_403_FORBIDDEN
@@ -1890,18 +2310,37 @@ def tags_wikidata(request):
 # FORUM
 # ---------------------------------------------------------------------------
 
+# Characters of the topic body shown on the forum index
+FORUM_EXCERPT_LENGTH = 280
+# ?sort= orderings of the forum index, each served by an index on ForumTopic
+FORUM_TOPIC_ORDERINGS = {
+    "active": (Coalesce("last_reply_at", "created_at").desc(), "-id"),
+    "hot": ("-hot_rank", "-id"),
+    "new": ("-created_at", "-id"),
+}
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def forum_topics_list_create(request):
     """
-    List all forum topics or create a new topic.
-    GET /api/forum/topics/ - List all topics
+    List forum topics or create a new topic.
+    GET /api/forum/topics/?sort=active|hot|new - Paginated topic summaries (no replies)
+        active (default): latest reply first, hot: time-decayed reply activity, new: creation
     POST /api/forum/topics/ - Create a new topic
     """
     if request.method == "GET":
-        topics = ForumTopic.objects.all().order_by("-created_at")
-        serializer = ForumTopicSerializer(topics, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        from django.db.models.functions import Substr
+        from .pagination import StandardPagination
+
+        ordering = FORUM_TOPIC_ORDERINGS.get(request.query_params.get("sort"), FORUM_TOPIC_ORDERINGS["active"])
+        topics = ForumTopic.objects.select_related("author", "last_reply_author").defer("body").annotate(
+            excerpt=Substr("body", 1, FORUM_EXCERPT_LENGTH),
+        ).order_by(*ordering)
+        paginator = StandardPagination()
+        page = paginator.paginate_queryset(topics, request)
+        serializer = ForumTopicListSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
     
     # POST - Create new topic
     serializer = ForumTopicSerializer(data=request.data, context={"request": request})
@@ -1911,20 +2350,90 @@ def forum_topics_list_create(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def forum_search(request):
+    """
+    Full-text search over topic titles, topic bodies and replies.
+    GET /api/forum/search/?q=&page=&page_size=
+    Results are topics, best match first, with highlighted snippets
+    (HTML-escaped, matches wrapped in <mark>) of the topic and its best replies.
+    """
+    from .pagination import StandardPagination
+    from .search_utils import RankedTopics, topic_snippets
+
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Scoring, grouping and paging happen in the database; only this page is fetched
+    paginator = StandardPagination()
+    page = paginator.paginate_queryset(RankedTopics(query), request)
+    topic_ids = [topic_id for topic_id, _score, _hits in page]
+    topics = ForumTopic.objects.select_related("author").only(
+        "id", "title", "created_at", "author__username"
+    ).in_bulk(topic_ids)
+    snippets = topic_snippets(query, topic_ids)
+
+    results = []
+    for topic_id, score, hits in page:
+        topic = topics.get(topic_id)
+        if topic is None:  # deleted since ranking
+            continue
+        matched = snippets[topic_id]
+        results.append({
+            "id": topic.id,
+            "title": topic.title,
+            "title_highlight": matched["title"],
+            "snippet": matched["snippet"],
+            "replies": matched["replies"],
+            "author_username": topic.author.username,
+            "created_at": topic.created_at,
+            "score": round(score, 6),
+            "matches": hits,
+        })
+    return paginator.get_paginated_response(results)
+
+
+def _paginated_replies(request, topic_id):
+    """One cursor page of a topic's replies: {"next": url, "results": [...]}"""
+    from django.urls import reverse
+    from .pagination import KeysetCursorPagination
+
+    paginator = KeysetCursorPagination()
+    paginator.base_url = request.build_absolute_uri(reverse("forum_topic_replies", args=[topic_id]))
+    page = paginator.paginate_queryset(ForumReply.objects.filter(topic_id=topic_id).select_related("author"), request)
+    return paginator.get_paginated_response(ForumReplySerializer(page, many=True).data).data
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def forum_topic_detail(request, topic_id):
     """
-    Get topic detail with all replies.
+    Get topic detail with the first page of replies.
     GET /api/forum/topics/<id>/
+    Further pages: follow replies.next (GET /api/forum/topics/<id>/replies/?cursor=)
     """
     try:
-        topic = ForumTopic.objects.get(pk=topic_id)
+        topic = ForumTopic.objects.select_related("author").get(pk=topic_id)
     except ForumTopic.DoesNotExist:
         return Response({"error": "Topic not found"}, status=status.HTTP_404_NOT_FOUND)
     
-    serializer = ForumTopicSerializer(topic, context={"request": request})
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    data = ForumTopicSerializer(topic, context={"request": request}).data
+    data["replies"] = _paginated_replies(request, topic.id)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def forum_topic_replies(request, topic_id):
+    """
+    Cursor-paginated replies of a topic, oldest first.
+    GET /api/forum/topics/<id>/replies/?cursor=&page_size=
+    """
+    if not ForumTopic.objects.filter(pk=topic_id).exists():
+        return Response({"error": "Topic not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(_paginated_replies(request, topic_id), status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
@@ -1942,9 +2451,11 @@ def forum_topic_reply(request, topic_id):
     serializer = ForumReplySerializer(data=request.data, context={"request": request})
     if serializer.is_valid():
         serializer.save(topic=topic, author=request.user)
-        # Return updated topic with all replies
-        topic_serializer = ForumTopicSerializer(topic, context={"request": request})
-        return Response(topic_serializer.data, status=status.HTTP_201_CREATED)
+        # Only the new reply: clients append it instead of reloading the thread
+        return Response(
+            {"reply": serializer.data, "reply_count": ForumTopic.objects.values_list("reply_count", flat=True).get(pk=topic.pk)},
+            status=status.HTTP_201_CREATED,
+        )
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -1961,7 +2472,7 @@ def forum_topic_delete(request, topic_id):
         return Response({"error": "Topic not found"}, status=status.HTTP_404_NOT_FOUND)
     
     # Check if user is admin
-    if not (request.user.is_staff or request.user.is_superuser):
+    if not is_admin(request.user):
         return Response(
             {"error": "Only administrators can delete topics."},
             status=status.HTTP_403_FORBIDDEN
@@ -1984,7 +2495,7 @@ def forum_reply_delete(request, reply_id):
         return Response({"error": "Reply not found"}, status=status.HTTP_404_NOT_FOUND)
     
     # Check if user is admin
-    if not (request.user.is_staff or request.user.is_superuser):
+    if not is_admin(request.user):
         return Response(
             {"error": "Only administrators can delete replies."},
             status=status.HTTP_403_FORBIDDEN
@@ -1998,6 +2509,62 @@ def forum_reply_delete(request, reply_id):
 # INBOX
 # ---------------------------------------------------------------------------
 
+def _pending_handshakes_queryset(user):
+    """Proposed handshakes waiting for the user (as provider) to answer"""
+    return Handshake.objects.filter(
+        provider=user,
+        status="proposed"
+    ).select_related("offer", "request", "provider", "seeker").order_by("-created_at")
+
+
+def _unread_messages_queryset(user):
+    """Unread messages sent to the user, newest first"""
+    # Only conversations whose unread counter is non-zero need to be scanned
+    unread_handshakes = UnreadCounter.objects.filter(user=user, count__gt=0).values("handshake_id")
+    return Message.objects.filter(
+        handshake_id__in=unread_handshakes,
+        is_read=False
+    ).exclude(sender=user).select_related("sender").order_by("-created_at")
+
+
+def _unread_total(user):
+    return UnreadCounter.objects.filter(user=user, count__gt=0).aggregate(
+        total=models.Sum("count")
+    )["total"] or 0
+
+
+def _conversations_queryset(user):
+    """
+    The user's conversations (handshakes with messages), newest first.
+    One query over the unread counters; the latest message and the message
+    total (hot rows plus archived ones) are correlated subqueries, so the
+    cost does not grow with the number of conversations on the page.
+    """
+    from django.db.models.functions import Coalesce
+    from .chat_utils import CHAT_STATUSES
+    
+    latest = Message.objects.filter(pk=models.OuterRef("last_message_id"))
+    total = Message.objects.filter(handshake_id=models.OuterRef("handshake_id")).order_by().values(
+        "handshake_id"
+    ).annotate(total=models.Count("id")).values("total")
+    
+    archived = MessageArchive.objects.filter(handshake_id=models.OuterRef("handshake_id")).values("message_count")
+    
+    return UnreadCounter.objects.filter(
+        user=user, last_message_id__gt=0, handshake__status__in=CHAT_STATUSES
+    ).select_related(
+        "handshake__offer", "handshake__request", "handshake__provider", "handshake__seeker"
+    ).annotate(
+        latest_sender_id=models.Subquery(latest.values("sender_id")),
+        latest_sender_username=models.Subquery(latest.values("sender__username")),
+        latest_content=models.Subquery(latest.values("content")),
+        latest_created_at=models.Subquery(latest.values("created_at")),
+        latest_is_read=models.Subquery(latest.values("is_read")),
+        total_messages=Coalesce(models.Subquery(total, output_field=models.IntegerField()), 0)
+        + Coalesce(models.Subquery(archived), 0),
+    ).order_by("-latest_created_at", "-last_message_id")
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def inbox_pending_handshakes(request):
@@ -2006,12 +2573,7 @@ def inbox_pending_handshakes(request):
     GET /api/inbox/pending-handshakes/
     Returns handshakes with status "proposed" where user is the provider.
     """
-    user = request.user
-    pending_handshakes = Handshake.objects.filter(
-        provider=user,
-        status="proposed"
-    ).order_by("-created_at")
-    
+    pending_handshakes = _pending_handshakes_queryset(request.user)
     serializer = HandshakeSerializer(pending_handshakes, many=True, context={"request": request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -2024,61 +2586,78 @@ def inbox_unread_messages(request):
     GET /api/inbox/unread-messages/
     Returns messages in handshakes where user is a participant but not the sender, and is_read=False.
     """
-    user = request.user
-    # Get all handshakes where user is participant
-    user_handshakes = Handshake.objects.filter(
-        models.Q(provider=user) | models.Q(seeker=user)
-    )
-    
-    # Get unread messages where user is not the sender
-    unread_messages = Message.objects.filter(
-        handshake__in=user_handshakes,
-        is_read=False
-    ).exclude(sender=user).order_by("-created_at")
-    
+    unread_messages = _unread_messages_queryset(request.user)
     serializer = MessageSerializer(unread_messages, many=True, context={"request": request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def inbox_unread_count(request):
+    """
+    Total unread messages for the inbox badge.
+    GET /api/inbox/unread-count/
+    Reads the per-conversation unread counters, not the messages.
+    """
+    return Response({"unread_count": _unread_total(request.user)}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def inbox_conversations(request):
     """
-    Get all conversations (handshakes with messages) for the current user.
-    GET /api/inbox/conversations/
-    Returns all handshakes that have messages, grouped by handshake.
+    Paginated conversations (handshakes with messages) for the current user, newest first.
+    GET /api/inbox/conversations/?page=1&page_size=20
     """
-    user = request.user
-    # Get all handshakes where user is participant
-    user_handshakes = Handshake.objects.filter(
-        models.Q(provider=user) | models.Q(seeker=user)
-    ).filter(status__in=["accepted", "in_progress", "completed"])
-    
-    # Get handshakes that have messages
-    conversations = []
-    for handshake in user_handshakes:
-        messages = Message.objects.filter(handshake=handshake).order_by("-created_at")
-        if messages.exists():
-            # Get the latest message
-            latest_message = messages.first()
-            unread_count = messages.filter(is_read=False).exclude(sender=user).count()
-            
-            # Get the other participant
-            other_user = handshake.seeker if handshake.provider == user else handshake.provider
-            
-            conversations.append({
-                "handshake": HandshakeSerializer(handshake, context={"request": request}).data,
-                "other_user_id": other_user.id,
-                "other_username": other_user.username,
-                "latest_message": MessageSerializer(latest_message, context={"request": request}).data,
-                "unread_count": unread_count,
-                "total_messages": messages.count(),
-            })
-    
-    # Sort by latest message time (newest first)
-    conversations.sort(key=lambda x: x["latest_message"]["created_at"], reverse=True)
-    
-    return Response(conversations, status=status.HTTP_200_OK)
+    from .pagination import StandardPagination
+    from .serializers import ConversationSerializer
+    
+    paginator = StandardPagination()
+    page = paginator.paginate_queryset(_conversations_queryset(request.user), request)
+    serializer = ConversationSerializer(page, many=True, context={"request": request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def inbox_summary(request):
+    """
+    Counts plus the first page of every inbox section in one response.
+    GET /api/inbox/summary/
+    Returns: {pending_handshakes, unread_messages, conversations}, each {count, results}.
+    Cached per user; message and handshake changes invalidate the entry.
+    """
+    from django.core.cache import cache
+    from .inbox_utils import INBOX_SUMMARY_CACHE_SECONDS, inbox_summary_cache_key
+    from .pagination import StandardPagination
+    from .serializers import ConversationSerializer
+    
+    cache_key = inbox_summary_cache_key(request.user.id)
+    summary = cache.get(cache_key)
+    if summary is None:
+        user = request.user
+        page_size = StandardPagination.page_size
+        context = {"request": request}
+        pending = _pending_handshakes_queryset(user)
+        conversations = _conversations_queryset(user)
+        summary = {
+            "pending_handshakes": {
+                "count": pending.count(),
+                "results": HandshakeSerializer(pending[:page_size], many=True, context=context).data,
+            },
+            "unread_messages": {
+                "count": _unread_total(user),
+                "results": MessageSerializer(
+                    _unread_messages_queryset(user)[:page_size], many=True, context=context
+                ).data,
+            },
+            "conversations": {
+                "count": conversations.count(),
+                "results": ConversationSerializer(conversations[:page_size], many=True, context=context).data,
+            },
+        }
+        cache.set(cache_key, summary, INBOX_SUMMARY_CACHE_SECONDS)
+    return Response(summary, status=status.HTTP_200_OK)
 
 
 # ---------------------------------------------------------------------------
@@ -49,6 +49,10 @@ fi
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
+# Shared cache table (CACHES in settings.py); a no-op when it already exists
+echo "Creating cache table..."
+python manage.py createcachetable
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
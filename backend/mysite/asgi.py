@@ -2,6 +2,10 @@
 ASGI config for mysite project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+This is the production entry point (gunicorn with uvicorn workers) so that
+long-lived responses such as the chat event stream do not hold a worker thread.
+WebSocket connections are routed to the chat socket (core.chat_socket);
+everything else is handled by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +17,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up
+from core.chat_socket import chat_socket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        await chat_socket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
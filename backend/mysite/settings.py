@@ -146,7 +146,8 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STORAGES = {
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        # Files are named by content hash: deduplicated and served as immutable
+        "BACKEND": "core.storage.ContentAddressedStorage",
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"
@@ -156,19 +157,51 @@ STORAGES = {
 # Media files (user uploads)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Threads generating profile picture thumbnails in the background (0 = inline)
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '2'))
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache shared by every worker process, so entries dropped by signals (inbox
+# summary, cached users) are dropped for all of them. With a database the
+# cache lives in its table (created by `createcachetable` in entrypoint.sh);
+# the SQLite dev server falls back to the per-process local-memory cache.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'database' if DATABASE_URL else 'locmem')
+if CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise ValueError("CACHE_BACKEND must be 'database' or 'locmem'")
+
 
 
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ProfileJWTAuthentication',
     ),
 }
 
+# Cache the authenticated user + profile across requests for this many seconds
+# (0 = one query per request). Entries are dropped when the user or profile is
+# saved or deleted, but not on queryset .update(): e.g. deactivating users with
+# User.objects.filter(...).update(is_active=False) takes up to this long to
+# lock them out. Needs the shared cache, or other workers never see the drop.
+AUTH_USER_CACHE_SECONDS = int(os.getenv('AUTH_USER_CACHE_SECONDS', '0'))
+if AUTH_USER_CACHE_SECONDS and CACHE_BACKEND != 'database':
+    raise ValueError("AUTH_USER_CACHE_SECONDS requires the shared cache (CACHE_BACKEND=database)")
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),   # token 30 dk geçerli
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),      # refresh token 1 gün geçerli
@@ -185,10 +218,18 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'False').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER if EMAIL_HOST_USER else 'noreply@thehive.com')
+# Seconds a blocking SMTP operation may take; must stay well under the outbox
+# lease (core.email_utils.OUTBOX_LEASE_SECONDS, 300) so a hung send cannot
+# outlive its claim and be delivered twice
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))
 
 # Frontend URL for email links
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
+# Real-time chat broker: "memory" (single worker, other workers are picked up by
+# database polling) or "postgres" (LISTEN/NOTIFY fan-out across workers)
+CHAT_BROKER = os.getenv('CHAT_BROKER', 'memory')
+
 # Logging configuration (logs to stdout/stderr for DigitalOcean)
 LOGGING = {
     'version': 1,
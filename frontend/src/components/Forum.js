@@ -5,7 +5,11 @@ function Forum() {
   const navigate = useNavigate();
   const { topicId } = useParams();
   const [topics, setTopics] = useState([]);
+  const [topicsNext, setTopicsNext] = useState(null);
+  const [topicSort, setTopicSort] = useState("active");
   const [topic, setTopic] = useState(null);
+  const [replies, setReplies] = useState([]);
+  const [repliesNext, setRepliesNext] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [showNewTopicForm, setShowNewTopicForm] = useState(false);
@@ -53,14 +57,14 @@ function Forum() {
     } else {
       loadTopics();
     }
-  }, [topicId, API_BASE_URL]);
+  }, [topicId, topicSort, API_BASE_URL]);
 
   const loadTopics = async () => {
     const token = localStorage.getItem("access");
     if (!token) return;
 
     try {
-      const response = await fetch(`${API_BASE_URL}/api/forum/topics/`, {
+      const response = await fetch(`${API_BASE_URL}/api/forum/topics/?sort=${topicSort}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -71,7 +75,8 @@ function Forum() {
       }
 
       const data = await response.json();
-      setTopics(Array.isArray(data) ? data : []);
+      setTopics(data.results || []);
+      setTopicsNext(data.next || null);
       setLoading(false);
     } catch (err) {
       setError(err.message);
@@ -79,6 +84,24 @@ function Forum() {
     }
   };
 
+  const loadMoreTopics = async () => {
+    const token = localStorage.getItem("access");
+    if (!token || !topicsNext) return;
+
+    try {
+      const response = await fetch(topicsNext, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setTopics((prev) => [...prev, ...(data.results || [])]);
+        setTopicsNext(data.next || null);
+      }
+    } catch (err) {
+      console.error("Error loading topics:", err);
+    }
+  };
+
   const loadTopicDetail = async (id) => {
     const token = localStorage.getItem("access");
     if (!token) return;
@@ -96,6 +119,8 @@ function Forum() {
 
       const data = await response.json();
       setTopic(data);
+      setReplies(data.replies?.results || []);
+      setRepliesNext(data.replies?.next || null);
       setLoading(false);
     } catch (err) {
       setError(err.message);
@@ -103,6 +128,24 @@ function Forum() {
     }
   };
 
+  const loadMoreReplies = async () => {
+    const token = localStorage.getItem("access");
+    if (!token || !repliesNext) return;
+
+    try {
+      const response = await fetch(repliesNext, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setReplies((prev) => [...prev, ...(data.results || [])]);
+        setRepliesNext(data.next || null);
+      }
+    } catch (err) {
+      console.error("Error loading replies:", err);
+    }
+  };
+
   const handleCreateTopic = async () => {
     if (!newTopicTitle.trim() || !newTopicBody.trim()) {
       setError("Please fill in both title and body.");
@@ -176,8 +219,11 @@ function Forum() {
       if (response.ok) {
         setNewReplyBody("");
         setError("");
-        // Update topic with new reply
-        setTopic(data);
+        // Append the new reply once the thread is fully loaded; otherwise it arrives with the last page
+        if (!repliesNext) {
+          setReplies((prev) => [...prev, data.reply]);
+        }
+        setTopic((prev) => ({ ...prev, reply_count: data.reply_count }));
       } else {
         setError(data.error || "Failed to post reply.");
       }
@@ -329,12 +375,12 @@ function Forum() {
 
             <div className="border-t pt-6 mt-6">
               <h2 className="text-2xl font-semibold text-amber-700 mb-4">
-                Replies ({topic.replies?.length || 0})
+                Replies ({topic.reply_count || 0})
               </h2>
 
-              {topic.replies && topic.replies.length > 0 ? (
+              {replies.length > 0 ? (
                 <div className="space-y-4 mb-6">
-                  {topic.replies.map((reply) => (
+                  {replies.map((reply) => (
                     <div key={reply.id} className="bg-gray-50 p-4 rounded-lg">
                       <div className="flex justify-between items-start mb-2">
                         <div>
@@ -363,6 +409,14 @@ function Forum() {
                       <p className="text-gray-700 whitespace-pre-wrap">{reply.body}</p>
                     </div>
                   ))}
+                  {repliesNext && (
+                    <button
+                      onClick={loadMoreReplies}
+                      className="w-full py-2 text-amber-700 font-semibold hover:bg-amber-50 rounded-lg"
+                    >
+                      Load more replies
+                    </button>
+                  )}
                 </div>
               ) : (
                 <p className="text-gray-600 mb-6">No replies yet. Be the first to reply!</p>
@@ -397,6 +451,15 @@ function Forum() {
       <div className="max-w-4xl mx-auto px-4">
         <div className="flex justify-between items-center mb-6">
           <h1 className="text-4xl font-bold text-amber-700">Community Forum</h1>
+          <select
+            value={topicSort}
+            onChange={(e) => setTopicSort(e.target.value)}
+            className="ml-auto mr-3 p-2 border rounded-lg focus:outline-none focus:ring-2 focus:ring-amber-400"
+          >
+            <option value="active">Latest activity</option>
+            <option value="hot">Hot</option>
+            <option value="new">Newest</option>
+          </select>
           <button
             onClick={() => setShowNewTopicForm(!showNewTopicForm)}
             className="px-6 py-2 bg-amber-500 text-white rounded-lg hover:bg-amber-600 font-semibold"
@@ -465,7 +528,7 @@ function Forum() {
                     </button>
                   )}
                 </div>
-                <p className="text-gray-600 mb-3 line-clamp-2">{t.body}</p>
+                <p className="text-gray-600 mb-3 line-clamp-2">{t.excerpt}</p>
                 <div className="flex justify-between items-center text-sm text-gray-500">
                   <span>
                     by{" "}
@@ -482,10 +545,24 @@ function Forum() {
                   </span>
                   <span className="text-amber-600 font-semibold">
                     {t.reply_count || 0} {t.reply_count === 1 ? "reply" : "replies"}
+                    {t.last_reply_at && (
+                      <span className="text-gray-500 font-normal">
+                        {" "}• last by {t.last_reply_author_username} on{" "}
+                        {new Date(t.last_reply_at).toLocaleString()}
+                      </span>
+                    )}
                   </span>
                 </div>
               </div>
             ))}
+            {topicsNext && (
+              <button
+                onClick={loadMoreTopics}
+                className="w-full py-2 text-amber-700 font-semibold hover:bg-amber-50 rounded-lg"
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -6,7 +6,9 @@ function Inbox() {
   const [activeTab, setActiveTab] = useState("pending-handshakes");
   const [pendingHandshakes, setPendingHandshakes] = useState([]);
   const [unreadMessages, setUnreadMessages] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [conversations, setConversations] = useState([]);
+  const [conversationsNext, setConversationsNext] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
 
@@ -23,8 +25,9 @@ function Inbox() {
     }
 
     loadTabData();
-  }, [activeTab, API_BASE_URL]);
+  }, [API_BASE_URL]);
 
+  // One request fills every tab: counts plus the first page of each section
   const loadTabData = async () => {
     const token = localStorage.getItem("access");
     if (!token) return;
@@ -33,36 +36,25 @@ function Inbox() {
     setError("");
 
     try {
-      const headers = {
-        "Content-Type": "application/json",
-        Authorization: `Bearer ${token}`,
-      };
-
-      if (activeTab === "pending-handshakes") {
-        const response = await fetch(`${API_BASE_URL}/api/inbox/pending-handshakes/`, { headers });
-        if (response.ok) {
-          const data = await response.json();
-          setPendingHandshakes(Array.isArray(data) ? data : []);
-        } else {
-          throw new Error("Failed to load pending handshakes");
-        }
-      } else if (activeTab === "unread-messages") {
-        const response = await fetch(`${API_BASE_URL}/api/inbox/unread-messages/`, { headers });
-        if (response.ok) {
-          const data = await response.json();
-          setUnreadMessages(Array.isArray(data) ? data : []);
-        } else {
-          throw new Error("Failed to load unread messages");
-        }
-      } else if (activeTab === "conversations") {
-        const response = await fetch(`${API_BASE_URL}/api/inbox/conversations/`, { headers });
-        if (response.ok) {
-          const data = await response.json();
-          setConversations(Array.isArray(data) ? data : []);
-        } else {
-          throw new Error("Failed to load conversations");
-        }
+      const response = await fetch(`${API_BASE_URL}/api/inbox/summary/`, {
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+      });
+      if (!response.ok) {
+        throw new Error("Failed to load inbox");
       }
+      const data = await response.json();
+      setPendingHandshakes(data.pending_handshakes.results);
+      setUnreadMessages(data.unread_messages.results);
+      setUnreadCount(data.unread_messages.count);
+      setConversations(data.conversations.results);
+      setConversationsNext(
+        data.conversations.count > data.conversations.results.length
+          ? `${API_BASE_URL}/api/inbox/conversations/?page=2`
+          : null
+      );
     } catch (err) {
       setError(err.message || "Failed to load data.");
     } finally {
@@ -70,6 +62,24 @@ function Inbox() {
     }
   };
 
+  const loadMoreConversations = async () => {
+    const token = localStorage.getItem("access");
+    if (!token || !conversationsNext) return;
+
+    try {
+      const response = await fetch(conversationsNext, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setConversations((prev) => [...prev, ...(data.results || [])]);
+        setConversationsNext(data.next || null);
+      }
+    } catch (err) {
+      console.error("Error loading conversations:", err);
+    }
+  };
+
   const handleAcceptHandshake = async (handshakeId) => {
     const token = localStorage.getItem("access");
     if (!token) return;
@@ -175,9 +185,9 @@ function Inbox() {
               }`}
             >
               Unread Messages
-              {unreadMessages.length > 0 && (
+              {unreadCount > 0 && (
                 <span className="ml-2 px-2 py-1 bg-red-500 text-white text-xs rounded-full">
-                  {unreadMessages.length}
+                  {unreadCount}
                 </span>
               )}
             </button>
@@ -351,6 +361,14 @@ function Inbox() {
                             </div>
                           </div>
                         ))}
+                        {conversationsNext && (
+                          <button
+                            onClick={loadMoreConversations}
+                            className="w-full py-2 text-amber-700 font-semibold hover:bg-amber-50 rounded-lg"
+                          >
+                            Load more
+                          </button>
+                        )}
                       </div>
                     )}
                   </div>
@@ -236,13 +236,15 @@ function OfferDetail() {
     }
   };
 
-  const loadMessages = async (handshakeId) => {
+  // Load the conversation, or with afterId only the newer messages (appended)
+  const loadMessages = async (handshakeId, afterId = null) => {
     const token = localStorage.getItem("access");
-    if (!token) return;
+    if (!token) return [];
 
+    const delta = afterId !== null ? `&after_id=${afterId}` : "";
     try {
       const response = await fetch(
-        `${API_BASE_URL}/api/messages/?handshake=${handshakeId}`,
+        `${API_BASE_URL}/api/messages/?handshake=${handshakeId}${delta}`,
         {
           headers: {
             Authorization: `Bearer ${token}`,
@@ -252,11 +254,85 @@ function OfferDetail() {
 
       if (response.ok) {
         const data = await response.json();
-        setMessages(Array.isArray(data) ? data : []);
+        const loaded = Array.isArray(data) ? data : [];
+        if (afterId === null) {
+          setMessages(loaded);
+        } else if (loaded.length > 0) {
+          setMessages((prev) => [
+            ...prev,
+            ...loaded.filter((incoming) => !prev.some((msg) => msg.id === incoming.id)),
+          ]);
+        }
+        return loaded;
       }
     } catch (err) {
       console.error("Error loading messages:", err);
     }
+    return [];
+  };
+
+  const markMessagesRead = (handshakeId, upToId) => {
+    const token = localStorage.getItem("access");
+    if (!token || !upToId) return;
+
+    // One request flips every message up to upToId, instead of one per message
+    fetch(`${API_BASE_URL}/api/messages/mark-read/`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({ handshake: handshakeId, up_to_id: upToId }),
+    }).catch((err) => console.error("Error marking messages read:", err));
+  };
+
+  // Swap the refresh token for a new access token; false when the session is over
+  const refreshAccessToken = async () => {
+    const refresh = localStorage.getItem("refresh");
+    if (!refresh) return false;
+
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/token/refresh/`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ refresh }),
+      });
+      if (!response.ok) return false;
+      const data = await response.json();
+      localStorage.setItem("access", data.access);
+      // Refresh tokens are rotated
+      if (data.refresh) localStorage.setItem("refresh", data.refresh);
+      return true;
+    } catch (err) {
+      console.error("Error refreshing token:", err);
+      return false;
+    }
+  };
+
+  // Short-lived ticket for opening the message stream, so the JWT never appears in a URL
+  const fetchStreamTicket = async (handshakeId, retried = false) => {
+    try {
+      const response = await fetch(
+        `${API_BASE_URL}/api/messages/stream/${handshakeId}/ticket/`,
+        {
+          method: "POST",
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem("access")}`,
+          },
+        }
+      );
+      if (response.ok) {
+        const data = await response.json();
+        return data.ticket;
+      }
+      // An expired access token is refreshed once before giving up
+      if (response.status === 401 && !retried && (await refreshAccessToken())) {
+        return fetchStreamTicket(handshakeId, true);
+      }
+    } catch (err) {
+      console.error("Error opening message stream:", err);
+    }
+    return null;
   };
 
   const handleAskQuestion = async () => {
@@ -430,16 +506,86 @@ function OfferDetail() {
     }
   };
 
-  // Load messages when handshake is accepted and chat is shown
+  // Load messages when handshake is accepted and chat is shown,
+  // then receive new ones over Server-Sent Events instead of polling
   useEffect(() => {
     const currentHandshake = offer?.active_handshake;
-    if (showChat && currentHandshake && currentHandshake.status !== "proposed") {
-      loadMessages(currentHandshake.id);
-      // Poll for new messages every 3 seconds
-      const interval = setInterval(() => {
-        loadMessages(currentHandshake.id);
-      }, 3000);
-      return () => clearInterval(interval);
+    const token = localStorage.getItem("access");
+    if (showChat && currentHandshake && currentHandshake.status !== "proposed" && token) {
+      let source = null;
+      let interval = null;
+      let reconnectTimer = null;
+      let failures = 0;
+      let lastId = 0;
+      let cancelled = false;
+
+      const startPolling = () => {
+        // Poll every 3 seconds when the stream is unavailable
+        if (interval) return;
+        interval = setInterval(() => {
+          // Only fetch what arrived since the last message seen
+          loadMessages(currentHandshake.id, lastId).then((loaded) => {
+            if (cancelled || loaded.length === 0) return;
+            lastId = Math.max(lastId, loaded[loaded.length - 1].id);
+            markMessagesRead(currentHandshake.id, lastId);
+          });
+        }, 3000);
+      };
+
+      const connect = async () => {
+        const ticket = await fetchStreamTicket(currentHandshake.id);
+        if (cancelled) return;
+        if (!ticket) {
+          startPolling();
+          return;
+        }
+        source = new EventSource(
+          `${API_BASE_URL}/api/messages/stream/${currentHandshake.id}/?ticket=${encodeURIComponent(ticket)}&after_id=${lastId}`
+        );
+        source.onopen = () => {
+          failures = 0;
+        };
+        source.onmessage = (event) => {
+          const incoming = JSON.parse(event.data);
+          lastId = Math.max(lastId, incoming.id);
+          setMessages((prev) =>
+            prev.some((msg) => msg.id === incoming.id) ? prev : [...prev, incoming]
+          );
+          markMessagesRead(currentHandshake.id, incoming.id);
+        };
+        source.onerror = () => {
+          // Tickets expire within a minute, so rather than letting EventSource
+          // retry the same URL, reconnect with a fresh ticket (and token) from lastId
+          source.close();
+          source = null;
+          if (cancelled) return;
+          failures += 1;
+          if (failures > 5) {
+            startPolling();
+            return;
+          }
+          reconnectTimer = setTimeout(connect, Math.min(1000 * 2 ** failures, 30000));
+        };
+      };
+
+      loadMessages(currentHandshake.id).then((loaded) => {
+        if (cancelled) return;
+        lastId = loaded.length > 0 ? loaded[loaded.length - 1].id : 0;
+        if (typeof EventSource === "undefined") {
+          // Browsers without SSE support fall back to polling
+          startPolling();
+          return;
+        }
+        markMessagesRead(currentHandshake.id, lastId);
+        connect();
+      });
+
+      return () => {
+        cancelled = true;
+        if (source) source.close();
+        if (interval) clearInterval(interval);
+        if (reconnectTimer) clearTimeout(reconnectTimer);
+      };
     }
   }, [showChat, offer, API_BASE_URL]);
 
@@ -5,6 +5,8 @@ function PublicProfile() {
   const { id } = useParams();
   const navigate = useNavigate();
   const [profile, setProfile] = useState(null);
+  const [extraRatings, setExtraRatings] = useState([]);
+  const [ratingsPage, setRatingsPage] = useState(1);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
 
@@ -48,6 +50,25 @@ function PublicProfile() {
       });
   }, [id, API_BASE_URL]);
 
+  // The profile embeds only the newest ratings; older ones are loaded page by page
+  const loadMoreRatings = async () => {
+    const token = localStorage.getItem("access");
+    const nextPage = ratingsPage + 1;
+    try {
+      const response = await fetch(
+        `${API_BASE_URL}/api/ratings/user/${id}/?page=${nextPage}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      if (response.ok) {
+        const data = await response.json();
+        setExtraRatings((prev) => [...prev, ...(data.results || [])]);
+        setRatingsPage(nextPage);
+      }
+    } catch (err) {
+      console.error("Error loading ratings:", err);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-yellow-50 flex items-center justify-center">
@@ -175,10 +196,10 @@ function PublicProfile() {
           {profile.ratings && profile.ratings.length > 0 && (
             <div className="mb-6">
               <h2 className="text-2xl font-semibold text-amber-700 mb-4">
-                Ratings & Feedback ({profile.ratings.length})
+                Ratings & Feedback ({profile.total_ratings})
               </h2>
               <div className="space-y-4">
-                {profile.ratings.map((rating) => (
+                {[...profile.ratings, ...extraRatings].map((rating) => (
                   <div
                     key={rating.id}
                     className="bg-gray-50 border border-gray-200 rounded-lg p-4"
@@ -226,6 +247,14 @@ function PublicProfile() {
                     )}
                   </div>
                 ))}
+                {profile.ratings.length + extraRatings.length < profile.total_ratings && (
+                  <button
+                    onClick={loadMoreRatings}
+                    className="w-full py-2 text-amber-700 font-semibold hover:bg-amber-50 rounded-lg"
+                  >
+                    Show more ratings
+                  </button>
+                )}
               </div>
             </div>
           )}